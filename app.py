@@ -1,36 +1,217 @@
-from flask import Flask
-from flasgger import Swagger
+import time
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
 #import os
-from database import db
+from config import Config
+from database import configurar_sqlite, db, iniciar_replicas
+
+
+def create_app(config=Config):
+    """Cria e configura a aplicação.
+
+    ``config`` é uma classe/objeto de configuração ou um dicionário com as
+    chaves a usar (ex.: ``{'SQLALCHEMY_DATABASE_URI': 'sqlite://'}`` em
+    testes). Não acessa o banco: as tabelas são criadas com ``flask
+    criar-banco``.
+    """
+    # Imports aqui para que importar o módulo (CLI, workers, testes) não carregue rotas e Swagger
+    from utils.cache import iniciar_cache
+    from utils.compressao import iniciar_compressao
+    from utils.fila_notas import iniciar_fila_notas
+    from utils.instrumentacao import iniciar_instrumentacao
+    from utils.media import validar_pesos
+    from utils.metricas import iniciar_metricas
+    from utils.serializacao import ProvedorJSON
+    from utils.versoes import monitorar_alteracoes
+
+    # Inicializa o Flask (JSON com orjson, se instalado)
+    app = Flask(__name__)
+    app.json = ProvedorJSON(app)
+
+    # Configurações do banco (DATABASE_URL, pool e timeouts) e da aplicação, lidas do ambiente
+    if isinstance(config, dict):
+        app.config.from_object(Config)
+        app.config.from_mapping(config)
+    else:
+        app.config.from_object(config)
+    # Pesos da média final conferidos já aqui, não na primeira nota gravada
+    validar_pesos(app.config)
+
+    # Compressão registrada primeiro para rodar por último entre os after_request
+    iniciar_compressao(app)
+
+    # Configuração do Swagger (antes das rotas, para que o flasgger as registre)
+    if app.config.get('SWAGGER_HABILITADO', True):
+        from flasgger import Swagger
+
+        app.config['SWAGGER'] = {
+            'title': 'API Escola',
+            'uiversion': 3,
+            'swagger_ui': app.config.get('SWAGGER_UI', True)
+        }
+        Swagger(app)
+
+    # Inicialização do banco (e das réplicas de leitura, se configuradas)
+    db.init_app(app)
+    iniciar_replicas(app)
+    with app.app_context():
+        # WAL, busy timeout e cache do SQLite em cada conexão
+        for engine in db.engines.values():
+            configurar_sqlite(engine, app.config['SQLITE_PRAGMAS'])
+        # Versões das tabelas (ETags das listagens) incrementadas a cada commit
+        monitorar_alteracoes(db.engine, app.config.get('VERSOES_FATIAS', 1))
+    # Server-Timing e statements SQL por requisição (só se INSTRUMENTACAO_HABILITADA)
+    iniciar_instrumentacao(app)
+    # Contadores e histogramas por rota para o Prometheus (/metrics)
+    iniciar_metricas(app)
+
+    # Importação de rotas
+    from routes import professores, turmas, alunos, estatisticas, lote, sistema
+    app.register_blueprint(professores.appProfessor)
+    app.register_blueprint(turmas.appTurma)
+    app.register_blueprint(alunos.appAluno)
+    app.register_blueprint(estatisticas.appEstatistica)
+    app.register_blueprint(lote.appLote)
+    app.register_blueprint(sistema.appSistema)
+
+    # Cache de leitura dos registros
+    iniciar_cache(app)
+    # Fila de notas com gravação em segundo plano (opcional)
+    iniciar_fila_notas(app, alunos.atualizar_alunos)
+
+    # Spec OpenAPI servido pronto da memória (depois das rotas registradas)
+    if app.config.get('SWAGGER_HABILITADO', True):
+        from utils.documentacao import preparar_spec
+
+        preparar_spec(app)
+
+    # Comandos de linha de comando
+    for comando in (criar_banco_cli, importar_alunos_cli, reconstruir_resumos_cli, recalcular_medias_cli, sincronizar_replicas_cli, gerar_spec_cli):
+        app.cli.add_command(comando)
+
+    return app
+
+@click.command('criar-banco')
+@with_appcontext
+def criar_banco_cli():
+    """Cria as tabelas, colunas e índices que faltam (rodar a cada deploy)."""
+    from utils.esquema import criar_esquema
+
+    criar_esquema()
+    click.echo('Banco de dados atualizado')
+
+@click.command('importar-alunos')
+@click.argument('arquivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--formato', type=click.Choice(['csv', 'ndjson']), help='Formato do arquivo (padrão pela extensão).')
+@click.option('--lote', type=click.IntRange(min=1), help='Quantidade de linhas gravadas por commit.')
+@with_appcontext
+def importar_alunos_cli(arquivo, formato, lote):
+    """Importa alunos de um arquivo CSV ou NDJSON."""
+    from routes import alunos
+    from utils.importacao import detectar_formato, importar, ler_registros
+
+    def progresso(resumo):
+        click.echo(f"{resumo['processados']} linhas processadas, {resumo['importados']} importadas, {resumo['rejeitados']} rejeitadas")
+
+    with open(arquivo, encoding='utf-8-sig', newline='') as f:
+        registros = ler_registros(f, formato or detectar_formato(arquivo), alunos.aluno_de_csv)
+        resumo = importar(registros, alunos.criar_alunos, lote or current_app.config['IMPORTACAO_TAMANHO_LOTE'], progresso=progresso)
+
+    for erro in resumo['erros']:
+        click.echo(f"Linha {erro['linha']}: {erro['message']}", err=True)
+    if resumo['rejeitados'] > len(resumo['erros']):
+        click.echo(f"... e mais {resumo['rejeitados'] - len(resumo['erros'])} linhas rejeitadas", err=True)
+
+@click.command('reconstruir-resumos')
+@click.option('--verificar', is_flag=True, help='Só compara os resumos gravados com os alunos, sem alterar.')
+@with_appcontext
+def reconstruir_resumos_cli(verificar):
+    """Recalcula os resumos de notas das turmas a partir dos alunos."""
+    from utils.resumo import reconstruir_resumos, verificar_resumos
+
+    if verificar:
+        divergencias = verificar_resumos()
+        for divergencia in divergencias:
+            click.echo(f"Turma {divergencia['turma_id']}: {divergencia['coluna']} gravado {divergencia['gravado']}, esperado {divergencia['esperado']}")
+        click.echo(f'{len(divergencias)} divergências encontradas')
+        if divergencias:
+            raise SystemExit(1)
+        return
+
+    quantidade = reconstruir_resumos()
+    db.session.commit()
+    click.echo(f'{quantidade} resumos de turma reconstruídos')
+
+@click.command('recalcular-medias')
+@click.option('--verificar', is_flag=True, help='Só conta os alunos com média diferente da calculada, sem alterar.')
+@with_appcontext
+def recalcular_medias_cli(verificar):
+    """Recalcula a média final dos alunos com os pesos configurados, em um UPDATE."""
+    from utils.media import medias_divergentes, pesos_media, recalcular_medias
 
-# Inicializa o Flask
-app = Flask(__name__)
+    peso_primeiro, peso_segundo = pesos_media()
+    if verificar:
+        quantidade = medias_divergentes()
+        click.echo(f'{quantidade} alunos com média diferente da calculada (pesos {peso_primeiro:g} e {peso_segundo:g})')
+        if quantidade:
+            raise SystemExit(1)
+        return
 
-# Configuração do Swagger
-app.config['SWAGGER'] = {
-    'title': 'API Escola',
-    'uiversion': 3
-}
-swagger = Swagger(app)
+    inicio = time.perf_counter()
+    quantidade = recalcular_medias()
+    db.session.commit()
+    click.echo(f'{quantidade} médias recalculadas (pesos {peso_primeiro:g} e {peso_segundo:g}) em {time.perf_counter() - inicio:.1f} s')
 
-# Configurações do banco SQLite
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///app.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+@click.command('sincronizar-replicas')
+@with_appcontext
+def sincronizar_replicas_cli():
+    """Copia o banco primário para as réplicas SQLite (testes locais de réplica)."""
+    replicas = {chave: engine for chave, engine in db.engines.items() if chave}
+    if db.engine.dialect.name != 'sqlite' or any(engine.dialect.name != 'sqlite' for engine in replicas.values()):
+        raise click.ClickException('Disponível apenas com primário e réplicas SQLite; use a replicação do próprio banco.')
+    origem = db.engine.raw_connection()
+    try:
+        for chave, engine in replicas.items():
+            destino = engine.raw_connection()
+            try:
+                origem.driver_connection.backup(destino.driver_connection)
+            finally:
+                destino.close()
+            click.echo(f'{chave}: {engine.url.database} sincronizada')
+    finally:
+        origem.close()
 
-# Inicialização do banco SQLite
-db.init_app(app)
+@click.command('gerar-spec')
+@click.option('--saida', type=click.Path(dir_okay=False), help='Arquivo onde gravar o spec (usado em SWAGGER_SPEC_ARQUIVO).')
+@with_appcontext
+def gerar_spec_cli(saida):
+    """Gera o spec OpenAPI das docstrings e valida (falha se houver problemas)."""
+    from utils.documentacao import gerar_spec, spec_json, validar_docstrings, validar_spec
 
-# Importação de rotas
-from routes import professores, turmas, alunos
-app.register_blueprint(professores.appProfessor)
-app.register_blueprint(turmas.appTurma)
-app.register_blueprint(alunos.appAluno)
+    if not hasattr(current_app, 'swag'):
+        raise click.ClickException('Swagger desligado (SWAGGER_HABILITADO=false).')
+    spec = gerar_spec(current_app)
+    problemas = validar_docstrings(current_app) + validar_spec(spec)
+    for problema in problemas:
+        click.echo(problema, err=True)
+    if problemas:
+        raise SystemExit(1)
 
-# Criação das tabelas
-with app.app_context():
-    db.create_all()
+    if saida:
+        with open(saida, 'wb') as f:
+            f.write(spec_json(spec))
+        click.echo(f"Spec com {len(spec['paths'])} caminhos gravado em {saida}")
+    else:
+        click.echo(f"Spec válido: {len(spec['paths'])} caminhos")
 
 if __name__ == '__main__':
+    app = create_app()
+    # Em desenvolvimento cria as tabelas que faltam antes de subir
+    with app.app_context():
+        from utils.esquema import criar_esquema
+        criar_esquema()
     app.run(port=5000, debug=True)
     # port = int(os.environ.get('PORT', 5000))
     # debug_mode = os.environ.get('FLASK_ENV', 'production') == 'development'
@@ -0,0 +1,99 @@
+"""Capacidade de requisições concorrentes em um núcleo.
+
+Sobe o servidor em um subprocesso preso a um único núcleo de CPU
+(servidor com threads do werkzeug), simula a latência de um banco remoto
+com uma espera em cada statement e dispara clientes HTTP concorrentes com
+keep-alive, medindo vazão e latências.
+
+    python -m benchmarks.concorrencia --clientes 1 8 32 128
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.dados import popular
+from benchmarks.servidor import servidor
+
+
+def _cliente(porta, urls, fim, latencias, erros):
+    conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+    aleatorio = random.Random()
+    while time.monotonic() < fim:
+        comeco = time.perf_counter()
+        try:
+            conexao.request('GET', aleatorio.choice(urls))
+            resposta = conexao.getresponse()
+            resposta.read()
+            if resposta.status != 200:
+                erros.append(resposta.status)
+                continue
+        except (OSError, http.client.HTTPException):
+            erros.append('conexao')
+            conexao.close()
+            conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=60)
+            continue
+        latencias.append(time.perf_counter() - comeco)
+    conexao.close()
+
+
+def _percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))] if valores else float('nan')
+
+
+def carga(porta, urls, clientes, duracao):
+    latencias, erros = [], []
+    fim = time.monotonic() + duracao
+    threads = [threading.Thread(target=_cliente, args=(porta, urls, fim, latencias, erros)) for _ in range(clientes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencias.sort()
+    return {
+        'requisicoes_s': len(latencias) / duracao,
+        'p50': statistics.median(latencias) if latencias else float('nan'),
+        'p95': _percentil(latencias, 0.95),
+        'p99': _percentil(latencias, 0.99),
+        'erros': len(erros)
+    }
+
+
+def executar(banco, urls, niveis, duracao, latencia):
+    config = json.dumps({'CACHE_TIPO': 'nenhum', 'COMPRESSAO_HABILITADA': False})
+    with servidor(banco, latencia, config) as (porta, _):
+        carga(porta, urls, 1, 1)
+        for clientes in niveis:
+            r = carga(porta, urls, clientes, duracao)
+            print(
+                f"{clientes:4} clientes: {r['requisicoes_s']:8.1f} req/s  p50 {r['p50'] * 1000:7.1f} ms  "
+                f"p95 {r['p95'] * 1000:7.1f} ms  p99 {r['p99'] * 1000:7.1f} ms  {r['erros']} erros"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clientes', type=int, nargs='+', default=[1, 8, 32, 128], help='Clientes concorrentes')
+    parser.add_argument('--duracao', type=float, default=10, help='Segundos de carga em cada nível')
+    parser.add_argument('--latencia', type=float, default=0.005, help='Espera simulada por statement, em segundos')
+    parser.add_argument('--alunos', type=int, default=10000, help='Alunos no banco de teste')
+    args = parser.parse_args()
+
+    from app import create_app
+
+    with tempfile.TemporaryDirectory() as pasta:
+        banco = f"sqlite:///{os.path.join(pasta, 'concorrencia.db')}"
+        popular(create_app({'SQLALCHEMY_DATABASE_URI': banco, 'SWAGGER_HABILITADO': False}), args.alunos)
+        # Busca por id, página da listagem e estatísticas de uma turma
+        urls = [f'/alunos/{id}' for id in range(1, args.alunos + 1, max(1, args.alunos // 500))]
+        urls += ['/alunos?limit=50&sort=-media_final', '/turmas/1/estatisticas', '/professores/1?incluir=turmas']
+        executar(banco, urls, args.clientes, args.duracao, args.latencia)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Dados sintéticos dos benchmarks: professores, turmas e alunos em qualquer escala."""
+import random
+from datetime import date, timedelta
+
+MATERIAS = ('Matemática', 'Português', 'História', 'Geografia', 'Ciências', 'Inglês', 'Artes', 'Física')
+# Nomes com acentos e sobrenomes repetidos, como numa escola de verdade (para a busca textual)
+NOMES = (
+    'Ana', 'João', 'Maria', 'José', 'Antônio', 'Francisca', 'Luíza', 'Márcio', 'Lúcia', 'Sebastião', 'Beatriz',
+    'Conceição', 'Fábio', 'Gabriel', 'Helena', 'Inês', 'Júlia', 'Letícia', 'Mônica', 'Otávio', 'Patrícia',
+    'Raquel', 'Sérgio', 'Tânia', 'Vinícius', 'Anabela', 'Caio', 'Débora', 'Estêvão', 'Guilherme'
+)
+SOBRENOMES = (
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima', 'Gomes',
+    'Conceição', 'Ribeiro', 'Araújo', 'Carvalho', 'Magalhães', 'Damião', 'Simões', 'Brandão', 'Falcão', 'Gusmão'
+)
+OBSERVACOES = (None, 'Coordenador da área', 'Dá aulas de reforço', 'Orienta a feira de ciências', 'Licença até março')
+
+
+def _nome(aleatorio, numero):
+    # O número no fim deixa os nomes únicos, como uma matrícula
+    return f'{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {aleatorio.choice(SOBRENOMES)} {numero}'
+
+
+def popular(app, alunos, alunos_por_turma=30, turmas_por_professor=5, semente=42, lote=10000):
+    """Cria o esquema e insere os registros direto por INSERT em lotes (sem passar pela API).
+
+    Os resumos de notas das turmas são reconstruídos no final. Retorna a
+    quantidade de cada entidade; os ids começam em 1 e são contíguos.
+    """
+    from sqlalchemy import insert
+
+    from database import db
+    from models.aluno import Aluno
+    from models.professor import Professor
+    from models.turma import Turma
+    from utils.esquema import criar_esquema
+    from utils.resumo import reconstruir_resumos
+
+    aleatorio = random.Random(semente)
+    turmas = max(1, alunos // alunos_por_turma)
+    professores = max(1, turmas // turmas_por_professor)
+    with app.app_context():
+        criar_esquema()
+        db.session.execute(insert(Professor), [
+            {'nome': _nome(aleatorio, numero), 'idade': aleatorio.randint(25, 65), 'materia': aleatorio.choice(MATERIAS), 'observacoes': aleatorio.choice(OBSERVACOES)}
+            for numero in range(professores)
+        ])
+        db.session.execute(insert(Turma), [
+            {'descricao': f'Turma {numero}', 'ativo': aleatorio.random() < 0.9, 'professor_id': aleatorio.randint(1, professores)}
+            for numero in range(turmas)
+        ])
+        for inicio in range(0, alunos, lote):
+            registros = []
+            for numero in range(inicio, min(inicio + lote, alunos)):
+                notas = [round(aleatorio.uniform(0, 10), 1) for _ in range(2)]
+                registros.append({
+                    'nome': _nome(aleatorio, numero),
+                    'idade': aleatorio.randint(10, 18),
+                    'data_nascimento': date(2008, 1, 1) + timedelta(days=aleatorio.randint(0, 3000)),
+                    'nota_primeiro_semestre': notas[0],
+                    'nota_segundo_semestre': notas[1],
+                    'media_final': round(sum(notas) / 2, 2),
+                    'turma_id': aleatorio.randint(1, turmas)
+                })
+            db.session.execute(insert(Aluno), registros)
+            db.session.commit()
+        reconstruir_resumos()
+        db.session.commit()
+    return {'professores': professores, 'turmas': turmas, 'alunos': alunos}
+
+
+def corpos_alunos(quantidade, turmas, prefixo='Aluno', semente=42):
+    """Alunos no formato do corpo do ``POST /alunos`` (e do ``/alunos/bulk``), em turmas de 1 a ``turmas``."""
+    aleatorio = random.Random(semente)
+    return [
+        {
+            'nome': f'{prefixo} {numero}',
+            'idade': 15,
+            'data_nascimento': '2010-01-01',
+            'nota_primeiro_semestre': round(aleatorio.uniform(0, 10), 1),
+            'nota_segundo_semestre': round(aleatorio.uniform(0, 10), 1),
+            'turma_id': aleatorio.randint(1, turmas)
+        }
+        for numero in range(quantidade)
+    ]
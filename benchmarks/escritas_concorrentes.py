@@ -0,0 +1,135 @@
+"""Teste de carga de escritas concorrentes no SQLite.
+
+Vários processos (como os workers de um servidor) cadastram alunos ao
+mesmo tempo no mesmo arquivo, com leitores em paralelo, e o resultado
+compara a configuração padrão do SQLite com a ajustada (WAL, synchronous
+NORMAL, busy timeout, mmap e cache).
+
+    python -m benchmarks.escritas_concorrentes --processos 8 --requisicoes 200
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+# Valores padrão do SQLite (e do driver sqlite3) para comparação
+PRAGMAS_PADRAO = {
+    'SQLITE_JOURNAL_MODE': 'DELETE',
+    'SQLITE_SYNCHRONOUS': 'FULL',
+    'SQLITE_BUSY_TIMEOUT': '5000',
+    'SQLITE_MMAP_SIZE': '0',
+    'SQLITE_CACHE_SIZE': '-2000'
+}
+
+
+def _ambiente(arquivo, modo):
+    os.environ['DATABASE_URL'] = f'sqlite:///{arquivo}'
+    os.environ['CACHE_TIPO'] = 'nenhum'
+    if modo == 'padrao':
+        os.environ.update(PRAGMAS_PADRAO)
+
+
+def _preparar(arquivo, modo):
+    _ambiente(arquivo, modo)
+    from app import create_app
+    from utils.esquema import criar_esquema
+
+    app = create_app()
+    with app.app_context():
+        criar_esquema()
+
+    cliente = app.test_client()
+    cliente.post('/professores', json={'nome': 'Professor', 'idade': 40, 'materia': 'Carga', 'observacoes': None})
+    cliente.post('/turmas', json={'descricao': 'Turma', 'ativo': True, 'professor_id': 1})
+
+
+def _escritor(arquivo, modo, requisicoes, inicio, fila):
+    _ambiente(arquivo, modo)
+    from app import create_app
+
+    cliente = create_app().test_client()
+    ok = erros = 0
+    inicio.wait()
+    for numero in range(requisicoes):
+        resposta = cliente.post('/alunos', json={
+            'nome': f'Aluno {os.getpid()}-{numero}',
+            'idade': 15,
+            'data_nascimento': '2010-01-01',
+            'nota_primeiro_semestre': 7.0,
+            'nota_segundo_semestre': 8.0,
+            'turma_id': 1
+        })
+        if resposta.status_code == 201:
+            ok += 1
+        else:
+            erros += 1
+    fila.put(('escrita', ok, erros))
+
+
+def _leitor(arquivo, modo, requisicoes, inicio, fila):
+    _ambiente(arquivo, modo)
+    from app import create_app
+
+    cliente = create_app().test_client()
+    ok = erros = 0
+    inicio.wait()
+    for _ in range(requisicoes):
+        resposta = cliente.get('/alunos?limit=50&sort=-id')
+        if resposta.status_code == 200:
+            ok += 1
+        else:
+            erros += 1
+    fila.put(('leitura', ok, erros))
+
+
+def executar(modo, processos, requisicoes, leitores):
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as pasta:
+        arquivo = os.path.join(pasta, 'carga.db')
+        preparo = contexto.Process(target=_preparar, args=(arquivo, modo))
+        preparo.start()
+        preparo.join()
+
+        inicio = contexto.Event()
+        fila = contexto.Queue()
+        participantes = [contexto.Process(target=_escritor, args=(arquivo, modo, requisicoes, inicio, fila)) for _ in range(processos)]
+        participantes += [contexto.Process(target=_leitor, args=(arquivo, modo, requisicoes, inicio, fila)) for _ in range(leitores)]
+        for processo in participantes:
+            processo.start()
+        # Espera os processos importarem a aplicação antes de medir
+        time.sleep(3)
+        comeco = time.perf_counter()
+        inicio.set()
+        resultados = [fila.get() for _ in participantes]
+        duracao = time.perf_counter() - comeco
+        for processo in participantes:
+            processo.join()
+
+    totais = {'escrita': [0, 0], 'leitura': [0, 0]}
+    for tipo, ok, erros in resultados:
+        totais[tipo][0] += ok
+        totais[tipo][1] += erros
+    escritas_ok, escritas_erro = totais['escrita']
+    leituras_ok, leituras_erro = totais['leitura']
+    print(
+        f'{modo:8} {processos:3} escritores: {escritas_ok:6} escritas ok, {escritas_erro:5} com erro, '
+        f'{escritas_ok / duracao:8.1f} escritas/s | {leituras_ok:6} leituras ok, {leituras_erro:5} com erro | {duracao:6.2f}s'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processos', type=int, nargs='+', default=[1, 4, 8], help='Quantidades de processos escritores')
+    parser.add_argument('--requisicoes', type=int, default=200, help='POSTs por processo escritor')
+    parser.add_argument('--leitores', type=int, default=2, help='Processos lendo a listagem ao mesmo tempo')
+    parser.add_argument('--modos', nargs='+', choices=['padrao', 'ajustado'], default=['padrao', 'ajustado'])
+    args = parser.parse_args()
+
+    for modo in args.modos:
+        for processos in args.processos:
+            executar(modo, processos, args.requisicoes, args.leitores)
+
+
+if __name__ == '__main__':
+    main()
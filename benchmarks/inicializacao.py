@@ -0,0 +1,97 @@
+"""Tempo de inicialização da aplicação: importação, criação e primeira requisição.
+
+Cada repetição roda em um interpretador novo (como um worker subindo),
+contra um banco SQLite temporário já criado, e mede separadamente:
+``import app``, ``create_app()``, a primeira requisição (que paga a
+configuração dos mappers e a compilação das consultas) e a segunda. Mede
+também uma segunda ``create_app()`` no mesmo processo, o custo por teste
+numa suíte que cria uma aplicação para cada teste.
+
+    python -m benchmarks.inicializacao --repeticoes 10
+    python -m benchmarks.inicializacao --sem-swagger
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Roda no processo filho; imprime os tempos em JSON
+MEDICAO = '''
+import json, sys, time
+inicio = time.perf_counter()
+import app as modulo
+importado = time.perf_counter()
+# Compatível com versões antigas, que criavam a aplicação ao importar
+aplicacao = modulo.create_app() if hasattr(modulo, 'create_app') else modulo.app
+criado = time.perf_counter()
+cliente = aplicacao.test_client()
+resposta = cliente.get(sys.argv[1])
+assert resposta.status_code == 200, resposta.status_code
+primeira = time.perf_counter()
+cliente.get(sys.argv[1])
+segunda = time.perf_counter()
+if hasattr(modulo, 'create_app'):
+    modulo.create_app()
+nova = time.perf_counter()
+print(json.dumps({
+    'importacao': importado - inicio,
+    'criacao': criado - importado,
+    'primeira_requisicao': primeira - criado,
+    'segunda_requisicao': segunda - primeira,
+    'nova_aplicacao': nova - segunda
+}))
+'''
+
+PREPARO = '''
+import app as modulo
+if hasattr(modulo, 'create_app'):
+    from utils.esquema import criar_esquema
+    aplicacao = modulo.create_app()
+    with aplicacao.app_context():
+        criar_esquema()
+'''
+
+
+def _rodar(codigo, ambiente, *args):
+    resultado = subprocess.run(
+        [sys.executable, '-c', codigo, *args],
+        cwd=RAIZ, env=ambiente, capture_output=True, text=True, check=True
+    )
+    return resultado.stdout
+
+
+def executar(repeticoes, url, swagger):
+    with tempfile.TemporaryDirectory() as pasta:
+        ambiente = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(pasta, 'inicializacao.db')}")
+        if not swagger:
+            ambiente['SWAGGER_HABILITADO'] = 'false'
+        _rodar(PREPARO, ambiente)
+
+        medicoes = [json.loads(_rodar(MEDICAO, ambiente, url)) for _ in range(repeticoes)]
+
+    print(f'{repeticoes} inicializações, GET {url} (ms)')
+    print(f"{'etapa':22} {'mediana':>9} {'mínimo':>9} {'máximo':>9}")
+    for etapa in medicoes[0]:
+        valores = [medicao[etapa] * 1000 for medicao in medicoes]
+        print(f'{etapa:22} {statistics.median(valores):9.1f} {min(valores):9.1f} {max(valores):9.1f}')
+    # Até responder a primeira requisição, sem a aplicação extra
+    totais = [(sum(medicao.values()) - medicao['segunda_requisicao'] - medicao['nova_aplicacao']) * 1000 for medicao in medicoes]
+    print(f"{'até a 1ª resposta':22} {statistics.median(totais):9.1f} {min(totais):9.1f} {max(totais):9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=10, help='Inicializações medidas, cada uma em um processo novo')
+    parser.add_argument('--url', default='/alunos', help='Endpoint da primeira requisição')
+    parser.add_argument('--sem-swagger', action='store_true', help='Inicializa com SWAGGER_HABILITADO=false')
+    args = parser.parse_args()
+    executar(args.repeticoes, args.url, not args.sem_swagger)
+
+
+if __name__ == '__main__':
+    main()
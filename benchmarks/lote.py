@@ -0,0 +1,65 @@
+"""Tempo do POST /alunos/bulk com 10 mil alunos, o alvo de "bem menos de um segundo".
+
+Popula um banco SQLite temporário, envia ``--rodadas`` lotes pelo test
+client e mostra o tempo e a quantidade de statements SQL de cada um.
+Termina com código 1 se o melhor tempo passar de ``--limite`` segundos,
+o que permite usá-lo na CI como teste de regressão (fora da suíte de
+testes, que não mede tempo de relógio).
+
+    python -m benchmarks.lote --alunos 10000 --rodadas 3 --limite 1.0
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.dados import corpos_alunos, popular
+
+
+def executar(alunos, rodadas):
+    from sqlalchemy import event
+
+    from app import create_app
+    from database import db
+
+    with tempfile.TemporaryDirectory() as pasta:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(pasta, 'lote.db')}", 'SWAGGER_HABILITADO': False})
+        turmas = popular(app, 3000)['turmas']
+        cliente = app.test_client()
+        with app.app_context():
+            engine = db.engine
+        statements = []
+
+        def contar(*args):
+            statements.append(1)
+
+        tempos = []
+        event.listen(engine, 'before_cursor_execute', contar)
+        for rodada in range(rodadas):
+            corpo = corpos_alunos(alunos, turmas, f'Lote {rodada}', semente=rodada)
+            statements.clear()
+            comeco = time.perf_counter()
+            resposta = cliente.post('/alunos/bulk', json=corpo)
+            tempos.append(time.perf_counter() - comeco)
+            assert resposta.status_code == 201, resposta.status_code
+            print(f'rodada {rodada + 1}: {tempos[-1] * 1000:8.1f} ms  {len(statements)} statements')
+        event.remove(engine, 'before_cursor_execute', contar)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alunos', type=int, default=10000, help='Alunos em cada lote')
+    parser.add_argument('--rodadas', type=int, default=3, help='Lotes enviados (vale o melhor tempo)')
+    parser.add_argument('--limite', type=float, default=1.0, help='Tempo máximo do melhor lote, em segundos')
+    args = parser.parse_args()
+
+    melhor = executar(args.alunos, args.rodadas)
+    print(f'melhor: {melhor * 1000:.1f} ms (limite {args.limite * 1000:.0f} ms)')
+    if melhor > args.limite:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
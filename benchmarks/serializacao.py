@@ -0,0 +1,62 @@
+"""Vazão da listagem de alunos (GET /alunos) em tabelas de 10 mil e 100 mil linhas.
+
+Mede a listagem completa em streaming (JSON e NDJSON) e páginas de 1000
+itens pelo test client, com um banco SQLite temporário populado direto
+por INSERT. Para comparar antes e depois de uma mudança, rode o mesmo
+script em um checkout de cada commit; ``--json padrao`` força a
+biblioteca padrão no lugar do orjson.
+
+    python -m benchmarks.serializacao --linhas 10000 100000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.dados import popular
+
+
+def _medir(cliente, url, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        comeco = time.perf_counter()
+        resposta = cliente.get(url)
+        corpo = resposta.get_data()
+        tempos.append(time.perf_counter() - comeco)
+        assert resposta.status_code == 200, (url, resposta.status_code)
+    return min(tempos), len(corpo)
+
+
+def executar(linhas, repeticoes, json_padrao):
+    with tempfile.TemporaryDirectory() as pasta:
+        if json_padrao:
+            import utils.serializacao
+            utils.serializacao.orjson = None
+        from app import create_app
+
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(pasta, 'serializacao.db')}",
+            'CACHE_TIPO': 'nenhum',
+            'SWAGGER_HABILITADO': False
+        })
+        popular(app, linhas)
+        cliente = app.test_client()
+
+        print(f'{linhas} alunos (melhor de {repeticoes})')
+        for url, quantidade in (('/alunos', linhas), ('/alunos?formato=ndjson', linhas), ('/alunos?limit=1000', min(linhas, 1000))):
+            segundos, tamanho = _medir(cliente, url, repeticoes)
+            print(f'  GET {url:24} {segundos * 1000:9.1f} ms {quantidade / segundos:12.0f} linhas/s {tamanho / segundos / 2 ** 20:8.1f} MiB/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10000, 100000], help='Quantidades de alunos na tabela')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Repetições de cada requisição (vale a melhor)')
+    parser.add_argument('--json', choices=['orjson', 'padrao'], default='orjson', help='Serializador (orjson só se instalado)')
+    args = parser.parse_args()
+    for linhas in args.linhas:
+        executar(linhas, args.repeticoes, args.json == 'padrao')
+
+
+if __name__ == '__main__':
+    main()
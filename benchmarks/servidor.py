@@ -0,0 +1,71 @@
+"""Servidor HTTP da aplicação em um subprocesso, para os benchmarks por HTTP."""
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Roda no subprocesso: argv = porta, latência, URL do banco, config extra (JSON)
+PROGRAMA = '''
+import json, logging, os, sys, time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+porta, latencia, banco, extra = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3], sys.argv[4]
+if hasattr(os, 'sched_setaffinity'):
+    os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+
+if latencia:
+    # Latência de rede do banco: a espera libera o GIL, como um socket
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def atrasar(*args):
+        time.sleep(latencia)
+
+from werkzeug.serving import make_server
+from app import create_app
+
+config = {'SQLALCHEMY_DATABASE_URI': banco, 'SWAGGER_HABILITADO': False, **json.loads(extra)}
+logging.getLogger('werkzeug').setLevel(logging.WARNING)
+make_server('127.0.0.1', porta, create_app(config), threaded=True).serve_forever()
+'''
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _aguardar(porta, processo, limite=60):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if processo.poll() is not None:
+            raise RuntimeError(f'O servidor terminou com código {processo.returncode}')
+        try:
+            with socket.create_connection(('127.0.0.1', porta), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError('O servidor não respondeu a tempo')
+
+
+@contextmanager
+def servidor(banco, latencia=0, config='{}'):
+    """Sobe o servidor com threads do werkzeug (preso a um núcleo de CPU) e devolve ``(porta, pid)``.
+
+    ``latencia`` acrescenta uma espera em cada statement, simulando um
+    banco remoto.
+    """
+    porta = porta_livre()
+    processo = subprocess.Popen(
+        [sys.executable, '-c', PROGRAMA, str(porta), str(latencia), banco, config], cwd=RAIZ
+    )
+    try:
+        _aguardar(porta, processo)
+        yield porta, processo.pid
+    finally:
+        processo.terminate()
+        processo.wait()
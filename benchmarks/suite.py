@@ -0,0 +1,311 @@
+"""Latência, vazão e memória de cada endpoint, com dados sintéticos em escala.
+
+Popula um banco temporário com professores, turmas e alunos (de 1 mil a
+1 milhão de alunos, ``--alunos``) e chama os endpoints reais: listagens,
+busca por id, busca textual, criação, atualização e remoção, incluindo as verificações
+entre entidades de ``post_aluno`` (turma existente ou não) e ``put_turma``
+(troca de professor). Para cada cenário mede p50/p95/p99, requisições por
+segundo e o pico de memória (RSS) de quem atende as requisições.
+
+    python -m benchmarks.suite --alunos 100000 --saida atual.json
+    python -m benchmarks.suite --alunos 100000 --http --comparar base.json
+
+Com ``--http`` as requisições vão por HTTP (keep-alive) a um servidor em
+um subprocesso; sem ele, pelo test client do Flask no mesmo processo.
+``--comparar`` termina com código 1 se o p95 de algum cenário piorou mais
+que ``--tolerancia`` por cento em relação ao JSON de outra execução.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from urllib.parse import quote
+
+from benchmarks.dados import MATERIAS, NOMES, SOBRENOMES, popular
+from benchmarks.servidor import RAIZ, servidor
+
+CABECALHOS = {'Content-Type': 'application/json', 'Accept-Encoding': 'identity'}
+
+
+class ClienteTeste:
+    """Requisições pelo test client do Flask (sem rede, no mesmo processo)."""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+        self.pid = os.getpid()
+
+    def requisitar(self, metodo, url, corpo=None):
+        resposta = self.cliente.open(url, method=metodo, data=corpo, headers=CABECALHOS)
+        dados = resposta.get_data()
+        resposta.close()
+        return resposta.status_code, dados
+
+
+class ClienteHTTP:
+    """Requisições HTTP com keep-alive ao servidor da porta ``porta``."""
+
+    def __init__(self, porta, pid):
+        self.porta = porta
+        self.pid = pid
+        self.conexao = http.client.HTTPConnection('127.0.0.1', porta, timeout=120)
+
+    def requisitar(self, metodo, url, corpo=None):
+        self.conexao.request(metodo, url, body=corpo, headers=CABECALHOS)
+        resposta = self.conexao.getresponse()
+        return resposta.status, resposta.read()
+
+    def fechar(self):
+        self.conexao.close()
+
+
+def _zerar_pico(pid):
+    """Zera o pico de RSS do processo (Linux); False se não for possível."""
+    try:
+        with open(f'/proc/{pid}/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _pico_rss(pid):
+    """Pico de RSS do processo em MiB (VmHWM; sem /proc, o pico desde o início)."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for linha in f:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KiB no Linux, bytes no macOS
+        return maximo / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    return None
+
+
+def _percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def _ultimo_aluno(cliente):
+    status, corpo = cliente.requisitar('GET', '/alunos?limit=1&sort=-id')
+    if status != 200:
+        raise RuntimeError(f'Listagem de alunos respondeu {status}')
+    dados = json.loads(corpo)
+    itens = dados['items'] if isinstance(dados, dict) else dados
+    return itens[0]['id'] if itens else 0
+
+
+def cenarios(quantidades, aleatorio, fila_notas=False):
+    """Cenários na ordem de execução: ``(nome, status esperado, gerador de requisições)``.
+
+    Cada gerador recebe o cliente e devolve ``(método, url, corpo)``. Com
+    ``fila_notas`` o lançamento de notas responde 202 (fila habilitada). Os
+    alunos criados são removidos no cenário de remoção, então o banco
+    termina como começou (a menos das atualizações).
+    """
+    alunos, turmas, professores = quantidades['alunos'], quantidades['turmas'], quantidades['professores']
+    criados = {'ultimo_antes': None, 'ids': None}
+
+    def aluno(turma_id):
+        return json.dumps({
+            'nome': 'Aluno Benchmark',
+            'idade': aleatorio.randint(10, 18),
+            'data_nascimento': '2012-05-20',
+            'nota_primeiro_semestre': round(aleatorio.uniform(0, 10), 1),
+            'nota_segundo_semestre': round(aleatorio.uniform(0, 10), 1),
+            'turma_id': turma_id
+        })
+
+    def criar_aluno(cliente):
+        # Os ids criados vêm da listagem, pois o POST só devolve a mensagem
+        if criados['ultimo_antes'] is None:
+            criados['ultimo_antes'] = _ultimo_aluno(cliente)
+        return 'POST', '/alunos', aluno(aleatorio.randint(1, turmas))
+
+    def remover_aluno(cliente):
+        if criados['ids'] is None:
+            antes = alunos if criados['ultimo_antes'] is None else criados['ultimo_antes']
+            criados['ids'] = list(range(_ultimo_aluno(cliente), antes, -1))
+        if not criados['ids']:
+            raise RuntimeError('Não há alunos criados para remover (rode também o cenário criar_aluno)')
+        return 'DELETE', f'/alunos/{criados["ids"].pop()}', None
+
+    return [
+        ('listar_alunos', 200, lambda c: ('GET', '/alunos?limit=100', None)),
+        ('listar_alunos_filtrado', 200, lambda c: (
+            'GET', f'/alunos?limit=100&turma_id={aleatorio.randint(1, turmas)}&idade_min=12&sort=-media_final', None
+        )),
+        ('listar_alunos_com_turma', 200, lambda c: ('GET', '/alunos?limit=100&incluir=turma', None)),
+        ('listar_turmas', 200, lambda c: ('GET', '/turmas?limit=100', None)),
+        ('listar_professores', 200, lambda c: ('GET', '/professores?limit=100', None)),
+        ('buscar_aluno', 200, lambda c: ('GET', f'/alunos/{aleatorio.randint(1, alunos)}', None)),
+        ('buscar_turma', 200, lambda c: ('GET', f'/turmas/{aleatorio.randint(1, turmas)}', None)),
+        ('buscar_professor', 200, lambda c: ('GET', f'/professores/{aleatorio.randint(1, professores)}', None)),
+        ('busca_alunos_nome', 200, lambda c: ('GET', f'/alunos/busca?q={quote(aleatorio.choice(NOMES))}+{quote(aleatorio.choice(SOBRENOMES)[:3])}', None)),
+        ('busca_professores', 200, lambda c: ('GET', f'/professores/busca?q={quote(aleatorio.choice(MATERIAS)[:4])}', None)),
+        ('criar_aluno', 201, criar_aluno),
+        ('criar_aluno_turma_inexistente', 404, lambda c: ('POST', '/alunos', aluno(turmas + 1000))),
+        ('criar_turma', 201, lambda c: ('POST', '/turmas', json.dumps({
+            'descricao': 'Turma Benchmark', 'ativo': True, 'professor_id': aleatorio.randint(1, professores)
+        }))),
+        ('atualizar_aluno', 200, lambda c: ('PUT', f'/alunos/{aleatorio.randint(1, alunos)}', json.dumps({
+            'nota_segundo_semestre': round(aleatorio.uniform(0, 10), 1)
+        }))),
+        ('atualizar_turma_professor', 200, lambda c: ('PUT', f'/turmas/{aleatorio.randint(1, turmas)}', json.dumps({
+            'professor_id': aleatorio.randint(1, professores)
+        }))),
+        ('lancar_notas', 202 if fila_notas else 200, lambda c: ('PUT', f'/alunos/{aleatorio.randint(1, alunos)}/notas', json.dumps({
+            'nota_segundo_semestre': round(aleatorio.uniform(0, 10), 1)
+        }))),
+        # As mesmas 10 atualizações de atualizar_aluno em uma requisição e um commit
+        ('lote_atualizar_10_alunos', 200, lambda c: ('POST', '/batch', json.dumps([
+            {'acao': 'atualizar', 'tipo': 'aluno', 'id': id, 'dados': {'nota_segundo_semestre': round(aleatorio.uniform(0, 10), 1)}}
+            for id in aleatorio.sample(range(1, alunos + 1), 10)
+        ]))),
+        ('remover_aluno', 200, remover_aluno)
+    ]
+
+
+def medir(cliente, gerador, esperado, requisicoes, aquecimento):
+    """Executa o cenário e devolve latências (ms), vazão e pico de RSS (MiB)."""
+    for _ in range(aquecimento):
+        cliente.requisitar(*gerador(cliente))
+    zerado = _zerar_pico(cliente.pid)
+    latencias, erros = [], 0
+    comeco = time.perf_counter()
+    for _ in range(requisicoes):
+        requisicao = gerador(cliente)
+        inicio = time.perf_counter()
+        status, _ = cliente.requisitar(*requisicao)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if status != esperado:
+            erros += 1
+    total = time.perf_counter() - comeco
+    pico = _pico_rss(cliente.pid)
+    latencias.sort()
+    return {
+        'requisicoes': requisicoes,
+        'erros': erros,
+        'p50_ms': round(statistics.median(latencias), 3),
+        'p95_ms': round(_percentil(latencias, 0.95), 3),
+        'p99_ms': round(_percentil(latencias, 0.99), 3),
+        'requisicoes_s': round(requisicoes / total, 1),
+        'pico_rss_mib': round(pico, 1) if pico is not None else None,
+        'pico_rss_do_cenario': zerado
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(resultado, base, tolerancia):
+    """Cenários cujo p95 piorou mais que ``tolerancia`` % em relação à base."""
+    regressoes = []
+    for nome, atual in resultado['cenarios'].items():
+        anterior = base['cenarios'].get(nome)
+        if not anterior:
+            continue
+        variacao = (atual['p95_ms'] / anterior['p95_ms'] - 1) * 100 if anterior['p95_ms'] else 0
+        marca = ' <- regressão' if variacao > tolerancia else ''
+        print(f"{nome:32} p95 {anterior['p95_ms']:9.2f} -> {atual['p95_ms']:9.2f} ms ({variacao:+6.1f}%){marca}")
+        if marca:
+            regressoes.append(nome)
+    return regressoes
+
+
+def executar(args):
+    from app import create_app
+
+    config = {'SWAGGER_HABILITADO': False}
+    if args.sem_cache:
+        config['CACHE_TIPO'] = 'nenhum'
+    with tempfile.TemporaryDirectory() as pasta:
+        if args.fila_notas:
+            config.update(FILA_NOTAS_HABILITADA=True, FILA_NOTAS_PASTA=os.path.join(pasta, 'fila_notas'))
+        banco = f"sqlite:///{os.path.join(pasta, 'suite.db')}"
+        inicio = time.perf_counter()
+        quantidades = popular(create_app({**config, 'SQLALCHEMY_DATABASE_URI': banco}), args.alunos)
+        print(f"{quantidades['alunos']} alunos, {quantidades['turmas']} turmas, {quantidades['professores']} professores "
+              f"populados em {time.perf_counter() - inicio:.1f} s")
+
+        aleatorio = random.Random(args.semente)
+        resultado = {
+            'commit': _commit(),
+            'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'modo': 'http' if args.http else 'test_client',
+            'quantidades': quantidades,
+            'cache': not args.sem_cache,
+            'fila_notas': args.fila_notas,
+            'cenarios': {}
+        }
+        with ExitStack() as pilha:
+            if args.http:
+                cliente = ClienteHTTP(*pilha.enter_context(servidor(banco, config=json.dumps(config))))
+                pilha.callback(cliente.fechar)
+            else:
+                cliente = ClienteTeste(create_app({**config, 'SQLALCHEMY_DATABASE_URI': banco}))
+            for nome, esperado, gerador in cenarios(quantidades, aleatorio, args.fila_notas):
+                if args.cenarios and nome not in args.cenarios:
+                    continue
+                # A remoção consome os alunos criados: mesmas quantidades, sem aquecimento extra
+                aquecimento = 0 if nome.startswith(('criar', 'remover')) else args.aquecimento
+                r = medir(cliente, gerador, esperado, args.requisicoes, aquecimento)
+                resultado['cenarios'][nome] = r
+                rss = f"{r['pico_rss_mib']:7.1f} MiB" if r['pico_rss_mib'] is not None else '      -'
+                print(f"{nome:32} p50 {r['p50_ms']:8.2f}  p95 {r['p95_ms']:8.2f}  p99 {r['p99_ms']:8.2f} ms  "
+                      f"{r['requisicoes_s']:8.1f} req/s  RSS {rss}  {r['erros']} erros")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alunos', type=int, default=10000, help='Alunos no banco de teste (1000 a 1000000)')
+    parser.add_argument('--requisicoes', type=int, default=500, help='Requisições medidas por cenário')
+    parser.add_argument('--aquecimento', type=int, default=50, help='Requisições de aquecimento (não medidas)')
+    parser.add_argument('--cenarios', nargs='+', help='Executa só os cenários indicados')
+    parser.add_argument('--http', action='store_true', help='Requisições por HTTP a um servidor em subprocesso')
+    parser.add_argument('--sem-cache', action='store_true', help='Desliga o cache de leitura (CACHE_TIPO=nenhum)')
+    parser.add_argument('--fila-notas', action='store_true', help='Habilita a fila de notas (FILA_NOTAS_HABILITADA)')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help='Arquivo JSON com o resultado')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--tolerancia', type=float, default=10, help='Piora tolerada do p95, em %%')
+    args = parser.parse_args()
+
+    resultado = executar(args)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        print(f"\nComparação com {base.get('commit') or args.comparar} ({base['quantidades']['alunos']} alunos, {base['modo']})")
+        if (base['modo'], base['quantidades']) != (resultado['modo'], resultado['quantidades']):
+            print('Atenção: modo ou escala diferentes desta execução; os números não são comparáveis')
+        regressoes = comparar(resultado, base, args.tolerancia)
+        if regressoes:
+            print(f"{len(regressoes)} cenários com p95 pior que {args.tolerancia}%: {', '.join(regressoes)}")
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import os
+
+
+def _texto(nome, padrao=None):
+    valor = os.environ.get(nome)
+    return valor if valor not in (None, '') else padrao
+
+
+def _inteiro(nome, padrao=None):
+    valor = _texto(nome)
+    return int(valor) if valor is not None else padrao
+
+
+def _booleano(nome, padrao=False):
+    valor = _texto(nome)
+    return valor.lower() in ('1', 'true', 'sim', 'yes', 'on') if valor is not None else padrao
+
+
+def _normalizar_url(url):
+    # Provedores que ainda usam o esquema antigo do PostgreSQL
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def url_banco():
+    """URL do banco em ``DATABASE_URL`` (padrão: SQLite local ``app.db``)."""
+    return _normalizar_url(_texto('DATABASE_URL', 'sqlite:///app.db'))
+
+
+def binds_replicas():
+    """Réplicas de leitura de ``DATABASE_REPLICA_URLS`` (URLs separadas por vírgula).
+
+    Cada uma vira um bind ``replica_N`` com as mesmas opções de engine do
+    primário.
+    """
+    urls = [_normalizar_url(url.strip()) for url in _texto('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    return {f'replica_{indice}': {'url': url, **opcoes_engine(url)} for indice, url in enumerate(urls)}
+
+
+def _sqlite_em_memoria(url):
+    return url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in url
+
+
+def opcoes_engine(url):
+    """Opções do engine do SQLAlchemy (pool e timeout) conforme o banco da URL."""
+    if url.startswith('sqlite') and _sqlite_em_memoria(url):
+        return {}
+
+    opcoes = {
+        'pool_size': _inteiro('DB_POOL_SIZE', 5),
+        'max_overflow': _inteiro('DB_MAX_OVERFLOW', 10),
+        'pool_timeout': _inteiro('DB_POOL_TIMEOUT', 30),
+        'pool_recycle': _inteiro('DB_POOL_RECYCLE', 1800),
+        'pool_pre_ping': _booleano('DB_POOL_PRE_PING', True)
+    }
+    # Tempo máximo de cada statement, em milissegundos (0 desliga)
+    timeout = _inteiro('DB_STATEMENT_TIMEOUT', 30000)
+    if timeout:
+        if url.startswith('postgresql'):
+            opcoes['connect_args'] = {'options': f'-c statement_timeout={timeout}'}
+        elif url.startswith('mysql'):
+            opcoes['connect_args'] = {'init_command': f'SET SESSION max_execution_time={timeout}'}
+    return opcoes
+
+
+def pragmas_sqlite():
+    """PRAGMAs aplicados a cada conexão SQLite.
+
+    WAL deixa leitores e o escritor trabalharem ao mesmo tempo e o busy
+    timeout faz escritas concorrentes esperarem o lock em vez de falhar com
+    "database is locked". Sem foreign_keys o SQLite ignora as chaves
+    estrangeiras e as regras ON DELETE dos modelos.
+    """
+    return {
+        'foreign_keys': _texto('SQLITE_FOREIGN_KEYS', 'ON'),
+        'journal_mode': _texto('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': _texto('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': _inteiro('SQLITE_BUSY_TIMEOUT', 15000),
+        'mmap_size': _inteiro('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+        # Negativo = tamanho em KiB (64 MiB)
+        'cache_size': _inteiro('SQLITE_CACHE_SIZE', -64000)
+    }
+
+
+class Config:
+    """Configuração da aplicação, lida das variáveis de ambiente."""
+    SQLALCHEMY_DATABASE_URI = url_banco()
+    SQLALCHEMY_ENGINE_OPTIONS = opcoes_engine(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_BINDS = binds_replicas()
+    # Segundos em que as leituras de quem escreveu vão ao primário, e entre verificações das réplicas
+    REPLICA_ATRASO_MAXIMO = _inteiro('REPLICA_ATRASO_MAXIMO', 5)
+    REPLICA_INTERVALO_VERIFICACAO = _inteiro('REPLICA_INTERVALO_VERIFICACAO', 10)
+    SQLITE_PRAGMAS = pragmas_sqlite()
+
+    # Documentação Swagger (/apidocs); desligada, o flasgger nem é importado na inicialização
+    SWAGGER_HABILITADO = _booleano('SWAGGER_HABILITADO', True)
+    # Só a interface (/apidocs); o spec continua em /apispec_1.json
+    SWAGGER_UI = _booleano('SWAGGER_UI', True)
+    # Spec gerado no build com "flask gerar-spec --saida" (senão é gerado na primeira requisição)
+    SWAGGER_SPEC_ARQUIVO = _texto('SWAGGER_SPEC_ARQUIVO')
+
+    # Compressão das respostas (gzip, ou brotli se instalado): níveis e tamanho mínimo em bytes
+    COMPRESSAO_HABILITADA = _booleano('COMPRESSAO_HABILITADA', True)
+    COMPRESSAO_NIVEL = _inteiro('COMPRESSAO_NIVEL', 6)
+    COMPRESSAO_NIVEL_BROTLI = _inteiro('COMPRESSAO_NIVEL_BROTLI', 4)
+    COMPRESSAO_TAMANHO_MINIMO = _inteiro('COMPRESSAO_TAMANHO_MINIMO', 1024)
+
+    # Instrumentação das requisições (Server-Timing, statements SQL por endpoint e log das lentas)
+    INSTRUMENTACAO_HABILITADA = _booleano('INSTRUMENTACAO_HABILITADA', False)
+    INSTRUMENTACAO_LIMITE_LENTA_MS = _inteiro('INSTRUMENTACAO_LIMITE_LENTA_MS', 500)
+    # Fração das requisições perfiladas (0 desliga); o perfil das lentas é gravado em PERFIL_PASTA
+    PERFIL_AMOSTRAGEM = float(_texto('PERFIL_AMOSTRAGEM', 0.0))
+    PERFIL_FERRAMENTA = _texto('PERFIL_FERRAMENTA', 'cprofile')
+    PERFIL_PASTA = _texto('PERFIL_PASTA', 'perfis')
+
+    # Métricas no formato do Prometheus (/metrics); com vários workers, pasta compartilhada onde cada um grava as suas
+    METRICAS_HABILITADAS = _booleano('METRICAS_HABILITADAS', True)
+    METRICAS_PASTA = _texto('METRICAS_PASTA')
+    METRICAS_INTERVALO = _inteiro('METRICAS_INTERVALO', 5)
+
+    # Fila de notas (PUT /alunos/<id>/notas): aceita na hora e grava em lotes em segundo plano, com diário em FILA_NOTAS_PASTA
+    FILA_NOTAS_HABILITADA = _booleano('FILA_NOTAS_HABILITADA', False)
+    FILA_NOTAS_PASTA = _texto('FILA_NOTAS_PASTA', 'fila_notas')
+    FILA_NOTAS_TAMANHO_MAXIMO = _inteiro('FILA_NOTAS_TAMANHO_MAXIMO', 10000)
+    FILA_NOTAS_TAMANHO_LOTE = _inteiro('FILA_NOTAS_TAMANHO_LOTE', 1000)
+    FILA_NOTAS_INTERVALO_MS = _inteiro('FILA_NOTAS_INTERVALO_MS', 50)
+    # fsync do diário a cada envio: sobrevive também a quedas de energia, não só do processo
+    FILA_NOTAS_FSYNC = _booleano('FILA_NOTAS_FSYNC', False)
+
+    # Linhas de versao_tabela por tabela (ETags das listagens): commits concorrentes só disputam o lock da mesma fatia
+    VERSOES_FATIAS = _inteiro('VERSOES_FATIAS', 8)
+
+    # Tamanho padrão dos lotes da importação de alunos
+    IMPORTACAO_TAMANHO_LOTE = _inteiro('IMPORTACAO_TAMANHO_LOTE', 1000)
+    # Média final mínima para aprovação
+    MEDIA_APROVACAO = float(_texto('MEDIA_APROVACAO', 6.0))
+    # Pesos de cada semestre na média final; ao mudar, recalcule as gravadas com "flask recalcular-medias".
+    # Ficam como texto aqui e são convertidos (e conferidos) por validar_pesos na criação da aplicação
+    MEDIA_PESO_PRIMEIRO_SEMESTRE = _texto('MEDIA_PESO_PRIMEIRO_SEMESTRE', '1.0')
+    MEDIA_PESO_SEGUNDO_SEMESTRE = _texto('MEDIA_PESO_SEGUNDO_SEMESTRE', '1.0')
+    # Remoção de turmas com alunos e de professores com turmas: anular (os dependentes ficam sem), restringir (409) ou cascata
+    POLITICA_REMOCAO_TURMA = _texto('POLITICA_REMOCAO_TURMA', 'anular')
+    POLITICA_REMOCAO_PROFESSOR = _texto('POLITICA_REMOCAO_PROFESSOR', 'anular')
+    # Cache de leitura dos registros (memoria ou nenhum), com limite de entradas e TTL em segundos
+    CACHE_TIPO = _texto('CACHE_TIPO', 'memoria')
+    CACHE_TAMANHO_MAXIMO = _inteiro('CACHE_TAMANHO_MAXIMO', 10000)
+    CACHE_TTL = _inteiro('CACHE_TTL', 30)
@@ -1,3 +1,135 @@
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import current_app, has_app_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql.dml import UpdateBase
+
+# Prefixo dos binds de réplica em SQLALCHEMY_BINDS
+PREFIXO_REPLICA = 'replica_'
+# Marca em session.info: a sessão atende uma requisição só de leitura
+CHAVE_LEITURA = 'somente_leitura'
+CHAVE_REPLICA = 'engine_replica'
+# Cookie (ou header) que fixa as leituras no primário logo após uma escrita
+COOKIE_PRIMARIO = 'ler_primario'
+HEADER_PRIMARIO = 'X-Ler-Primario'
+
+
+class SessaoRoteada(Session):
+    """Sessão que envia as leituras das requisições GET para uma réplica.
+
+    A réplica é escolhida no primeiro acesso ao banco e usada até o fim da
+    sessão (dados e versões da mesma fonte). Flush, INSERT/UPDATE/DELETE e
+    sessões sem a marca de leitura usam o primário.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(CHAVE_LEITURA) and not self._flushing and not isinstance(clause, UpdateBase):
+            if CHAVE_REPLICA not in self.info:
+                replicas = current_app.extensions.get('replicas') if has_app_context() else None
+                self.info[CHAVE_REPLICA] = replicas.escolher() if replicas else None
+            if self.info[CHAVE_REPLICA] is not None:
+                return self.info[CHAVE_REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': SessaoRoteada})
+
+
+def agora():
+    """Data e hora atual em UTC (sem fuso), usada nas colunas de data de alteração."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def configurar_sqlite(engine, pragmas):
+    """Aplica os PRAGMAs a cada nova conexão, se o banco for SQLite."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def aplicar_pragmas(conexao_dbapi, registro):
+        cursor = conexao_dbapi.cursor()
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome}={valor}')
+        cursor.close()
+
+
+class Replicas:
+    """Réplicas de leitura, escolhidas em round-robin entre as saudáveis.
+
+    Cada réplica é verificada com ``SELECT 1`` no máximo a cada
+    ``intervalo`` segundos; um erro de conexão a retira até a próxima
+    verificação. Sem réplica saudável as leituras vão para o primário.
+    """
+
+    def __init__(self, engines, intervalo=10):
+        self.engines = list(engines)
+        self.intervalo = intervalo
+        self._proxima = itertools.count()
+        self._estado = {engine: (True, time.monotonic()) for engine in self.engines}
+        self._trava = threading.Lock()
+        for engine in self.engines:
+            event.listen(engine, 'handle_error', self._ao_falhar)
+
+    def escolher(self):
+        for _ in range(len(self.engines)):
+            with self._trava:
+                engine = self.engines[next(self._proxima) % len(self.engines)]
+            if self._saudavel(engine):
+                return engine
+        return None
+
+    def _saudavel(self, engine):
+        saudavel, verificado_em = self._estado[engine]
+        if time.monotonic() - verificado_em < self.intervalo:
+            return saudavel
+        try:
+            with engine.connect() as conexao:
+                conexao.exec_driver_sql('SELECT 1')
+            saudavel = True
+        except Exception:
+            saudavel = False
+        self._estado[engine] = (saudavel, time.monotonic())
+        return saudavel
+
+    def _ao_falhar(self, contexto):
+        if contexto.is_disconnect or isinstance(contexto.sqlalchemy_exception, OperationalError):
+            self._estado[contexto.engine] = (False, time.monotonic())
+
+    def estado(self):
+        return [
+            {'url': engine.url.render_as_string(hide_password=True), 'saudavel': saudavel}
+            for engine, (saudavel, _) in self._estado.items()
+        ]
+
+
+def iniciar_replicas(app):
+    """Liga o roteamento de leituras se houver binds ``replica_*`` configurados.
+
+    GET e HEAD leem de uma réplica, a menos que o cliente tenha escrito há
+    pouco (cookie ``ler_primario``, válido por ``REPLICA_ATRASO_MAXIMO``
+    segundos) ou envie o header ``X-Ler-Primario``: assim cada cliente lê
+    as próprias escritas mesmo com atraso de replicação.
+    """
+    with app.app_context():
+        engines = [engine for chave, engine in db.engines.items() if chave and chave.startswith(PREFIXO_REPLICA)]
+    if not engines:
+        return
+    app.extensions['replicas'] = Replicas(engines, app.config.get('REPLICA_INTERVALO_VERIFICACAO', 10))
+    atraso = app.config.get('REPLICA_ATRASO_MAXIMO', 5)
+
+    @app.before_request
+    def rotear_leitura():
+        if request.method in ('GET', 'HEAD') and not request.cookies.get(COOKIE_PRIMARIO) and not request.headers.get(HEADER_PRIMARIO):
+            db.session.info[CHAVE_LEITURA] = True
 
-db = SQLAlchemy()
\ No newline at end of file
+    @app.after_request
+    def fixar_primario(resposta):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and resposta.status_code < 400:
+            resposta.set_cookie(COOKIE_PRIMARIO, '1', max_age=atraso, httponly=True, samesite='Lax')
+        return resposta
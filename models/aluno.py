@@ -1,26 +1,52 @@
-from database import db
+from sqlalchemy import literal_column
+
+from database import agora, db
 
 class Aluno(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    nome = db.Column(db.String(100), nullable=False)
-    idade = db.Column(db.Integer, nullable=False)
-    data_nascimento = db.Column(db.Date, nullable=False)
+    nome = db.Column(db.String(100), nullable=False, index=True)
+    idade = db.Column(db.Integer, nullable=False, index=True)
+    data_nascimento = db.Column(db.Date, nullable=False, index=True)
     nota_primeiro_semestre = db.Column(db.Float, nullable=True)
     nota_segundo_semestre = db.Column(db.Float, nullable=True)
-    media_final = db.Column(db.Float, nullable=True)
-    turma_id = db.Column(db.Integer, db.ForeignKey('turma.id'), nullable=True)
+    media_final = db.Column(db.Float, nullable=True, index=True)
+    turma_id = db.Column(db.Integer, db.ForeignKey('turma.id', ondelete='SET NULL'), nullable=True)
+
+    # Versão (ETag e If-Match) e data da última alteração; o UPDATE de objetos
+    # confere a versão lida, e UPDATEs em lote a incrementam pelo onupdate
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=literal_column('versao') + 1)
+    atualizado_em = db.Column(db.DateTime, nullable=True, default=agora, onupdate=agora)
+
+    __mapper_args__ = {'version_id_col': versao}
+
+    # Índices: (turma_id, id) atende a listagem de uma turma na ordem do cursor
+    # (keyset por id, sem ordenar a turma inteira); (turma_id, media_final) os
+    # filtros de turma com intervalo de média
+    __table_args__ = (
+        db.Index('ix_aluno_turma_id_id', 'turma_id', 'id'),
+        db.Index('ix_aluno_turma_id_media_final', 'turma_id', 'media_final'),
+    )
+
+    # Relacionamento (passive_deletes: a remoção da turma não carrega os alunos,
+    # tratados por utils.remocao e pelo ON DELETE do banco); alunos em ordem de id
+    turma = db.relationship('Turma', backref=db.backref('alunos', passive_deletes=True, order_by='Aluno.id'))
 
-    # Relacionamento
-    turma = db.relationship('Turma', backref='alunos')
+    # Colunas da representação simples, lidas como tuplas nas listagens
+    CAMPOS = ('id', 'nome', 'idade', 'data_nascimento', 'nota_primeiro_semestre', 'nota_segundo_semestre', 'media_final', 'turma_id')
+    # Colunas do índice de busca textual (GET /alunos/busca)
+    CAMPOS_BUSCA = ('nome',)
 
-    def serialize(self):
-        return {
+    def serialize(self, incluir=()):
+        dados = {
             'id': self.id,
             'nome': self.nome,
             'idade': self.idade,
-            'data_nascimento': self.data_nascimento.strftime('%Y-%m-%d') if self.data_nascimento else None,
+            'data_nascimento': self.data_nascimento.isoformat() if self.data_nascimento else None,
             'nota_primeiro_semestre': self.nota_primeiro_semestre,
             'nota_segundo_semestre': self.nota_segundo_semestre,
             'media_final': self.media_final,
             'turma_id': self.turma_id
-        }
\ No newline at end of file
+        }
+        if 'turma' in incluir:
+            dados['turma'] = self.turma.serialize() if self.turma else None
+        return dados
\ No newline at end of file
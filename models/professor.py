@@ -1,17 +1,34 @@
-from database import db
+from sqlalchemy import literal_column
+
+from database import agora, db
 
 class Professor(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    nome = db.Column(db.String(100), nullable=False)
-    idade = db.Column(db.Integer, nullable=False)
-    materia = db.Column(db.String(100), nullable=False)
+    nome = db.Column(db.String(100), nullable=False, index=True)
+    idade = db.Column(db.Integer, nullable=False, index=True)
+    materia = db.Column(db.String(100), nullable=False, index=True)
     observacoes = db.Column(db.Text, nullable=True)
 
-    def serialize(self):
-        return {
+    # Versão (ETag e If-Match) e data da última alteração; o UPDATE de objetos
+    # confere a versão lida, e UPDATEs em lote a incrementam pelo onupdate
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=literal_column('versao') + 1)
+    atualizado_em = db.Column(db.DateTime, nullable=True, default=agora, onupdate=agora)
+
+    __mapper_args__ = {'version_id_col': versao}
+
+    # Colunas da representação simples, lidas como tuplas nas listagens
+    CAMPOS = ('id', 'nome', 'idade', 'materia', 'observacoes')
+    # Colunas do índice de busca textual (GET /professores/busca)
+    CAMPOS_BUSCA = ('nome', 'materia', 'observacoes')
+
+    def serialize(self, incluir=()):
+        dados = {
             'id': self.id,
             'nome': self.nome,
             'idade': self.idade,
             'materia': self.materia,
             'observacoes': self.observacoes
-        }
\ No newline at end of file
+        }
+        if 'turmas' in incluir:
+            dados['turmas'] = [turma.serialize() for turma in self.turmas]
+        return dados
\ No newline at end of file
@@ -0,0 +1,48 @@
+import math
+
+from database import db
+
+class ResumoTurma(db.Model):
+    """Resumo das notas de uma turma, mantido a cada alteração de aluno.
+
+    Guarda contagens, somas e somas dos quadrados, de onde saem média e
+    desvio padrão sem agregar os alunos da turma.
+    """
+    __tablename__ = 'resumo_turma'
+
+    turma_id = db.Column(db.Integer, db.ForeignKey('turma.id', ondelete='CASCADE'), primary_key=True)
+    quantidade_alunos = db.Column(db.Integer, nullable=False, default=0)
+    nota_primeiro_semestre_quantidade = db.Column(db.Integer, nullable=False, default=0)
+    nota_primeiro_semestre_soma = db.Column(db.Float, nullable=False, default=0)
+    nota_primeiro_semestre_soma_quadrados = db.Column(db.Float, nullable=False, default=0)
+    nota_segundo_semestre_quantidade = db.Column(db.Integer, nullable=False, default=0)
+    nota_segundo_semestre_soma = db.Column(db.Float, nullable=False, default=0)
+    nota_segundo_semestre_soma_quadrados = db.Column(db.Float, nullable=False, default=0)
+    media_final_quantidade = db.Column(db.Integer, nullable=False, default=0)
+    media_final_soma = db.Column(db.Float, nullable=False, default=0)
+    media_final_soma_quadrados = db.Column(db.Float, nullable=False, default=0)
+    aprovados = db.Column(db.Integer, nullable=False, default=0)
+
+    def _nota(self, nome):
+        quantidade = getattr(self, f'{nome}_quantidade') or 0
+        if not quantidade:
+            return {'quantidade': 0, 'media': None, 'desvio_padrao': None}
+        media = getattr(self, f'{nome}_soma') / quantidade
+        variancia = getattr(self, f'{nome}_soma_quadrados') / quantidade - media ** 2
+        return {
+            'quantidade': quantidade,
+            'media': media,
+            'desvio_padrao': math.sqrt(max(variancia, 0))
+        }
+
+    def serialize(self):
+        avaliados = self.media_final_quantidade or 0
+        return {
+            'turma_id': self.turma_id,
+            'quantidade_alunos': self.quantidade_alunos or 0,
+            'nota_primeiro_semestre': self._nota('nota_primeiro_semestre'),
+            'nota_segundo_semestre': self._nota('nota_segundo_semestre'),
+            'media_final': self._nota('media_final'),
+            'aprovados': self.aprovados or 0,
+            'taxa_aprovacao': self.aprovados / avaliados if avaliados else None
+        }
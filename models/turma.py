@@ -1,19 +1,43 @@
-from database import db
+from sqlalchemy import literal_column
+
+from database import agora, db
 from models.professor import Professor
 
 class Turma(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    descricao = db.Column(db.String(100), nullable=False)
+    descricao = db.Column(db.String(100), nullable=False, index=True)
     ativo = db.Column(db.Boolean, nullable=False)
-    professor_id = db.Column(db.Integer, db.ForeignKey('professor.id'), nullable=True)
+    professor_id = db.Column(db.Integer, db.ForeignKey('professor.id', ondelete='SET NULL'), nullable=True, index=True)
+
+    # Versão (ETag e If-Match) e data da última alteração; o UPDATE de objetos
+    # confere a versão lida, e UPDATEs em lote a incrementam pelo onupdate
+    versao = db.Column(db.Integer, nullable=False, default=1, server_default='1', onupdate=literal_column('versao') + 1)
+    atualizado_em = db.Column(db.DateTime, nullable=True, default=agora, onupdate=agora)
+
+    __mapper_args__ = {'version_id_col': versao}
+
+    # Índices: (ativo, id) atende ativo=... na ordem do cursor (id), sem ordenar
+    # todas as turmas ativas; (ativo, professor_id) os dois filtros juntos
+    __table_args__ = (
+        db.Index('ix_turma_ativo_id', 'ativo', 'id'),
+        db.Index('ix_turma_ativo_professor_id', 'ativo', 'professor_id'),
+    )
+
+    # Relacionamento (passive_deletes: a remoção do professor não carrega as turmas); turmas em ordem de id
+    professor = db.relationship('Professor', backref=db.backref('turmas', passive_deletes=True, order_by='Turma.id'))
 
-    # Relacionamento
-    professor = db.relationship('Professor', backref='turmas')
+    # Colunas da representação simples, lidas como tuplas nas listagens
+    CAMPOS = ('id', 'descricao', 'ativo', 'professor_id')
 
-    def serialize(self):
-        return {
+    def serialize(self, incluir=()):
+        dados = {
             'id': self.id,
             'descricao': self.descricao,
             'ativo': self.ativo,
             'professor_id': self.professor_id
-        }
\ No newline at end of file
+        }
+        if 'professor' in incluir:
+            dados['professor'] = self.professor.serialize() if self.professor else None
+        if 'alunos' in incluir:
+            dados['alunos'] = [aluno.serialize() for aluno in self.alunos]
+        return dados
\ No newline at end of file
@@ -0,0 +1,13 @@
+from database import agora, db
+
+class VersaoTabela(db.Model):
+    """Versão de cada tabela, incrementada a cada commit que altera a tabela.
+
+    Usada nos ETags das listagens: uma leitura pela chave primária diz se
+    alguma linha foi criada, alterada ou removida.
+    """
+    __tablename__ = 'versao_tabela'
+
+    tabela = db.Column(db.String(100), primary_key=True)
+    versao = db.Column(db.Integer, nullable=False, default=1)
+    atualizado_em = db.Column(db.DateTime, nullable=False, default=agora)
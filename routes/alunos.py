@@ -1,12 +1,116 @@
-from flask import Blueprint, request, jsonify
-from datetime import datetime
+from flask import Blueprint, current_app, request, jsonify
+import io
+
+from sqlalchemy.orm.exc import StaleDataError
 
 from models.aluno import Aluno
+from models.professor import Professor
 from models.turma import Turma
 from database import db
+from utils.cache import existe, invalidar, ler_registro
+from utils.busca import buscar
+from utils.cache_http import com_validadores, falha_pre_condicao, nao_modificado, validadores_colecao, validadores_registro
+from utils.exportacao import FORMATOS, exportar
+from utils.fila_notas import FilaCheia
+from utils.importacao import TAMANHO_LOTE_PADRAO, abrir_texto, detectar_formato, importar, ler_registros, registrar_progresso
+from utils.listagem import ParametroInvalido, filtrar, ler_inclusoes, ler_inteiro, listar
+from utils.lote import TAMANHO_MAXIMO_LOTE, em_blocos, ids_existentes, inserir_em_lote, ler_ids, ler_lote, resposta_lote
+from utils.media import calcular_media, pesos_media
+from utils.resumo import estado, registrar_alteracao, registrar_alteracoes
+from utils.validacao import ErroValidacao, e_inteiro, e_numero, ler_data
 
 appAluno = Blueprint('appAluno', __name__)
 
+# Filtros e ordenação aceitos na listagem (todos com índice no modelo)
+FILTROS_IGUALDADE = ('turma_id',)
+FILTROS_INTERVALO = ('idade', 'media_final', 'data_nascimento')
+CAMPOS_ORDENAVEIS = ('id', 'nome', 'idade', 'data_nascimento', 'media_final')
+# Relacionamentos aceitos em ?incluir=
+INCLUSOES = ('turma',)
+
+CAMPOS_OBRIGATORIOS = ('nome', 'idade', 'data_nascimento')
+# Campos aceitos no envio de notas (PUT /alunos/<id>/notas)
+CAMPOS_NOTAS = ('nota_primeiro_semestre', 'nota_segundo_semestre')
+
+
+
+def preparar_aluno(data, parcial=False):
+    """Valida os dados de um aluno e converte para os valores das colunas.
+
+    Com ``parcial=True`` (atualização) apenas os campos enviados são
+    validados e retornados. A existência da turma não é verificada aqui.
+    Lança ErroValidacao se algum campo for inválido.
+    """
+    if not isinstance(data, dict) or not data:
+        raise ErroValidacao('Dados inválidos')
+    if not parcial and any(campo not in data for campo in CAMPOS_OBRIGATORIOS):
+        raise ErroValidacao('Dados inválidos')
+
+    campos = {}
+    if 'nome' in data:
+        if not isinstance(data['nome'], str) or not data['nome']:
+            raise ErroValidacao('Nome inválido')
+        campos['nome'] = data['nome']
+    if 'idade' in data:
+        if not e_inteiro(data['idade']):
+            raise ErroValidacao('Idade inválida')
+        campos['idade'] = data['idade']
+    if 'data_nascimento' in data:
+        # Converte a data de nascimento para o formato Date
+        try:
+            campos['data_nascimento'] = ler_data(data['data_nascimento'])
+        except (TypeError, ValueError):
+            raise ErroValidacao('Data de nascimento inválida, use o formato YYYY-MM-DD')
+    for nota in ('nota_primeiro_semestre', 'nota_segundo_semestre'):
+        if nota in data:
+            if data[nota] is not None and not e_numero(data[nota]):
+                raise ErroValidacao('Nota inválida')
+            campos[nota] = data[nota]
+        elif not parcial:
+            campos[nota] = None
+    if 'turma_id' in data:
+        if data['turma_id'] is not None and not e_inteiro(data['turma_id']):
+            raise ErroValidacao('Turma inválida')
+        campos['turma_id'] = data['turma_id']
+    elif not parcial:
+        campos['turma_id'] = None
+    return campos
+
+
+def verificar_turma(data, consultar=existe):
+    """Lança ErroValidacao (404) se ``turma_id`` foi enviado e a turma não existe.
+
+    Um ``turma_id`` nulo também é recusado, como nas rotas em lote.
+    ``consultar`` troca a consulta com cache por outra (a do ``/batch``
+    consulta a própria transação).
+    """
+    if 'turma_id' in data and not consultar(Turma, data['turma_id']):
+        raise ErroValidacao('Turma não encontrada', 404)
+
+
+def aluno_de_csv(linha):
+    """Converte uma linha de CSV (valores em texto) para os tipos do JSON.
+
+    Células vazias são tratadas como campos ausentes; a validação em si
+    continua sendo a de preparar_aluno.
+    """
+    data = {}
+    for campo, valor in linha.items():
+        if campo is None:
+            raise ErroValidacao('Linha com mais colunas que o cabeçalho')
+        valor = (valor or '').strip()
+        if not valor:
+            continue
+        try:
+            if campo in ('idade', 'turma_id'):
+                valor = int(valor)
+            elif campo in ('nota_primeiro_semestre', 'nota_segundo_semestre'):
+                valor = float(valor.replace(',', '.'))
+        except ValueError:
+            raise ErroValidacao(f'Valor inválido para {campo}')
+        data[campo] = valor
+    return data
+
 ##### GET all #####
 @appAluno.route('/alunos', methods=['GET'])
 def get_alunos():
@@ -14,19 +118,150 @@ def get_alunos():
     ---
     tags:
       - Alunos
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (máximo 1000). Sem limit a lista é enviada em streaming
+      - name: after
+        in: query
+        type: integer
+        required: false
+        description: Cursor; retorna apenas registros com id maior que este
+      - name: formato
+        in: query
+        type: string
+        enum: [json, ndjson]
+        required: false
+        description: Formato da resposta (array JSON ou um objeto por linha)
+      - name: incluir
+        in: query
+        type: string
+        required: false
+        description: Dados relacionados separados por vírgula (turma); também aceito como include
+      - name: turma_id
+        in: query
+        type: string
+        required: false
+        description: ID da turma (use null para alunos sem turma)
+      - name: idade_min
+        in: query
+        type: integer
+        required: false
+        description: Idade mínima
+      - name: idade_max
+        in: query
+        type: integer
+        required: false
+        description: Idade máxima
+      - name: media_final_min
+        in: query
+        type: number
+        required: false
+        description: Média final mínima
+      - name: media_final_max
+        in: query
+        type: number
+        required: false
+        description: Média final máxima
+      - name: data_nascimento_min
+        in: query
+        type: string
+        required: false
+        description: Data de nascimento inicial (YYYY-MM-DD)
+      - name: data_nascimento_max
+        in: query
+        type: string
+        required: false
+        description: Data de nascimento final (YYYY-MM-DD)
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: Campo de ordenação (id, nome, idade, data_nascimento, media_final); prefixo - para decrescente
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebido antes; responde 304 se a lista não mudou
     responses:
       200:
         description: Lista de alunos
+      304:
+        description: Não modificado
+      400:
+        description: Parâmetro inválido
       500:
         description: Erro de servidor
     """
     try:
-        alunos = Aluno.query.all()
-        return jsonify([aluno.serialize() for aluno in alunos]), 200
+        incluir, opcoes = ler_inclusoes(Aluno, INCLUSOES)
+        # Validação pela versão das tabelas, antes de ler e serializar os alunos
+        etag, ultima_modificacao = validadores_colecao(Aluno, incluir)
+        resposta = nao_modificado(etag, ultima_modificacao)
+        if resposta is not None:
+            return resposta
+        query = filtrar(Aluno.query.options(*opcoes), Aluno, igualdade=FILTROS_IGUALDADE, intervalo=FILTROS_INTERVALO)
+        resposta = listar(query, Aluno, incluir, CAMPOS_ORDENAVEIS)
+        return com_validadores(resposta, etag, ultima_modificacao), 200
+    except ParametroInvalido as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
     
+##### GET busca #####
+@appAluno.route('/alunos/busca', methods=['GET'])
+def busca_alunos():
+    """Endpoint para buscar alunos pelo nome (parcial, sem diferenciar acentos e maiúsculas)
+    ---
+    tags:
+      - Alunos
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Palavras ou começo de palavras do nome (joao sil encontra João Silva)
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (padrão 20, máximo 100)
+      - name: offset
+        in: query
+        type: integer
+        required: false
+        description: Resultados a pular (máximo 1000); o próximo vem no header X-Proximo-Offset
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebido antes; responde 304 se os alunos não mudaram
+    responses:
+      200:
+        description: Alunos encontrados, mais relevantes primeiro
+      304:
+        description: Não modificado
+      400:
+        description: Parâmetro inválido
+      500:
+        description: Erro de servidor
+    """
+    try:
+        # Mesmos validadores da listagem: mudam a cada alteração em alunos
+        etag, ultima_modificacao = validadores_colecao(Aluno)
+        resposta = nao_modificado(etag, ultima_modificacao)
+        if resposta is not None:
+            return resposta
+        return com_validadores(buscar(Aluno), etag, ultima_modificacao), 200
+    except ParametroInvalido as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
 ##### GET by id #####
 @appAluno.route('/alunos/<int:id>', methods=['GET'])
 def get_aluno(id):
@@ -40,21 +275,40 @@ def get_aluno(id):
         type: integer
         required: true
         description: ID do aluno
+      - name: incluir
+        in: query
+        type: string
+        required: false
+        description: Dados relacionados separados por vírgula (turma); também aceito como include
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebido antes; responde 304 se o aluno não mudou
     responses:
       200:
         description: Aluno encontrado
+      304:
+        description: Não modificado
       404:
         description: Aluno não encontrado
       500:
         description: Erro de servidor
     """
     try:
-        aluno = Aluno.query.get(id)
-        if not aluno:
+        incluir, opcoes = ler_inclusoes(Aluno, INCLUSOES)
+        registro = ler_registro(Aluno, id, incluir, opcoes)
+        if not registro:
             return jsonify({'message': 'Aluno não encontrado'}), 404
-        
-        return jsonify(aluno.serialize()), 200
+
+        serializar, etag, ultima_modificacao = registro
+        resposta = nao_modificado(etag, ultima_modificacao)
+        if resposta is not None:
+            return resposta
+        return com_validadores(jsonify(serializar()), etag, ultima_modificacao), 200
       
+    except ParametroInvalido as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
@@ -101,40 +355,29 @@ def post_aluno():
       500:
         description: Erro de servidor
     """
-    data = request.get_json()
-    
-    if not data or 'nome' not in data or 'idade' not in data or 'data_nascimento' not in data:
-        return jsonify({'message': 'Dados inválidos'}), 400
+    data = request.get_json(silent=True)
+
+    try:
+        campos = preparar_aluno(data)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
     
     # Verifica se a turma existe
-    if 'turma_id' in data:
-        if not db.session.query(Turma.id).filter_by(id=data['turma_id']).scalar():
-            return jsonify({'message': 'Turma não encontrada'}), 404
+    try:
+        verificar_turma(data)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
     
     try:
-        # Converte a data de nascimento para o formato Date
-        data_nascimento = datetime.strptime(data['data_nascimento'], '%Y-%m-%d').date()
-
-        nota_primeiro_semestre = data.get('nota_primeiro_semestre')
-        nota_segundo_semestre = data.get('nota_segundo_semestre')
         # Calcula a média final
-        media_final = None
-        if nota_primeiro_semestre is not None and nota_segundo_semestre is not None:
-            media_final = (nota_primeiro_semestre + nota_segundo_semestre) / 2
+        campos['media_final'] = calcular_media(campos['nota_primeiro_semestre'], campos['nota_segundo_semestre'])
 
         # Cria um novo aluno
-        novo_aluno = Aluno(
-            nome=data['nome'],
-            idade=data['idade'],
-            data_nascimento=data_nascimento,
-            nota_primeiro_semestre=nota_primeiro_semestre,
-            nota_segundo_semestre=nota_segundo_semestre,
-            media_final=media_final,
-            turma_id=data.get('turma_id')
-        )
+        novo_aluno = Aluno(**campos)
 
         # Adiciona aluno ao banco de dados
         db.session.add(novo_aluno)
+        registrar_alteracao(None, estado(novo_aluno))
         db.session.commit()
         return jsonify({'message': 'Aluno criado com sucesso!'}), 201
     except Exception as e:
@@ -179,6 +422,11 @@ def put_aluno(id):
             turma_id:
               type: integer
               example: 1
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: ETag do aluno (GET sem incluir); responde 412 se ele foi alterado desde então
     responses:
       200:
         description: Aluno atualizado
@@ -188,53 +436,145 @@ def put_aluno(id):
         description:
           - Aluno não encontrado
           - Turma não encontrada
+      409:
+        description: Registro alterado por outra requisição durante a operação
+      412:
+        description: If-Match não corresponde ao ETag atual
       500:
         description: Erro de servidor
     """
-    data = request.get_json()
+    data = request.get_json(silent=True)
 
     # Verifica se os dados foram enviados corretamente
-    if not data:
-        return jsonify({'message': 'Dados inválidos'}), 400
+    try:
+        campos = preparar_aluno(data, parcial=True)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
     
     aluno = Aluno.query.get(id)
 
     # Verifica se o aluno existe
     if not aluno:
         return jsonify({'message': 'Aluno não encontrado'}), 404
+
+    # Concorrência otimista: If-Match com o ETag lido pelo cliente
+    falha = falha_pre_condicao(aluno)
+    if falha:
+        return falha
     
-    # Verificação de notas e média
-    if 'nota_primeiro_semestre' in data or 'nota_segundo_semestre' in data:
-        if 'nota_primeiro_semestre' in data:
-            aluno.nota_primeiro_semestre = data['nota_primeiro_semestre']
-        if 'nota_segundo_semestre' in data:
-            aluno.nota_segundo_semestre = data['nota_segundo_semestre']
+    # Verifica se a turma existe
+    try:
+        verificar_turma(campos)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
 
-        if aluno.nota_primeiro_semestre is not None and aluno.nota_segundo_semestre is not None:
-            aluno.media_final = (aluno.nota_primeiro_semestre + aluno.nota_segundo_semestre) / 2
-        else:
-            aluno.media_final = None
+    antes = estado(aluno)
+    for campo, valor in campos.items():
+        setattr(aluno, campo, valor)
 
-    if 'turma_id' in data:
-        # Verifica se a turma existe
-        if not db.session.query(Turma.id).filter_by(id=data['turma_id']).scalar():
-            return jsonify({'message': 'Turma não encontrada'}), 404
-        aluno.turma_id = data['turma_id']
-    if 'nome' in data:
-        aluno.nome = data['nome']
-    if 'idade' in data:
-        aluno.idade = data['idade']
-    if 'data_nascimento' in data:
-        aluno.data_nascimento = datetime.strptime(data['data_nascimento'], '%Y-%m-%d').date()
+    # Verificação de notas e média
+    if 'nota_primeiro_semestre' in campos or 'nota_segundo_semestre' in campos:
+        aluno.media_final = calcular_media(aluno.nota_primeiro_semestre, aluno.nota_segundo_semestre)
     
     try:
-        # Atualiza o Aluno no Banco de Dados
+        # Atualiza o Aluno e o resumo da turma no Banco de Dados
+        registrar_alteracao(antes, estado(aluno))
+        invalidar(Aluno, [id])
         db.session.commit()
-        return jsonify({'message': 'Aluno atualizado com sucesso!'}), 200
+        resposta = jsonify({'message': 'Aluno atualizado com sucesso!'})
+        return com_validadores(resposta, *validadores_registro(aluno)), 200
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': 'Aluno alterado por outra requisição, tente novamente'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
 
+##### PUT notas #####
+@appAluno.route('/alunos/<int:id>/notas', methods=['PUT'])
+def put_notas_aluno(id):
+    """Endpoint para lançar as notas de um aluno
+    ---
+    tags:
+      - Alunos
+    description: >
+      Com a fila de notas habilitada (FILA_NOTAS_HABILITADA) as notas são
+      anotadas no diário da fila e respondidas com 202, e gravadas em lote
+      em seguida (o atraso aparece em /sistema/fila-notas). Envios do mesmo
+      aluno ainda pendentes são combinados. Sem a fila são gravadas na hora.
+      A média final é calculada como no PUT do aluno.
+    parameters:
+      - name: id
+        in: path
+        type: integer
+        required: true
+        description: ID do aluno
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            nota_primeiro_semestre:
+              type: number
+              example: 7.5
+            nota_segundo_semestre:
+              type: number
+              example: 8.0
+    responses:
+      200:
+        description: Notas gravadas (fila desabilitada)
+      202:
+        description: Notas aceitas na fila
+      400:
+        description: Erro de validação
+      404:
+        description: Aluno não encontrado
+      409:
+        description: Registro alterado por outra requisição durante a operação
+      500:
+        description: Erro de servidor
+      503:
+        description: Fila de notas cheia, tente novamente (Retry-After)
+    """
+    data = request.get_json(silent=True)
+
+    try:
+        if isinstance(data, dict) and any(campo not in CAMPOS_NOTAS for campo in data):
+            raise ErroValidacao('Envie apenas nota_primeiro_semestre e nota_segundo_semestre')
+        campos = preparar_aluno(data, parcial=True)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
+
+    fila = current_app.extensions.get('fila_notas')
+    if fila is None:
+        try:
+            resultado, = atualizar_alunos([(id, campos)])
+            if resultado['status'] != 200:
+                db.session.rollback()
+                return jsonify({'message': resultado['message']}), resultado['status']
+            db.session.commit()
+            return jsonify({'message': 'Notas gravadas com sucesso!'}), 200
+        except StaleDataError:
+            db.session.rollback()
+            return jsonify({'message': 'Aluno alterado por outra requisição, tente novamente'}), 409
+        except Exception as e:
+            db.session.rollback()
+            return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+    # Verifica se o aluno existe (se for removido antes da gravação, as notas são descartadas)
+    if not existe(Aluno, id):
+        return jsonify({'message': 'Aluno não encontrado'}), 404
+    try:
+        fila.enfileirar(id, campos)
+    except FilaCheia:
+        resposta = jsonify({'message': 'Fila de notas cheia, tente novamente em instantes'})
+        resposta.headers['Retry-After'] = '1'
+        return resposta, 503
+    except Exception as e:
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+    return jsonify({'message': 'Notas recebidas, serão gravadas em instantes'}), 202
+
 ##### DELETE #####
 @appAluno.route('/alunos/<int:id>', methods=['DELETE'])
 def delete_aluno(id):
@@ -248,11 +588,20 @@ def delete_aluno(id):
         type: integer
         required: true
         description: ID do aluno
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: ETag do aluno (GET sem incluir); responde 412 se ele foi alterado desde então
     responses:
       200:
         description: Aluno deletado
       404:
         description: Aluno não encontrado
+      409:
+        description: Registro alterado por outra requisição durante a operação
+      412:
+        description: If-Match não corresponde ao ETag atual
       500:
         description: Erro de servidor
     """
@@ -261,12 +610,432 @@ def delete_aluno(id):
     # Verifica se o aluno existe
     if not aluno:
         return jsonify({'message': 'Aluno não encontrado'}), 404
+
+    falha = falha_pre_condicao(aluno)
+    if falha:
+        return falha
     
     try:
         # Deleta o Aluno do banco de Dados
+        registrar_alteracao(estado(aluno), None)
         db.session.delete(aluno)
+        invalidar(Aluno, [id])
         db.session.commit()
         return jsonify({'message': 'Aluno deletado com sucesso!'}), 200
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': 'Aluno alterado por outra requisição, tente novamente'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### POST bulk #####
+@appAluno.route('/alunos/bulk', methods=['POST'])
+def post_alunos_bulk():
+    """Endpoint para criar alunos em lote
+    ---
+    tags:
+      - Alunos
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              nome:
+                type: string
+                example: Gabriel Silva
+              idade:
+                type: integer
+                example: 15
+              data_nascimento:
+                type: string
+                example: YYYY-MM-DD
+              nota_primeiro_semestre:
+                type: number
+                example: 7.5
+              nota_segundo_semestre:
+                type: number
+                example: 8.0
+              turma_id:
+                type: integer
+                example: 1
+    responses:
+      201:
+        description: Todos os alunos criados
+      207:
+        description: Resultado por item (algum aluno não foi criado)
+      400:
+        description: Lote inválido
+      500:
+        description: Erro de servidor
+    """
+    try:
+        itens = ler_lote()
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
+
+    try:
+        resultados = criar_alunos(itens)
+        db.session.commit()
+        return resposta_lote(resultados, 201)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+
+def criar_alunos(itens, deslocamento=0):
+    """Valida e insere um lote de alunos sem fazer commit.
+
+    As turmas referenciadas são verificadas com uma única consulta IN e os
+    alunos válidos são inseridos com executemany. Retorna o resultado de cada
+    item, com ``indice`` somado a ``deslocamento``.
+    """
+    resultados = [None] * len(itens)
+    validos = []
+    for indice, data in enumerate(itens):
+        try:
+            campos = preparar_aluno(data)
+        except ErroValidacao as e:
+            resultados[indice] = {'indice': indice + deslocamento, 'status': e.status, 'message': e.message}
+            continue
+        validos.append((indice, data, campos))
+
+    # Verifica todas as turmas referenciadas de uma vez
+    turmas = ids_existentes(Turma.id, [data['turma_id'] for _, data, _ in validos if 'turma_id' in data])
+
+    linhas = []
+    indices = []
+    pesos = pesos_media()
+    for indice, data, campos in validos:
+        if 'turma_id' in data and data['turma_id'] not in turmas:
+            resultados[indice] = {'indice': indice + deslocamento, 'status': 404, 'message': 'Turma não encontrada'}
+            continue
+        campos['media_final'] = calcular_media(campos['nota_primeiro_semestre'], campos['nota_segundo_semestre'], pesos)
+        linhas.append(campos)
+        indices.append(indice)
+
+    for indice, novo_id in zip(indices, inserir_em_lote(Aluno, linhas)):
+        resultados[indice] = {'indice': indice + deslocamento, 'status': 201, 'id': novo_id}
+    registrar_alteracoes([(None, estado(None, linha)) for linha in linhas])
+    return resultados
+
+
+def atualizar_alunos(atualizacoes):
+    """Atualiza um lote de alunos sem fazer commit.
+
+    ``atualizacoes`` é uma lista de pares ``(id, campos)``, com os campos já
+    validados por preparar_aluno e sem ids repetidos. A média final é
+    recalculada com as notas atuais do banco, as turmas são verificadas com
+    uma consulta IN e os alunos atualizados com executemany. Retorna o
+    resultado de cada par, na mesma ordem.
+    """
+    # Valores atuais dos alunos do lote, para recalcular a média e o resumo das turmas
+    atuais = {}
+    for bloco in em_blocos(id for id, _ in atualizacoes):
+        consulta = db.select(
+            Aluno.id, Aluno.versao, Aluno.turma_id, Aluno.nota_primeiro_semestre, Aluno.nota_segundo_semestre, Aluno.media_final
+        ).where(Aluno.id.in_(bloco))
+        atuais.update((linha.id, linha) for linha in db.session.execute(consulta))
+    turmas = ids_existentes(Turma.id, [campos['turma_id'] for _, campos in atualizacoes if 'turma_id' in campos])
+
+    resultados = []
+    mapeamentos = []
+    alteracoes = []
+    pesos = pesos_media()
+    for id, campos in atualizacoes:
+        if id not in atuais:
+            resultados.append({'status': 404, 'message': 'Aluno não encontrado'})
+            continue
+        if 'turma_id' in campos and campos['turma_id'] not in turmas:
+            resultados.append({'status': 404, 'message': 'Turma não encontrada'})
+            continue
+        if 'nota_primeiro_semestre' in campos or 'nota_segundo_semestre' in campos:
+            campos['media_final'] = calcular_media(
+                campos.get('nota_primeiro_semestre', atuais[id].nota_primeiro_semestre),
+                campos.get('nota_segundo_semestre', atuais[id].nota_segundo_semestre),
+                pesos
+            )
+        if campos:
+            mapeamentos.append({'id': id, 'versao': atuais[id].versao, **campos})
+            alteracoes.append((estado(atuais[id]), estado(atuais[id], campos)))
+        resultados.append({'status': 200, 'id': id})
+
+    # UPDATE em lote pela chave primária (executemany)
+    if mapeamentos:
+        db.session.execute(db.update(Aluno), mapeamentos)
+        registrar_alteracoes(alteracoes)
+        invalidar(Aluno, [mapeamento['id'] for mapeamento in mapeamentos])
+    return resultados
+
+
+##### PUT bulk #####
+@appAluno.route('/alunos/bulk', methods=['PUT'])
+def put_alunos_bulk():
+    """Endpoint para atualizar alunos em lote
+    ---
+    tags:
+      - Alunos
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                example: 1
+              nome:
+                type: string
+                example: Gabriel Silva
+              nota_primeiro_semestre:
+                type: number
+                example: 7.5
+              nota_segundo_semestre:
+                type: number
+                example: 8.0
+              turma_id:
+                type: integer
+                example: 1
+    responses:
+      200:
+        description: Todos os alunos atualizados
+      207:
+        description: Resultado por item (algum aluno não foi atualizado)
+      400:
+        description: Lote inválido
+      409:
+        description: Algum registro foi alterado por outra requisição durante a operação
+      500:
+        description: Erro de servidor
+    """
+    try:
+        itens = ler_lote()
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
+
+    resultados = [None] * len(itens)
+    validos = []
+    vistos = set()
+    for indice, data in enumerate(itens):
+        try:
+            if not isinstance(data, dict) or not e_inteiro(data.get('id')):
+                raise ErroValidacao('Dados inválidos: id obrigatório')
+            if data['id'] in vistos:
+                raise ErroValidacao('Aluno repetido no lote')
+            campos = preparar_aluno({k: v for k, v in data.items() if k != 'id'}, parcial=True)
+        except ErroValidacao as e:
+            resultados[indice] = {'indice': indice, 'status': e.status, 'message': e.message}
+            continue
+        vistos.add(data['id'])
+        validos.append((indice, data['id'], campos))
+
+    try:
+        for (indice, _, _), resultado in zip(validos, atualizar_alunos([(id, campos) for _, id, campos in validos])):
+            resultados[indice] = {'indice': indice, **resultado}
+        db.session.commit()
+        return resposta_lote(resultados, 200)
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': 'Alunos alterados por outra requisição, tente novamente'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+
+##### DELETE bulk #####
+@appAluno.route('/alunos/bulk', methods=['DELETE'])
+def delete_alunos_bulk():
+    """Endpoint para deletar alunos em lote
+    ---
+    tags:
+      - Alunos
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 3]
+    responses:
+      200:
+        description: Todos os alunos deletados
+      207:
+        description: Resultado por item (algum aluno não foi encontrado)
+      400:
+        description: Lote inválido
+      500:
+        description: Erro de servidor
+    """
+    try:
+        ids = ler_ids()
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
+
+    try:
+        existentes = set()
+        for bloco in em_blocos(set(ids)):
+            consulta = db.select(
+                Aluno.id, Aluno.turma_id, Aluno.nota_primeiro_semestre, Aluno.nota_segundo_semestre, Aluno.media_final
+            ).where(Aluno.id.in_(bloco))
+            removidos = db.session.execute(consulta).all()
+            existentes.update(linha.id for linha in removidos)
+            registrar_alteracoes([(estado(linha), None) for linha in removidos])
+            db.session.execute(db.delete(Aluno).where(Aluno.id.in_([linha.id for linha in removidos])))
+        invalidar(Aluno, existentes)
+        db.session.commit()
+
+        resultados = [
+            {'id': id, 'status': 200} if id in existentes else {'id': id, 'status': 404, 'message': 'Aluno não encontrado'}
+            for id in ids
+        ]
+        return resposta_lote(resultados, 200)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+
+##### POST importar #####
+@appAluno.route('/alunos/importar', methods=['POST'])
+def importar_alunos():
+    """Endpoint para importar alunos de um arquivo CSV ou NDJSON
+    ---
+    tags:
+      - Alunos
+    consumes:
+      - multipart/form-data
+      - text/csv
+      - application/x-ndjson
+    parameters:
+      - name: arquivo
+        in: formData
+        type: file
+        required: false
+        description: Arquivo CSV (com cabeçalho) ou NDJSON. Também pode ser enviado direto no corpo
+      - name: formato
+        in: query
+        type: string
+        enum: [csv, ndjson]
+        required: false
+        description: Formato do arquivo (padrão pela extensão ou Content-Type)
+      - name: lote
+        in: query
+        type: integer
+        required: false
+        description: Quantidade de linhas gravadas por commit
+    responses:
+      200:
+        description: Resumo da importação com as linhas rejeitadas
+      400:
+        description: Parâmetro inválido
+      500:
+        description: Erro de servidor
+    """
+    arquivo = request.files.get('arquivo')
+    if arquivo:
+        fluxo = arquivo.stream
+        formato = detectar_formato(arquivo.filename, arquivo.mimetype)
+    else:
+        # Corpo da requisição lido direto do socket, sem carregar em memória
+        fluxo = io.BufferedReader(request.stream)
+        formato = detectar_formato(content_type=request.mimetype)
+
+    try:
+        formato = request.args.get('formato', formato)
+        tamanho_lote = ler_inteiro('lote', minimo=1, maximo=TAMANHO_MAXIMO_LOTE) or current_app.config.get('IMPORTACAO_TAMANHO_LOTE', TAMANHO_LOTE_PADRAO)
+        registros = ler_registros(abrir_texto(fluxo), formato, aluno_de_csv)
+        resumo = importar(registros, criar_alunos, tamanho_lote, progresso=registrar_progresso)
+        return jsonify(resumo), 200
+    except (ParametroInvalido, ErroValidacao) as e:
+        return jsonify({'message': str(e)}), 400
+    except UnicodeDecodeError:
+        return jsonify({'message': 'Arquivo deve estar em UTF-8'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+
+##### GET export #####
+@appAluno.route('/alunos/export', methods=['GET'])
+def export_alunos():
+    """Endpoint para exportar alunos com notas em CSV ou NDJSON
+    ---
+    tags:
+      - Alunos
+    parameters:
+      - name: formato
+        in: query
+        type: string
+        enum: [csv, ndjson]
+        required: false
+        description: Formato do arquivo (padrão csv)
+      - name: incluir
+        in: query
+        type: string
+        required: false
+        description: Dados relacionados separados por vírgula (turma, professor)
+      - name: turma_id
+        in: query
+        type: string
+        required: false
+        description: ID da turma (use null para alunos sem turma)
+      - name: media_final_min
+        in: query
+        type: number
+        required: false
+        description: Média final mínima
+      - name: media_final_max
+        in: query
+        type: number
+        required: false
+        description: Média final máxima
+    responses:
+      200:
+        description: Arquivo com os alunos, enviado em streaming
+      400:
+        description: Parâmetro inválido
+      500:
+        description: Erro de servidor
+    """
+    formato = request.args.get('formato', request.args.get('format', 'csv'))
+    if formato not in FORMATOS:
+        return jsonify({'message': "Parâmetro 'formato' deve ser 'csv' ou 'ndjson'"}), 400
+    incluir = {item for item in request.args.get('incluir', '').split(',') if item}
+    if not incluir <= {'turma', 'professor'}:
+        return jsonify({'message': "Parâmetro 'incluir' aceita apenas turma e professor"}), 400
+
+    # Seleciona só as colunas exportadas, sem carregar objetos Aluno
+    colunas = [
+        Aluno.id, Aluno.nome, Aluno.idade, Aluno.data_nascimento,
+        Aluno.nota_primeiro_semestre, Aluno.nota_segundo_semestre,
+        Aluno.media_final, Aluno.turma_id
+    ]
+    if 'turma' in incluir:
+        colunas.append(Turma.descricao.label('turma_descricao'))
+    if 'professor' in incluir:
+        colunas.append(Professor.nome.label('professor_nome'))
+    consulta = db.select(*colunas)
+    if incluir:
+        consulta = consulta.outerjoin(Turma, Aluno.turma_id == Turma.id)
+    if 'professor' in incluir:
+        consulta = consulta.outerjoin(Professor, Turma.professor_id == Professor.id)
+
+    try:
+        consulta = filtrar(consulta, Aluno, igualdade=FILTROS_IGUALDADE, intervalo=FILTROS_INTERVALO)
+        return exportar(consulta.order_by(Aluno.id), formato, 'alunos'), 200
+    except ParametroInvalido as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
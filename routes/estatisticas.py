@@ -0,0 +1,313 @@
+import math
+from collections import defaultdict
+
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import Integer, case, cast, func, select
+
+from models.aluno import Aluno
+from models.resumo_turma import ResumoTurma
+from models.turma import Turma
+from database import db
+from utils.cache import existe, obter_cache
+from utils.cache_http import com_validadores, nao_modificado, validadores_colecao
+
+appEstatistica = Blueprint('appEstatistica', __name__)
+
+# Notas vão de 0 a NOTA_MAXIMA
+NOTA_MAXIMA = 10.0
+COLUNAS_NOTAS = ('nota_primeiro_semestre', 'nota_segundo_semestre', 'media_final')
+
+
+def _ler_largura():
+    """Largura das faixas do histograma (parâmetro ``largura``, padrão 1)."""
+    try:
+        largura = float(request.args.get('largura', 1))
+    except ValueError:
+        largura = 0
+    if not 0 < largura <= NOTA_MAXIMA:
+        raise ValueError(f"Parâmetro 'largura' deve estar entre 0 e {NOTA_MAXIMA:g}")
+    return largura
+
+
+def _faixas(largura):
+    quantidade = math.ceil(NOTA_MAXIMA / largura)
+    return [(i * largura, min((i + 1) * largura, NOTA_MAXIMA)) for i in range(quantidade)]
+
+
+def _consulta_base(colunas, grupo, filtros):
+    consulta = select(*colunas).select_from(Aluno)
+    # Agrupamento por professor passa pela turma do aluno
+    if grupo is not None and grupo.class_ is Turma:
+        consulta = consulta.join(Turma, Aluno.turma_id == Turma.id)
+    return consulta.where(*filtros)
+
+
+def _tem_percentil():
+    """Bancos com percentile_cont calculam a mediana no próprio GROUP BY."""
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def _agregados(grupo, filtros, media_aprovacao):
+    """Contagens, média, mediana (quando o banco tem), mínimo, máximo e aprovados em um único GROUP BY."""
+    colunas = [func.count(Aluno.id).label('quantidade_alunos')]
+    for nome in COLUNAS_NOTAS:
+        coluna = getattr(Aluno, nome)
+        colunas += [
+            func.count(coluna).label(f'{nome}_quantidade'),
+            func.avg(coluna).label(f'{nome}_media'),
+            func.min(coluna).label(f'{nome}_minimo'),
+            func.max(coluna).label(f'{nome}_maximo')
+        ]
+        if _tem_percentil():
+            colunas.append(func.percentile_cont(0.5).within_group(coluna).label(f'{nome}_mediana'))
+    colunas.append(func.sum(case((Aluno.media_final >= media_aprovacao, 1), else_=0)).label('aprovados'))
+
+    if grupo is None:
+        return {None: db.session.execute(_consulta_base(colunas, grupo, filtros)).mappings().one()}
+    consulta = _consulta_base([grupo.label('grupo'), *colunas], grupo, filtros).group_by(grupo)
+    return {linha['grupo']: linha for linha in db.session.execute(consulta).mappings()}
+
+
+def _histogramas(grupo, filtros, largura, quantidade_faixas):
+    """Quantidade de alunos por faixa de média final, com GROUP BY na faixa."""
+    posicao = Aluno.media_final / largura
+    # floor() não existe em todo SQLite; para notas (não negativas) o CAST trunca igual
+    if db.session.get_bind().dialect.name == 'sqlite':
+        faixa = cast(posicao, Integer)
+    else:
+        faixa = cast(func.floor(posicao), Integer)
+    colunas = [faixa.label('faixa'), func.count().label('quantidade')]
+    if grupo is not None:
+        colunas.insert(0, grupo.label('grupo'))
+    consulta = _consulta_base(colunas, grupo, [*filtros, Aluno.media_final.isnot(None)]).group_by(*colunas[:-1])
+
+    histogramas = defaultdict(lambda: [0] * quantidade_faixas)
+    for linha in db.session.execute(consulta).mappings():
+        # A nota máxima entra na última faixa
+        indice = min(max(int(linha['faixa']), 0), quantidade_faixas - 1)
+        histogramas[linha['grupo'] if grupo is not None else None][indice] += linha['quantidade']
+    return histogramas
+
+
+def _mediana_geral(coluna, filtros, quantidade):
+    """Mediana de ``coluna`` sem agrupamento: só as linhas do meio, por ORDER BY com LIMIT e OFFSET."""
+    if not quantidade:
+        return None
+    meio = _consulta_base([coluna.label('nota')], None, [*filtros, coluna.isnot(None)]).order_by(coluna)
+    meio = meio.limit(2 - quantidade % 2).offset((quantidade - 1) // 2).subquery()
+    return db.session.scalar(select(func.avg(meio.c.nota)))
+
+
+def _medianas_por_grupo(grupo, coluna, filtros):
+    """Mediana de ``coluna`` em cada grupo, com ROW_NUMBER e COUNT sobre a partição do grupo."""
+    ordenadas = _consulta_base([
+        grupo.label('grupo'),
+        coluna.label('nota'),
+        func.row_number().over(partition_by=grupo, order_by=coluna).label('posicao'),
+        # Mesma ordenação da posição, com a partição inteira como moldura: uma só ordenação no banco
+        func.count().over(partition_by=grupo, order_by=coluna, rows=(None, None)).label('total')
+    ], grupo, [*filtros, coluna.isnot(None)]).subquery()
+    # Fica a linha central (total ímpar) ou as duas centrais (total par)
+    consulta = (
+        select(ordenadas.c.grupo, func.avg(ordenadas.c.nota))
+        .where((ordenadas.c.posicao * 2).between(ordenadas.c.total, ordenadas.c.total + 2))
+        .group_by(ordenadas.c.grupo)
+    )
+    return dict(db.session.execute(consulta).all())
+
+
+def _medianas(grupo, filtros, agregados):
+    """Medianas das notas de cada grupo, calculadas no banco.
+
+    Usado quando o banco não tem função de mediana (o SQLite e o MySQL não
+    têm percentile_cont): funções de janela nos agrupamentos e, sem
+    agrupamento, as linhas do meio pelas quantidades de ``agregados``.
+    Retorna ``{valor_do_grupo: {coluna: mediana}}``.
+    """
+    if grupo is None:
+        linha = agregados[None]
+        return {None: {nome: _mediana_geral(getattr(Aluno, nome), filtros, linha[f'{nome}_quantidade']) for nome in COLUNAS_NOTAS}}
+    medianas = defaultdict(dict)
+    for nome in COLUNAS_NOTAS:
+        for chave, mediana in _medianas_por_grupo(grupo, getattr(Aluno, nome), filtros).items():
+            medianas[chave][nome] = mediana
+    return medianas
+
+
+def calcular_estatisticas(agrupamentos, filtros=()):
+    """Estatísticas das notas dos alunos para cada agrupamento.
+
+    ``agrupamentos`` mapeia um nome para a coluna de agrupamento (None =
+    todos os alunos). Retorna ``{nome: {valor_do_grupo: estatisticas}}``.
+    """
+    largura = _ler_largura()
+    faixas = _faixas(largura)
+    media_aprovacao = current_app.config.get('MEDIA_APROVACAO', 6.0)
+
+    estatisticas = {}
+    for nome_agrupamento, grupo in agrupamentos.items():
+        estatisticas[nome_agrupamento] = {}
+        histogramas = _histogramas(grupo, filtros, largura, len(faixas))
+        agregados = _agregados(grupo, filtros, media_aprovacao)
+        medianas = None if _tem_percentil() else _medianas(grupo, filtros, agregados)
+        for chave, linha in agregados.items():
+            resultado = {'quantidade_alunos': linha['quantidade_alunos']}
+            for nome in COLUNAS_NOTAS:
+                resultado[nome] = {
+                    'quantidade': linha[f'{nome}_quantidade'],
+                    'media': linha[f'{nome}_media'],
+                    'mediana': linha[f'{nome}_mediana'] if medianas is None else medianas.get(chave, {}).get(nome),
+                    'minimo': linha[f'{nome}_minimo'],
+                    'maximo': linha[f'{nome}_maximo']
+                }
+            avaliados = linha['media_final_quantidade']
+            resultado['aprovados'] = linha['aprovados'] or 0
+            resultado['taxa_aprovacao'] = resultado['aprovados'] / avaliados if avaliados else None
+            resultado['histograma'] = [
+                {'de': inicio, 'ate': fim, 'quantidade': quantidade}
+                for (inicio, fim), quantidade in zip(faixas, histogramas[chave])
+            ]
+            estatisticas[nome_agrupamento][chave] = resultado
+    return estatisticas
+
+
+def _responder(calcular):
+    """Resposta com as estatísticas de ``calcular()``, recalculadas só quando alunos ou turmas mudam.
+
+    O ETag vem da URL e das versões das tabelas, como nas listagens: quem já
+    tem a versão atual recebe 304, e as demais leituras saem do cache de
+    leitura até a próxima alteração de um aluno ou de uma turma.
+    """
+    etag, ultima_modificacao = validadores_colecao(Aluno, ('turma',))
+    resposta = nao_modificado(etag, ultima_modificacao)
+    if resposta is not None:
+        return resposta
+    cache = obter_cache()
+    chave = f'estatisticas:{etag}'
+    corpo = cache.obter(chave)
+    if corpo is None:
+        corpo = calcular()
+        cache.guardar(chave, corpo)
+    return com_validadores(jsonify(corpo), etag, ultima_modificacao), 200
+
+
+##### GET estatísticas gerais #####
+@appEstatistica.route('/estatisticas', methods=['GET'])
+def get_estatisticas():
+    """Endpoint para buscar as estatísticas de notas de todos os alunos, por turma e por professor
+    ---
+    tags:
+      - Estatísticas
+    parameters:
+      - name: largura
+        in: query
+        type: number
+        required: false
+        description: Largura das faixas do histograma da média final (padrão 1)
+    responses:
+      200:
+        description: Estatísticas gerais, por turma e por professor
+      304:
+        description: Alunos e turmas não mudaram desde o ETag enviado em If-None-Match
+      400:
+        description: Parâmetro inválido
+      500:
+        description: Erro de servidor
+    """
+    def calcular():
+        estatisticas = calcular_estatisticas({
+            'geral': None,
+            'por_turma': Aluno.turma_id,
+            'por_professor': Turma.professor_id
+        })
+        geral = estatisticas['geral'][None]
+        geral['por_turma'] = [{'turma_id': chave, **valor} for chave, valor in estatisticas['por_turma'].items()]
+        geral['por_professor'] = [{'professor_id': chave, **valor} for chave, valor in estatisticas['por_professor'].items()]
+        return geral
+
+    try:
+        return _responder(calcular)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### GET estatísticas por turma #####
+@appEstatistica.route('/turmas/<int:id>/estatisticas', methods=['GET'])
+def get_estatisticas_turma(id):
+    """Endpoint para buscar as estatísticas de notas de uma turma
+    ---
+    tags:
+      - Estatísticas
+    parameters:
+      - name: id
+        in: path
+        type: integer
+        required: true
+        description: ID da turma
+      - name: largura
+        in: query
+        type: number
+        required: false
+        description: Largura das faixas do histograma da média final (padrão 1)
+    responses:
+      200:
+        description: Estatísticas da turma
+      304:
+        description: Alunos e turmas não mudaram desde o ETag enviado em If-None-Match
+      400:
+        description: Parâmetro inválido
+      404:
+        description: Turma não encontrada
+      500:
+        description: Erro de servidor
+    """
+    if not existe(Turma, id):
+        return jsonify({'message': 'Turma não encontrada!'}), 404
+
+    def calcular():
+        estatisticas = calcular_estatisticas({'turma': None}, filtros=[Aluno.turma_id == id])['turma'][None]
+        return {'turma_id': id, **estatisticas}
+
+    try:
+        return _responder(calcular)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### GET resumo da turma #####
+@appEstatistica.route('/turmas/<int:id>/resumo', methods=['GET'])
+def get_resumo_turma(id):
+    """Endpoint para buscar o resumo de notas de uma turma (mantido a cada alteração de aluno)
+    ---
+    tags:
+      - Estatísticas
+    parameters:
+      - name: id
+        in: path
+        type: integer
+        required: true
+        description: ID da turma
+    responses:
+      200:
+        description: Quantidades, médias, desvios padrão e taxa de aprovação da turma
+      404:
+        description: Turma não encontrada
+      500:
+        description: Erro de servidor
+    """
+    try:
+        # Leitura pela chave primária, sem agregar os alunos
+        resumo = db.session.get(ResumoTurma, id)
+        if not resumo:
+            if not existe(Turma, id):
+                return jsonify({'message': 'Turma não encontrada!'}), 404
+            # Turma ainda sem alunos
+            resumo = ResumoTurma(turma_id=id, quantidade_alunos=0, media_final_quantidade=0, aprovados=0)
+        return jsonify(resumo.serialize()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
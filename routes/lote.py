@@ -0,0 +1,283 @@
+from flask import Blueprint, jsonify, request
+from sqlalchemy.orm.exc import StaleDataError
+
+from models.aluno import Aluno
+from models.professor import Professor
+from models.turma import Turma
+from database import db
+from routes.alunos import preparar_aluno, verificar_turma
+from routes.professores import preparar_professor
+from routes.turmas import preparar_turma, verificar_professor
+from utils.cache import invalidar
+from utils.cache_http import etag_confere
+from utils.media import calcular_media
+from utils.remocao import remover_dependentes_professores, remover_dependentes_turmas
+from utils.resumo import estado, registrar_alteracoes
+from utils.validacao import ErroValidacao, e_inteiro
+
+appLote = Blueprint('appLote', __name__)
+
+# Operações por requisição: todas rodam em uma transação, que segura o lock de escrita do banco
+OPERACOES_MAXIMAS = 1000
+ACOES = ('criar', 'atualizar', 'deletar')
+# Modelo, validação e mensagem de registro inexistente de cada tipo
+TIPOS = {
+    'professor': (Professor, preparar_professor, 'Professor não encontrado'),
+    'turma': (Turma, preparar_turma, 'Turma não encontrada'),
+    'aluno': (Aluno, preparar_aluno, 'Aluno não encontrado')
+}
+# Campos que apontam para outro tipo (aceitam o id ou a referência de um registro criado no lote)
+CHAVES_ESTRANGEIRAS = {
+    'turma': {'professor_id': 'professor'},
+    'aluno': {'turma_id': 'turma'}
+}
+# Verificação das chaves estrangeiras, a mesma das rotas de um registro
+VERIFICACOES = {
+    'turma': verificar_professor,
+    'aluno': verificar_turma
+}
+
+
+def _resolver(valor, tipo, referencias):
+    """Troca ``"$ref"`` pelo id do registro criado no lote com essa referência."""
+    if not isinstance(valor, str) or not valor.startswith('$'):
+        return valor
+    nome = valor[1:]
+    if nome not in referencias:
+        raise ErroValidacao(f"Referência '{valor}' não foi criada por uma operação anterior")
+    tipo_referencia, id = referencias[nome]
+    if tipo_referencia != tipo:
+        raise ErroValidacao(f"Referência '{valor}' é de {tipo_referencia}, não de {tipo}")
+    return id
+
+
+def _ler_dados(tipo, dados, referencias):
+    if not isinstance(dados, dict):
+        return dados
+    dados = dict(dados)
+    for campo, tipo_referencia in CHAVES_ESTRANGEIRAS.get(tipo, {}).items():
+        if campo in dados:
+            dados[campo] = _resolver(dados[campo], tipo_referencia, referencias)
+    return dados
+
+
+def _existe(modelo, id):
+    # Consulta na própria transação: o cache de leitura não enxerga o que o lote já alterou
+    return id is not None and db.session.get(modelo, id) is not None
+
+
+def _verificar_chaves(tipo, dados):
+    if tipo in VERIFICACOES:
+        VERIFICACOES[tipo](dados, _existe)
+
+
+def _gravar():
+    """Envia a operação ao banco (sem commit), para ter o id e falhar na operação certa."""
+    try:
+        db.session.flush()
+    except StaleDataError:
+        raise ErroValidacao('Registro alterado por outra requisição, tente novamente', 409)
+
+
+def _criar(tipo, campos, alteracoes):
+    modelo = TIPOS[tipo][0]
+    if tipo == 'aluno':
+        campos['media_final'] = calcular_media(campos['nota_primeiro_semestre'], campos['nota_segundo_semestre'])
+    obj = modelo(**campos)
+    db.session.add(obj)
+    _gravar()
+    if tipo == 'aluno':
+        alteracoes.append((None, estado(obj)))
+    return obj
+
+
+def _atualizar(tipo, obj, campos, alteracoes):
+    antes = estado(obj) if tipo == 'aluno' else None
+    for campo, valor in campos.items():
+        setattr(obj, campo, valor)
+    if tipo == 'aluno' and ('nota_primeiro_semestre' in campos or 'nota_segundo_semestre' in campos):
+        obj.media_final = calcular_media(obj.nota_primeiro_semestre, obj.nota_segundo_semestre)
+    invalidar(type(obj), [obj.id])
+    _gravar()
+    if tipo == 'aluno':
+        alteracoes.append((antes, estado(obj)))
+
+
+def _deletar(tipo, obj, alteracoes):
+    if tipo == 'aluno':
+        alteracoes.append((estado(obj), None))
+    else:
+        # Os dependentes seguem a política de remoção, e os resumos das turmas
+        # removidas somem (depois das alterações pendentes, que poderiam recriá-los)
+        registrar_alteracoes(alteracoes)
+        alteracoes.clear()
+        if tipo == 'turma' and remover_dependentes_turmas([obj.id]):
+            raise ErroValidacao('Turma possui alunos e não pode ser deletada', 409)
+        if tipo == 'professor' and remover_dependentes_professores([obj.id]):
+            raise ErroValidacao('Professor possui turmas e não pode ser deletado', 409)
+    invalidar(type(obj), [obj.id])
+    db.session.delete(obj)
+    _gravar()
+
+
+def executar_operacao(operacao, referencias, alteracoes):
+    """Executa uma operação do lote na transação atual e devolve o seu resultado.
+
+    ``referencias`` mapeia o ``ref`` de cada registro criado para
+    ``(tipo, id)``; é atualizado a cada criação com referência. As
+    alterações de alunos são acumuladas em ``alteracoes``, para o resumo
+    das turmas ser atualizado uma vez por turma no fim do lote. Lança
+    ErroValidacao (com o status HTTP) se a operação não puder ser feita.
+    """
+    if not isinstance(operacao, dict):
+        raise ErroValidacao('Operação inválida')
+    acao, tipo = operacao.get('acao'), operacao.get('tipo')
+    if acao not in ACOES:
+        raise ErroValidacao(f"Campo acao inválido, use {', '.join(ACOES)}")
+    if tipo not in TIPOS:
+        raise ErroValidacao(f"Campo tipo inválido, use {', '.join(TIPOS)}")
+    modelo, preparar, nao_encontrado = TIPOS[tipo]
+
+    if acao == 'criar':
+        ref = operacao.get('ref')
+        if ref is not None and (not isinstance(ref, str) or not ref or ref in referencias):
+            raise ErroValidacao('Campo ref inválido ou repetido no lote')
+        dados = _ler_dados(tipo, operacao.get('dados'), referencias)
+        campos = preparar(dados)
+        _verificar_chaves(tipo, dados)
+        obj = _criar(tipo, campos, alteracoes)
+        if ref is not None:
+            referencias[ref] = (tipo, obj.id)
+        return {'status': 201, 'id': obj.id}
+
+    id = _resolver(operacao.get('id'), tipo, referencias)
+    if not e_inteiro(id):
+        raise ErroValidacao('Dados inválidos: id obrigatório')
+    obj = db.session.get(modelo, id)
+    if obj is None:
+        raise ErroValidacao(nao_encontrado, 404)
+    # Concorrência otimista: o ETag lido pelo cliente, como no header If-Match
+    if operacao.get('if_match') is not None:
+        if not isinstance(operacao['if_match'], str) or not etag_confere(obj, operacao['if_match']):
+            raise ErroValidacao('O registro foi alterado (if_match não corresponde ao ETag atual)', 412)
+
+    if acao == 'atualizar':
+        campos = preparar(_ler_dados(tipo, operacao.get('dados'), referencias), parcial=True)
+        _verificar_chaves(tipo, campos)
+        _atualizar(tipo, obj, campos, alteracoes)
+    else:
+        _deletar(tipo, obj, alteracoes)
+    return {'status': 200, 'id': id}
+
+
+##### POST batch #####
+@appLote.route('/batch', methods=['POST'])
+def post_batch():
+    """Endpoint para executar operações em professores, turmas e alunos em uma única transação
+    ---
+    tags:
+      - Lote
+    description: >
+      As operações são executadas em ordem e gravadas com um único commit;
+      se alguma falhar, nenhuma é gravada. Um registro criado com ref pode
+      ser usado pelas operações seguintes como "$ref" em id, professor_id
+      e turma_id.
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            operacoes:
+              type: array
+              items:
+                type: object
+                properties:
+                  acao:
+                    type: string
+                    enum: [criar, atualizar, deletar]
+                  tipo:
+                    type: string
+                    enum: [professor, turma, aluno]
+                  ref:
+                    type: string
+                    description: Nome do registro criado, para as operações seguintes
+                    example: t1
+                  id:
+                    description: ID do registro (atualizar e deletar), ou "$ref"
+                    example: 1
+                  if_match:
+                    type: string
+                    description: ETag do registro; a operação falha com 412 se ele foi alterado
+                  dados:
+                    type: object
+                    description: Campos do registro, como no POST e no PUT do tipo
+          example:
+            operacoes:
+              - acao: criar
+                tipo: turma
+                ref: t1
+                dados:
+                  descricao: 9º Ano A
+                  ativo: true
+                  professor_id: 1
+              - acao: criar
+                tipo: aluno
+                dados:
+                  nome: Gabriel Silva
+                  idade: 15
+                  data_nascimento: '2010-05-20'
+                  turma_id: $t1
+              - acao: atualizar
+                tipo: aluno
+                id: 2
+                dados:
+                  turma_id: $t1
+    responses:
+      200:
+        description: Todas as operações gravadas, com o status e o id de cada uma
+      400:
+        description: Lote inválido, ou operação com dados inválidos (nada foi gravado)
+      404:
+        description: Operação com registro inexistente (nada foi gravado)
+      409:
+        description: Registro alterado por outra requisição, ou remoção impedida pela política (nada foi gravado)
+      412:
+        description: if_match de uma operação não corresponde ao ETag atual (nada foi gravado)
+      500:
+        description: Erro de servidor
+    """
+    data = request.get_json(silent=True)
+    operacoes = data.get('operacoes') if isinstance(data, dict) else data
+    if not isinstance(operacoes, list) or not operacoes:
+        return jsonify({'message': 'Lote inválido: envie uma lista não vazia em operacoes'}), 400
+    if len(operacoes) > OPERACOES_MAXIMAS:
+        return jsonify({'message': f'Lote inválido: máximo de {OPERACOES_MAXIMAS} operações'}), 400
+
+    referencias = {}
+    alteracoes = []
+    resultados = []
+    try:
+        for indice, operacao in enumerate(operacoes):
+            try:
+                resultados.append({'indice': indice, **executar_operacao(operacao, referencias, alteracoes)})
+            except ErroValidacao as e:
+                # Desfaz as anteriores: as demais não são executadas (424, como no WebDAV)
+                db.session.rollback()
+                resultados = [
+                    {'indice': i, 'status': 424, 'message': 'Não gravada: outra operação do lote falhou'}
+                    for i in range(len(operacoes))
+                ]
+                resultados[indice] = {'indice': indice, 'status': e.status, 'message': e.message}
+                corpo = {'message': f'Operação {indice} falhou, nenhuma operação foi gravada', 'indice': indice, 'resultados': resultados}
+                return jsonify(corpo), e.status
+        registrar_alteracoes(alteracoes)
+        db.session.commit()
+        return jsonify({'sucesso': len(resultados), 'resultados': resultados}), 200
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': 'Registros alterados por outra requisição, tente novamente'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
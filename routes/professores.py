@@ -1,10 +1,55 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm.exc import StaleDataError
 
 from models.professor import Professor
 from database import db
+from utils.cache import existe, invalidar, ler_registro
+from utils.busca import buscar
+from utils.cache_http import com_validadores, falha_pre_condicao, nao_modificado, validadores_colecao, validadores_registro
+from utils.listagem import ParametroInvalido, filtrar, filtros_informados, ler_inclusoes, listar
+from utils.lote import ids_existentes, inserir_em_lote, ler_ids, ler_lote, resposta_lote, versoes_existentes
+from utils.remocao import remover_dependentes_professores, remover_professores
+from utils.validacao import ErroValidacao, e_inteiro
 
 appProfessor = Blueprint('appProfessor', __name__)
 
+# Filtros e ordenação aceitos na listagem (todos com índice no modelo)
+FILTROS_IGUALDADE = ('materia',)
+FILTROS_INTERVALO = ('idade',)
+CAMPOS_ORDENAVEIS = ('id', 'nome', 'idade', 'materia')
+# Relacionamentos aceitos em ?incluir=
+INCLUSOES = ('turmas',)
+
+CAMPOS_OBRIGATORIOS = ('nome', 'idade', 'materia', 'observacoes')
+
+
+def preparar_professor(data, parcial=False):
+    """Valida os dados de um professor e retorna os valores das colunas.
+
+    Com ``parcial=True`` (atualização) apenas os campos enviados são
+    retornados. Lança ErroValidacao se algum campo for inválido.
+    """
+    if not isinstance(data, dict) or not data:
+      raise ErroValidacao('Dados inválidos!')
+    if not parcial and any(campo not in data for campo in CAMPOS_OBRIGATORIOS):
+      raise ErroValidacao('Dados inválidos!')
+
+    campos = {}
+    for campo in ('nome', 'materia'):
+      if campo in data:
+        if not isinstance(data[campo], str) or not data[campo]:
+          raise ErroValidacao(f'Campo {campo} inválido!')
+        campos[campo] = data[campo]
+    if 'idade' in data:
+      if not e_inteiro(data['idade']):
+        raise ErroValidacao('Idade inválida!')
+      campos['idade'] = data['idade']
+    if 'observacoes' in data:
+      if data['observacoes'] is not None and not isinstance(data['observacoes'], str):
+        raise ErroValidacao('Observações inválidas!')
+      campos['observacoes'] = data['observacoes']
+    return campos
+
 ##### GET all #####
 @appProfessor.route('/professores', methods=['GET'])
 def get_professores():
@@ -12,15 +57,126 @@ def get_professores():
     ---
     tags:
       - Professores
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (máximo 1000). Sem limit a lista é enviada em streaming
+      - name: after
+        in: query
+        type: integer
+        required: false
+        description: Cursor; retorna apenas registros com id maior que este
+      - name: formato
+        in: query
+        type: string
+        enum: [json, ndjson]
+        required: false
+        description: Formato da resposta (array JSON ou um objeto por linha)
+      - name: incluir
+        in: query
+        type: string
+        required: false
+        description: Dados relacionados separados por vírgula (turmas); também aceito como include
+      - name: materia
+        in: query
+        type: string
+        required: false
+        description: Matéria lecionada
+      - name: idade_min
+        in: query
+        type: integer
+        required: false
+        description: Idade mínima
+      - name: idade_max
+        in: query
+        type: integer
+        required: false
+        description: Idade máxima
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: Campo de ordenação (id, nome, idade, materia); prefixo - para decrescente
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebido antes; responde 304 se a lista não mudou
     responses:
       200:
         description: Lista de professores
+      304:
+        description: Não modificado
+      400:
+        description: Parâmetro inválido
+      500:
+        description: Erro de servidor
+    """
+    try:
+      incluir, opcoes = ler_inclusoes(Professor, INCLUSOES)
+      # Validação pela versão das tabelas, antes de ler e serializar os professores
+      etag, ultima_modificacao = validadores_colecao(Professor, incluir)
+      resposta = nao_modificado(etag, ultima_modificacao)
+      if resposta is not None:
+        return resposta
+      query = filtrar(Professor.query.options(*opcoes), Professor, igualdade=FILTROS_IGUALDADE, intervalo=FILTROS_INTERVALO)
+      resposta = listar(query, Professor, incluir, CAMPOS_ORDENAVEIS)
+      return com_validadores(resposta, etag, ultima_modificacao), 200
+    except ParametroInvalido as e:
+      return jsonify({'message': str(e)}), 400
+    except Exception as e:
+      db.session.rollback()
+      return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### GET busca #####
+@appProfessor.route('/professores/busca', methods=['GET'])
+def busca_professores():
+    """Endpoint para buscar professores pelo nome, matéria e observações (parcial, sem diferenciar acentos e maiúsculas)
+    ---
+    tags:
+      - Professores
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Palavras ou começo de palavras do nome, da matéria ou das observações
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (padrão 20, máximo 100)
+      - name: offset
+        in: query
+        type: integer
+        required: false
+        description: Resultados a pular (máximo 1000); o próximo vem no header X-Proximo-Offset
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebido antes; responde 304 se os professores não mudaram
+    responses:
+      200:
+        description: Professores encontrados, mais relevantes primeiro
+      304:
+        description: Não modificado
+      400:
+        description: Parâmetro inválido
       500:
         description: Erro de servidor
     """
     try:
-      professores = Professor.query.all()
-      return jsonify([professor.serialize() for professor in professores]), 200
+      # Mesmos validadores da listagem: mudam a cada alteração em professores
+      etag, ultima_modificacao = validadores_colecao(Professor)
+      resposta = nao_modificado(etag, ultima_modificacao)
+      if resposta is not None:
+        return resposta
+      return com_validadores(buscar(Professor), etag, ultima_modificacao), 200
+    except ParametroInvalido as e:
+      return jsonify({'message': str(e)}), 400
     except Exception as e:
       db.session.rollback()
       return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
@@ -38,21 +194,40 @@ def get_professor(id):
         type: integer
         required: true
         description: ID do professor
-    repsonses:
+      - name: incluir
+        in: query
+        type: string
+        required: false
+        description: Dados relacionados separados por vírgula (turmas); também aceito como include
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebido antes; responde 304 se o professor não mudou
+    responses:
       200:
         description: Professor encontrado
+      304:
+        description: Não modificado
       404:
         description: Professor não encontrado
       500:
         description: Erro de servidor
     """
     try:
+      incluir, opcoes = ler_inclusoes(Professor, INCLUSOES)
       # Verificar professor
-      professor = Professor.query.get(id)
-      if not professor:
+      registro = ler_registro(Professor, id, incluir, opcoes)
+      if not registro:
         return jsonify({'message': 'Professor não encontrado!'}), 404
-    
-      return jsonify(professor.serialize()), 200
+
+      serializar, etag, ultima_modificacao = registro
+      resposta = nao_modificado(etag, ultima_modificacao)
+      if resposta is not None:
+        return resposta
+      return com_validadores(jsonify(serializar()), etag, ultima_modificacao), 200
+    except ParametroInvalido as e:
+      return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
@@ -91,19 +266,16 @@ def post_professor():
       500:
         description: Erro de servidor
     """
-    data = request.get_json()
+    data = request.get_json(silent=True)
     # Verifica se os dados foram enviados corretamente
-    if not data or 'nome' not in data or 'idade' not in data or 'materia' not in data or 'observacoes' not in data:
-        return jsonify({'message': 'Dados inválidos!'}), 400
+    try:
+        campos = preparar_professor(data)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
         
     try:
         # Cria um novo professor
-        novo_professor = Professor(
-            nome=data['nome'],
-            idade=data['idade'],
-            materia=data['materia'],
-            observacoes=data['observacoes']
-        )
+        novo_professor = Professor(**campos)
 
         # Adiciona o professor ao banco de dados
         db.session.add(novo_professor)
@@ -144,6 +316,11 @@ def put_professor(id):
             observacoes:
               type: string
               example: "Professor atualizado com novas especialidades"
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: ETag do professor (GET sem incluir); responde 412 se ele foi alterado desde então
     responses:
       200:
         description: Professor atualizado
@@ -151,32 +328,42 @@ def put_professor(id):
         description: Erro ao criar professor
       404:
         description: Professor não encontrado
+      409:
+        description: Registro alterado por outra requisição durante a operação
+      412:
+        description: If-Match não corresponde ao ETag atual
       500:
         description: Erro de servidor
     """
-    data = request.get_json()
+    data = request.get_json(silent=True)
 
     # Verificar dados enviados
-    if not data:
-      return jsonify({'message': 'Dados inválidos!'}), 400
+    try:
+      campos = preparar_professor(data, parcial=True)
+    except ErroValidacao as e:
+      return jsonify({'message': e.message}), e.status
     # Verificar professor
-    if not db.session.query(Professor.id).filter_by(id=id).scalar():
+    if not existe(Professor, id):
       return jsonify({'message': 'Professor não encontrado!'}), 404
     
     professor = Professor.query.get(id)
 
-    if 'nome' in data:
-      professor.nome = data['nome']
-    if 'idade' in data:
-      professor.idade = data['idade']
-    if 'materia' in data:
-      professor.materia = data['materia']
-    if 'observacoes' in data:
-      professor.observacoes = data['observacoes']
+    # Concorrência otimista: If-Match com o ETag lido pelo cliente
+    falha = falha_pre_condicao(professor)
+    if falha:
+      return falha
+
+    for campo, valor in campos.items():
+      setattr(professor, campo, valor)
     try:
       # Atualiza professor no banco de dados
+      invalidar(Professor, [id])
       db.session.commit()
-      return jsonify({'message': 'Professor atualizado com sucesso!'}), 200
+      resposta = jsonify({'message': 'Professor atualizado com sucesso!'})
+      return com_validadores(resposta, *validadores_registro(professor)), 200
+    except StaleDataError:
+      db.session.rollback()
+      return jsonify({'message': 'Professor alterado por outra requisição, tente novamente'}), 409
     except Exception as e:
       db.session.rollback()
       return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
@@ -194,24 +381,301 @@ def delete_professor(id):
         type: integer
         required: true
         description: ID do professor
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: ETag do professor (GET sem incluir); responde 412 se ele foi alterado desde então
     responses:
       200:
-        description: Professor deletado
+        description: Professor deletado (as turmas ficam sem professor ou são deletadas, conforme POLITICA_REMOCAO_PROFESSOR)
       404:
         description: Professor não encontrado
+      409:
+        description: Professor com turmas que a política impede de remover, ou registro alterado por outra requisição
+      412:
+        description: If-Match não corresponde ao ETag atual
       500:
         description: Erro de servidor
     """
-    # Verificar professor
-    if not db.session.query(Professor.id).filter_by(id=id).scalar():
+    # Verificar professor (uma consulta: o objeto é necessário para o ETag e o delete)
+    professor = db.session.get(Professor, id)
+    if not professor:
       return jsonify({'message': 'Professor não encontrado!'}), 404
-    
-    professor = Professor.query.get(id)
+
+    falha = falha_pre_condicao(professor)
+    if falha:
+      return falha
 
     try:
+      # As turmas seguem POLITICA_REMOCAO_PROFESSOR em um statement (sem carregá-las)
+      if remover_dependentes_professores([id]):
+        db.session.rollback()
+        return jsonify({'message': 'Professor possui turmas e não pode ser deletado!'}), 409
+      invalidar(Professor, [id])
       db.session.delete(professor)
       db.session.commit()
       return jsonify({'message': 'Professor Deletado com sucesso!'}), 200
+    except StaleDataError:
+      db.session.rollback()
+      return jsonify({'message': 'Professor alterado por outra requisição, tente novamente'}), 409
+    except Exception as e:
+      db.session.rollback()
+      return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### POST bulk #####
+@appProfessor.route('/professores/bulk', methods=['POST'])
+def post_professores_bulk():
+    """Endpoint para cadastrar professores em lote
+    ---
+    tags:
+      - Professores
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              nome:
+                type: string
+                example: "João Silva"
+              idade:
+                type: integer
+                example: 40
+              materia:
+                type: string
+                example: "Análise de Sistemas"
+              observacoes:
+                type: string
+                example: "Professor especialista em banco de dados"
+    responses:
+      201:
+        description: Todos os professores criados
+      207:
+        description: Resultado por item (algum professor não foi criado)
+      400:
+        description: Lote inválido
+      500:
+        description: Erro de servidor
+    """
+    try:
+      itens = ler_lote()
+    except ErroValidacao as e:
+      return jsonify({'message': e.message}), e.status
+
+    resultados = [None] * len(itens)
+    linhas = []
+    indices = []
+    for indice, data in enumerate(itens):
+      try:
+        linhas.append(preparar_professor(data))
+        indices.append(indice)
+      except ErroValidacao as e:
+        resultados[indice] = {'indice': indice, 'status': e.status, 'message': e.message}
+
+    try:
+      for indice, novo_id in zip(indices, inserir_em_lote(Professor, linhas)):
+        resultados[indice] = {'indice': indice, 'status': 201, 'id': novo_id}
+      db.session.commit()
+      return resposta_lote(resultados, 201)
+    except Exception as e:
+      db.session.rollback()
+      return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### PUT bulk #####
+@appProfessor.route('/professores/bulk', methods=['PUT'])
+def put_professores_bulk():
+    """Endpoint para atualizar professores em lote
+    ---
+    tags:
+      - Professores
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+                example: 1
+              nome:
+                type: string
+                example: "João Silva"
+              idade:
+                type: integer
+                example: 45
+              materia:
+                type: string
+                example: "Banco de Dados"
+              observacoes:
+                type: string
+                example: "Professor atualizado com novas especialidades"
+    responses:
+      200:
+        description: Todos os professores atualizados
+      207:
+        description: Resultado por item (algum professor não foi atualizado)
+      400:
+        description: Lote inválido
+      409:
+        description: Algum registro foi alterado por outra requisição durante a operação
+      500:
+        description: Erro de servidor
+    """
+    try:
+      itens = ler_lote()
+    except ErroValidacao as e:
+      return jsonify({'message': e.message}), e.status
+
+    resultados = [None] * len(itens)
+    validos = []
+    vistos = set()
+    for indice, data in enumerate(itens):
+      try:
+        if not isinstance(data, dict) or not e_inteiro(data.get('id')):
+          raise ErroValidacao('Dados inválidos! id obrigatório')
+        if data['id'] in vistos:
+          raise ErroValidacao('Professor repetido no lote!')
+        campos = preparar_professor({k: v for k, v in data.items() if k != 'id'}, parcial=True)
+      except ErroValidacao as e:
+        resultados[indice] = {'indice': indice, 'status': e.status, 'message': e.message}
+        continue
+      vistos.add(data['id'])
+      validos.append((indice, data['id'], campos))
+
+    try:
+      professores = versoes_existentes(Professor, vistos)
+
+      mapeamentos = []
+      for indice, id, campos in validos:
+        if id not in professores:
+          resultados[indice] = {'indice': indice, 'status': 404, 'message': 'Professor não encontrado!'}
+          continue
+        if campos:
+          mapeamentos.append({'id': id, 'versao': professores[id], **campos})
+        resultados[indice] = {'indice': indice, 'status': 200, 'id': id}
+
+      # UPDATE em lote pela chave primária (executemany)
+      if mapeamentos:
+        db.session.execute(db.update(Professor), mapeamentos)
+        invalidar(Professor, [mapeamento['id'] for mapeamento in mapeamentos])
+      db.session.commit()
+      return resposta_lote(resultados, 200)
+    except StaleDataError:
+      db.session.rollback()
+      return jsonify({'message': 'Professores alterados por outra requisição, tente novamente'}), 409
+    except Exception as e:
+      db.session.rollback()
+      return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### DELETE bulk #####
+@appProfessor.route('/professores/bulk', methods=['DELETE'])
+def delete_professores_bulk():
+    """Endpoint para deletar professores em lote
+    ---
+    tags:
+      - Professores
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 3]
+    responses:
+      200:
+        description: Todos os professores deletados
+      207:
+        description: Resultado por item (algum professor não foi encontrado, ou a política impediu a remoção)
+      400:
+        description: Lote inválido
+      500:
+        description: Erro de servidor
+    """
+    try:
+      ids = ler_ids()
+    except ErroValidacao as e:
+      return jsonify({'message': e.message}), e.status
+
+    try:
+      existentes = ids_existentes(Professor.id, ids)
+      # As turmas dos professores seguem a política, como no DELETE individual
+      restritos = remover_professores(existentes)
+      db.session.commit()
+
+      resultados = []
+      for id in ids:
+        if id not in existentes:
+          resultados.append({'id': id, 'status': 404, 'message': 'Professor não encontrado!'})
+        elif id in restritos:
+          resultados.append({'id': id, 'status': 409, 'message': 'Professor possui turmas e não pode ser deletado!'})
+        else:
+          resultados.append({'id': id, 'status': 200})
+      return resposta_lote(resultados, 200)
+    except Exception as e:
+      db.session.rollback()
+      return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### DELETE por filtro #####
+@appProfessor.route('/professores', methods=['DELETE'])
+def delete_professores_filtro():
+    """Endpoint para deletar os professores que atendem aos filtros
+    ---
+    tags:
+      - Professores
+    description: >
+      Os mesmos filtros da listagem, sendo obrigatório pelo menos um. As
+      turmas dos professores seguem POLITICA_REMOCAO_PROFESSOR, com poucos
+      statements por bloco de professores, sem carregar as turmas.
+    parameters:
+      - name: materia
+        in: query
+        type: string
+        required: false
+        description: Matéria lecionada
+      - name: idade_min
+        in: query
+        type: integer
+        required: false
+        description: Idade mínima
+      - name: idade_max
+        in: query
+        type: integer
+        required: false
+        description: Idade máxima
+    responses:
+      200:
+        description: Professores deletados, com a quantidade
+      207:
+        description: Alguns professores não foram deletados (a política impediu a remoção)
+      400:
+        description: Nenhum filtro informado, ou filtro inválido
+      500:
+        description: Erro de servidor
+    """
+    if not filtros_informados(FILTROS_IGUALDADE, FILTROS_INTERVALO):
+      return jsonify({'message': 'Informe pelo menos um filtro: materia, idade_min ou idade_max'}), 400
+
+    try:
+      consulta = filtrar(db.select(Professor.id), Professor, igualdade=FILTROS_IGUALDADE, intervalo=FILTROS_INTERVALO)
+      ids = db.session.scalars(consulta).all()
+      restritos = remover_professores(ids)
+      db.session.commit()
+      corpo = {'removidos': len(ids) - len(restritos), 'restritos': sorted(restritos)}
+      return jsonify(corpo), 207 if restritos else 200
+    except ParametroInvalido as e:
+      return jsonify({'message': str(e)}), 400
     except Exception as e:
       db.session.rollback()
       return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
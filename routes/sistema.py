@@ -0,0 +1,80 @@
+from flask import Blueprint, Response, current_app, jsonify
+
+from utils.cache import obter_cache
+from utils.metricas import TIPO_CONTEUDO, exportar
+
+appSistema = Blueprint('appSistema', __name__)
+
+##### GET estatísticas do cache #####
+@appSistema.route('/sistema/cache', methods=['GET'])
+def get_cache():
+    """Endpoint para consultar os contadores do cache de leitura (para dimensioná-lo)
+    ---
+    tags:
+      - Sistema
+    responses:
+      200:
+        description: Acertos, falhas, taxa de acerto, entradas, limite, TTL, expirados, descartados e recusados (leituras não guardadas por uma invalidação concorrente)
+    """
+    return jsonify(obter_cache().estatisticas()), 200
+
+##### GET réplicas #####
+@appSistema.route('/sistema/replicas', methods=['GET'])
+def get_replicas():
+    """Endpoint para consultar as réplicas de leitura e se estão saudáveis
+    ---
+    tags:
+      - Sistema
+    responses:
+      200:
+        description: URL (sem senha) e estado de cada réplica; lista vazia sem réplicas configuradas
+    """
+    replicas = current_app.extensions.get('replicas')
+    return jsonify(replicas.estado() if replicas else []), 200
+
+##### GET instrumentação #####
+@appSistema.route('/sistema/instrumentacao', methods=['GET'])
+def get_instrumentacao():
+    """Endpoint para consultar tempo, statements SQL, tempo de banco e linhas por endpoint
+    ---
+    tags:
+      - Sistema
+    responses:
+      200:
+        description: Totais por endpoint, do mais para o menos custoso; lista vazia com a instrumentação desligada
+    """
+    estatisticas = current_app.extensions.get('instrumentacao')
+    return jsonify(estatisticas.resumo() if estatisticas else []), 200
+
+##### GET fila de notas #####
+@appSistema.route('/sistema/fila-notas', methods=['GET'])
+def get_fila_notas():
+    """Endpoint para consultar a fila de notas (pendentes, atraso e lotes gravados)
+    ---
+    tags:
+      - Sistema
+    responses:
+      200:
+        description: Alunos pendentes, segundos desde o envio mais antigo não gravado, contadores e último lote
+    """
+    fila = current_app.extensions.get('fila_notas')
+    return jsonify(fila.estado() if fila else {'habilitada': False}), 200
+
+##### GET métricas #####
+@appSistema.route('/metrics', methods=['GET'])
+def get_metricas():
+    """Endpoint com as métricas no formato de texto do Prometheus
+    ---
+    tags:
+      - Sistema
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Requisições, latência e erros por rota, pool de conexões, cache e memória do processo
+      404:
+        description: Métricas desligadas (METRICAS_HABILITADAS=false)
+    """
+    if 'metricas' not in current_app.extensions:
+        return jsonify({'message': 'Métricas desligadas'}), 404
+    return Response(exportar(current_app), content_type=TIPO_CONTEUDO), 200
@@ -1,11 +1,63 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm.exc import StaleDataError
 
 from models.professor import Professor
 from models.turma import Turma
 from database import db
+from utils.cache import existe, invalidar, ler_registro
+from utils.cache_http import com_validadores, falha_pre_condicao, nao_modificado, validadores_colecao, validadores_registro
+from utils.listagem import ParametroInvalido, filtrar, filtros_informados, ler_inclusoes, listar
+from utils.lote import ids_existentes, inserir_em_lote, ler_ids, ler_lote, resposta_lote, versoes_existentes
+from utils.remocao import remover_dependentes_turmas, remover_turmas
+from utils.validacao import ErroValidacao, e_inteiro
 
 appTurma = Blueprint('appTurma', __name__)
 
+# Filtros e ordenação aceitos na listagem
+FILTROS_IGUALDADE = ('professor_id', 'ativo')
+CAMPOS_ORDENAVEIS = ('id', 'descricao')
+# Relacionamentos aceitos em ?incluir=
+INCLUSOES = ('professor', 'alunos')
+
+
+def preparar_turma(data, parcial=False):
+    """Valida os dados de uma turma e retorna os valores das colunas.
+
+    Com ``parcial=True`` (atualização) apenas os campos enviados são
+    retornados. A existência do professor não é verificada aqui.
+    Lança ErroValidacao se algum campo for inválido.
+    """
+    if not isinstance(data, dict) or not data:
+        raise ErroValidacao('Dados invalidos!')
+    if not parcial and ('descricao' not in data or 'ativo' not in data):
+        raise ErroValidacao('Dados invalidos!')
+
+    campos = {}
+    if 'descricao' in data:
+        if not isinstance(data['descricao'], str) or not data['descricao']:
+            raise ErroValidacao('Descrição inválida!')
+        campos['descricao'] = data['descricao']
+    if 'ativo' in data:
+        if not isinstance(data['ativo'], bool):
+            raise ErroValidacao('Campo ativo deve ser booleano!')
+        campos['ativo'] = data['ativo']
+    if 'professor_id' in data:
+        if data['professor_id'] is not None and not e_inteiro(data['professor_id']):
+            raise ErroValidacao('Professor inválido!')
+        campos['professor_id'] = data['professor_id']
+    elif not parcial:
+        campos['professor_id'] = None
+    return campos
+
+
+def verificar_professor(data, consultar=existe):
+    """Lança ErroValidacao (404) se ``professor_id`` foi enviado e o professor não existe.
+
+    Um ``professor_id`` nulo também é recusado, como em verificar_turma.
+    """
+    if 'professor_id' in data and not consultar(Professor, data['professor_id']):
+        raise ErroValidacao('Professor não encontrado!', 404)
+
 ##### GET all #####
 @appTurma.route('/turmas', methods=['GET'])
 def get_turmas():
@@ -13,15 +65,70 @@ def get_turmas():
     ---
     tags:
       - Turmas
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Tamanho da página (máximo 1000). Sem limit a lista é enviada em streaming
+      - name: after
+        in: query
+        type: integer
+        required: false
+        description: Cursor; retorna apenas registros com id maior que este
+      - name: formato
+        in: query
+        type: string
+        enum: [json, ndjson]
+        required: false
+        description: Formato da resposta (array JSON ou um objeto por linha)
+      - name: incluir
+        in: query
+        type: string
+        required: false
+        description: Dados relacionados separados por vírgula (professor, alunos); também aceito como include
+      - name: professor_id
+        in: query
+        type: string
+        required: false
+        description: ID do professor (use null para turmas sem professor)
+      - name: ativo
+        in: query
+        type: boolean
+        required: false
+        description: Filtra turmas ativas/inativas
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: Campo de ordenação (id, descricao); prefixo - para decrescente
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebido antes; responde 304 se a lista não mudou
     responses:
       200:
         description: Lista de turmas
+      304:
+        description: Não modificado
+      400:
+        description: Parâmetro inválido
       500:
         description: Erro de servidor
     """
     try:
-        turmas = Turma.query.all()
-        return jsonify([turma.serialize() for turma in turmas]), 200
+        incluir, opcoes = ler_inclusoes(Turma, INCLUSOES)
+        # Validação pela versão das tabelas, antes de ler e serializar as turmas
+        etag, ultima_modificacao = validadores_colecao(Turma, incluir)
+        resposta = nao_modificado(etag, ultima_modificacao)
+        if resposta is not None:
+            return resposta
+        query = filtrar(Turma.query.options(*opcoes), Turma, igualdade=FILTROS_IGUALDADE)
+        resposta = listar(query, Turma, incluir, CAMPOS_ORDENAVEIS)
+        return com_validadores(resposta, etag, ultima_modificacao), 200
+    except ParametroInvalido as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
@@ -38,20 +145,43 @@ def get_turma(id):
         in: path
         type: integer
         required: true
+      - name: incluir
+        in: query
+        type: string
+        required: false
+        description: Dados relacionados separados por vírgula (professor, alunos); também aceito como include
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
+        description: ETag recebido antes; responde 304 se a turma não mudou
     responses:
       200:
         description: Turma encontrada
+      304:
+        description: Não modificado
+      400:
+        description: Parâmetro inválido
       404:
         description: Turma não encontrada
       500:
         description: Erro de servidor
     """
+    try:
+        incluir, opcoes = ler_inclusoes(Turma, INCLUSOES)
+    except ParametroInvalido as e:
+        return jsonify({'message': str(e)}), 400
+
     # Verificar Turma
-    turma = Turma.query.get(id)
-    if not turma:
+    registro = ler_registro(Turma, id, incluir, opcoes)
+    if not registro:
         return jsonify({'message': 'Turma não encontrada!'}), 404
     try:
-        return jsonify(turma.serialize()), 200
+        serializar, etag, ultima_modificacao = registro
+        resposta = nao_modificado(etag, ultima_modificacao)
+        if resposta is not None:
+            return resposta
+        return com_validadores(jsonify(serializar()), etag, ultima_modificacao), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
@@ -86,23 +216,22 @@ def post_turmas():
       500:
         description: Erro de servidor
     """
-    data = request.get_json()
+    data = request.get_json(silent=True)
     # Verifica se os dados foram enviados corretamente
-    if not data or 'descricao' not in data or 'ativo' not in data:
-        return jsonify({'message': 'Dados invalidos!'}), 400
+    try:
+        campos = preparar_turma(data)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
     
     # Verifica se o professor existe
-    if 'professor_id' in data:
-        if not db.session.query(Professor.id).filter_by(id=data['professor_id']).scalar():
-            return jsonify({'message': 'Professor não encontrado!'}), 404
+    try:
+        verificar_professor(data)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
     
     try:
         # Cria uma nova Turma
-        nova_turma = Turma(
-            descricao=data['descricao'],
-            ativo=data['ativo'],
-            professor_id=data.get('professor_id')
-        )
+        nova_turma = Turma(**campos)
     
         # Adiciona a Turma no banco de Dados
         db.session.add(nova_turma)
@@ -137,41 +266,60 @@ def put_turma(id):
               type: boolean
             professor_id:
               type: integer
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: ETag da turma (GET sem incluir); responde 412 se ela foi alterado desde então
     responses:
       200:
         description: Turma atualizada
       400:
         description: Erro ao atualizar turma
       404:
-        description: Turma não encontrada
-        description: Professor não encontrado
+        description: Turma ou professor não encontrado
+      409:
+        description: Registro alterado por outra requisição durante a operação
+      412:
+        description: If-Match não corresponde ao ETag atual
       500:
         description: Erro de servidor
     """
-    data = request.get_json()
+    data = request.get_json(silent=True)
     
     # Verifica se os dados foram enviados corretamente
-    if not data:
-        return jsonify({'message': 'Dados invalidos!'}), 400
+    try:
+        campos = preparar_turma(data, parcial=True)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
     
     # Verifica se a turma existe
     turma = Turma.query.get(id)
     if not turma:
         return jsonify({'message': 'Turma não encontrada!'}), 404
+
+    # Concorrência otimista: If-Match com o ETag lido pelo cliente
+    falha = falha_pre_condicao(turma)
+    if falha:
+        return falha
     
-    if 'professor_id' in data:
-        if not db.session.query(Professor.id).filter_by(id=data['professor_id']).scalar():
-            return jsonify({'message': 'Professor não encontrado!'}), 404
-        turma.professor_id = data['professor_id']
-    if 'descricao' in data:
-        turma.descricao = data['descricao']
-    if 'ativo' in data:
-        turma.ativo = data['ativo']
+    try:
+        verificar_professor(campos)
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
+
+    for campo, valor in campos.items():
+        setattr(turma, campo, valor)
     
     try:
         # Atualiza a Turma no Banco de Dados
+        invalidar(Turma, [id])
         db.session.commit()
-        return jsonify({'message': 'Turma atualizada com Sucesso!'}), 200
+        resposta = jsonify({'message': 'Turma atualizada com Sucesso!'})
+        return com_validadores(resposta, *validadores_registro(turma)), 200
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': 'Turma alterada por outra requisição, tente novamente'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
@@ -189,11 +337,20 @@ def delete_turma(id):
         type: integer
         required: true
         description: ID da turma
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: ETag da turma (GET sem incluir); responde 412 se ela foi alterado desde então
     responses:
       200:
-        description: Turma deletada
+        description: Turma deletada (os alunos ficam sem turma ou são deletados, conforme POLITICA_REMOCAO_TURMA)
       404:
         description: Turma não encontrada
+      409:
+        description: Turma com alunos e POLITICA_REMOCAO_TURMA=restringir, ou registro alterado por outra requisição
+      412:
+        description: If-Match não corresponde ao ETag atual
       500:
         description: Erro de servidor
     """
@@ -201,13 +358,277 @@ def delete_turma(id):
     turma = Turma.query.get(id)
     if not turma:
         return jsonify({'message': 'Turma não encontrada!'}), 404
+
+    falha = falha_pre_condicao(turma)
+    if falha:
+        return falha
     
     try:
-        # Deleta a Turma do banco de Dados
+        # Os alunos seguem POLITICA_REMOCAO_TURMA em um statement (sem carregá-los), e o resumo é removido
+        if remover_dependentes_turmas([id]):
+            db.session.rollback()
+            return jsonify({'message': 'Turma possui alunos e não pode ser deletada!'}), 409
+        # Deleta a Turma do banco de Dados (conferindo a versão)
+        invalidar(Turma, [id])
         db.session.delete(turma)
         db.session.commit()
         return jsonify({'message': 'Turma deletada com Sucesso!'}), 200
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': 'Turma alterada por outra requisição, tente novamente'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+
+##### POST bulk #####
+@appTurma.route('/turmas/bulk', methods=['POST'])
+def post_turmas_bulk():
+    """Endpoint para criar turmas em lote
+    ---
+    tags:
+      - Turmas
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              descricao:
+                type: string
+              ativo:
+                type: boolean
+              professor_id:
+                type: integer
+    responses:
+      201:
+        description: Todas as turmas criadas
+      207:
+        description: Resultado por item (alguma turma não foi criada)
+      400:
+        description: Lote inválido
+      500:
+        description: Erro de servidor
+    """
+    try:
+        itens = ler_lote()
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
+
+    resultados = [None] * len(itens)
+    validos = []
+    for indice, data in enumerate(itens):
+        try:
+            validos.append((indice, data, preparar_turma(data)))
+        except ErroValidacao as e:
+            resultados[indice] = {'indice': indice, 'status': e.status, 'message': e.message}
+
+    try:
+        # Verifica todos os professores referenciados de uma vez
+        professores = ids_existentes(Professor.id, [data['professor_id'] for _, data, _ in validos if 'professor_id' in data])
+
+        linhas = []
+        indices = []
+        for indice, data, campos in validos:
+            if 'professor_id' in data and data['professor_id'] not in professores:
+                resultados[indice] = {'indice': indice, 'status': 404, 'message': 'Professor não encontrado!'}
+                continue
+            linhas.append(campos)
+            indices.append(indice)
+
+        for indice, novo_id in zip(indices, inserir_em_lote(Turma, linhas)):
+            resultados[indice] = {'indice': indice, 'status': 201, 'id': novo_id}
+        db.session.commit()
+        return resposta_lote(resultados, 201)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### PUT bulk #####
+@appTurma.route('/turmas/bulk', methods=['PUT'])
+def put_turmas_bulk():
+    """Endpoint para atualizar turmas em lote
+    ---
+    tags:
+      - Turmas
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id:
+                type: integer
+              descricao:
+                type: string
+              ativo:
+                type: boolean
+              professor_id:
+                type: integer
+    responses:
+      200:
+        description: Todas as turmas atualizadas
+      207:
+        description: Resultado por item (alguma turma não foi atualizada)
+      400:
+        description: Lote inválido
+      409:
+        description: Algum registro foi alterado por outra requisição durante a operação
+      500:
+        description: Erro de servidor
+    """
+    try:
+        itens = ler_lote()
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
+
+    resultados = [None] * len(itens)
+    validos = []
+    vistos = set()
+    for indice, data in enumerate(itens):
+        try:
+            if not isinstance(data, dict) or not e_inteiro(data.get('id')):
+                raise ErroValidacao('Dados invalidos! id obrigatório')
+            if data['id'] in vistos:
+                raise ErroValidacao('Turma repetida no lote!')
+            campos = preparar_turma({k: v for k, v in data.items() if k != 'id'}, parcial=True)
+        except ErroValidacao as e:
+            resultados[indice] = {'indice': indice, 'status': e.status, 'message': e.message}
+            continue
+        vistos.add(data['id'])
+        validos.append((indice, data['id'], campos))
+
+    try:
+        turmas = versoes_existentes(Turma, vistos)
+        professores = ids_existentes(Professor.id, [campos['professor_id'] for _, _, campos in validos if 'professor_id' in campos])
+
+        mapeamentos = []
+        for indice, id, campos in validos:
+            if id not in turmas:
+                resultados[indice] = {'indice': indice, 'status': 404, 'message': 'Turma não encontrada!'}
+                continue
+            if 'professor_id' in campos and campos['professor_id'] not in professores:
+                resultados[indice] = {'indice': indice, 'status': 404, 'message': 'Professor não encontrado!'}
+                continue
+            if campos:
+                mapeamentos.append({'id': id, 'versao': turmas[id], **campos})
+            resultados[indice] = {'indice': indice, 'status': 200, 'id': id}
+
+        # UPDATE em lote pela chave primária (executemany)
+        if mapeamentos:
+            db.session.execute(db.update(Turma), mapeamentos)
+            invalidar(Turma, [mapeamento['id'] for mapeamento in mapeamentos])
+        db.session.commit()
+        return resposta_lote(resultados, 200)
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({'message': 'Turmas alteradas por outra requisição, tente novamente'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
 
+##### DELETE bulk #####
+@appTurma.route('/turmas/bulk', methods=['DELETE'])
+def delete_turmas_bulk():
+    """Endpoint para deletar turmas em lote
+    ---
+    tags:
+      - Turmas
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            ids:
+              type: array
+              items:
+                type: integer
+              example: [1, 2, 3]
+    responses:
+      200:
+        description: Todas as turmas deletadas
+      207:
+        description: Resultado por item (alguma turma não foi encontrada, ou tem alunos com POLITICA_REMOCAO_TURMA=restringir)
+      400:
+        description: Lote inválido
+      500:
+        description: Erro de servidor
+    """
+    try:
+        ids = ler_ids()
+    except ErroValidacao as e:
+        return jsonify({'message': e.message}), e.status
+
+    try:
+        existentes = ids_existentes(Turma.id, ids)
+        # Os alunos das turmas seguem a política, como no DELETE individual
+        restritas = remover_turmas(existentes)
+        db.session.commit()
+
+        resultados = []
+        for id in ids:
+            if id not in existentes:
+                resultados.append({'id': id, 'status': 404, 'message': 'Turma não encontrada!'})
+            elif id in restritas:
+                resultados.append({'id': id, 'status': 409, 'message': 'Turma possui alunos e não pode ser deletada!'})
+            else:
+                resultados.append({'id': id, 'status': 200})
+        return resposta_lote(resultados, 200)
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
+
+##### DELETE por filtro #####
+@appTurma.route('/turmas', methods=['DELETE'])
+def delete_turmas_filtro():
+    """Endpoint para deletar as turmas que atendem aos filtros
+    ---
+    tags:
+      - Turmas
+    description: >
+      Os mesmos filtros da listagem, sendo obrigatório pelo menos um. Os
+      alunos das turmas seguem POLITICA_REMOCAO_TURMA, com poucos statements
+      por bloco de turmas, sem carregar os alunos.
+    parameters:
+      - name: professor_id
+        in: query
+        type: string
+        required: false
+        description: ID do professor (use null para turmas sem professor)
+      - name: ativo
+        in: query
+        type: boolean
+        required: false
+        description: Filtra turmas ativas/inativas
+    responses:
+      200:
+        description: Turmas deletadas, com a quantidade
+      207:
+        description: Algumas turmas não foram deletadas (têm alunos e POLITICA_REMOCAO_TURMA=restringir)
+      400:
+        description: Nenhum filtro informado, ou filtro inválido
+      500:
+        description: Erro de servidor
+    """
+    if not filtros_informados(FILTROS_IGUALDADE):
+        return jsonify({'message': 'Informe pelo menos um filtro: ' + ', '.join(FILTROS_IGUALDADE)}), 400
+
+    try:
+        ids = db.session.scalars(filtrar(db.select(Turma.id), Turma, igualdade=FILTROS_IGUALDADE)).all()
+        restritas = remover_turmas(ids)
+        db.session.commit()
+        corpo = {'removidas': len(ids) - len(restritas), 'restritas': sorted(restritas)}
+        return jsonify(corpo), 207 if restritas else 200
+    except ParametroInvalido as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Erro de servidor', 'erro': str(e)}), 500
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import pytest
+
+# Os módulos da aplicação ficam na raiz do repositório, fora de um pacote
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from benchmarks.dados import corpos_alunos, popular  # noqa: E402
+
+
+@pytest.fixture
+def criar_app(tmp_path):
+    """Fábrica de aplicações, cada uma com um banco SQLite novo populado com ``alunos`` alunos."""
+    def criar(alunos, **configuracao):
+        pasta = tmp_path / f'banco_{len(list(tmp_path.iterdir()))}'
+        pasta.mkdir()
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{pasta}/escola.db',
+            'SWAGGER_HABILITADO': False,
+            **configuracao
+        })
+        popular(app, alunos)
+        return app
+    return criar
+
+
+@pytest.fixture
+def gerar_alunos():
+    """Corpos de ``POST /alunos`` em turmas de 1 a ``turmas`` (as 100 de ``criar(3000)``)."""
+    def gerar(quantidade, prefixo='Aluno', turmas=100):
+        return corpos_alunos(quantidade, turmas, prefixo)
+    return gerar
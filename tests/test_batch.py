@@ -0,0 +1,75 @@
+import pytest
+
+ALUNO = {'nome': 'Aluno', 'idade': 15, 'data_nascimento': '2010-01-01'}
+
+
+@pytest.fixture
+def cliente(criar_app):
+    return criar_app(0).test_client()
+
+
+@pytest.mark.parametrize('dados', [{**ALUNO, 'turma_id': None}, {**ALUNO, 'turma_id': 99}])
+def test_turma_nula_ou_inexistente_recusada_como_no_post(cliente, dados):
+    assert cliente.post('/alunos', json=dados).status_code == 404
+    resposta = cliente.post('/batch', json={'operacoes': [{'acao': 'criar', 'tipo': 'aluno', 'dados': dados}]})
+    assert resposta.status_code == 404
+    assert resposta.get_json()['resultados'][0]['message'] == 'Turma não encontrada'
+
+
+def test_sem_turma_id_aluno_criado_sem_turma(cliente):
+    assert cliente.post('/alunos', json=ALUNO).status_code == 201
+    resposta = cliente.post('/batch', json={'operacoes': [{'acao': 'criar', 'tipo': 'aluno', 'dados': ALUNO}]})
+    assert resposta.status_code == 200
+    assert cliente.get(f"/alunos/{resposta.get_json()['resultados'][0]['id']}").get_json()['turma_id'] is None
+
+
+def test_professor_nulo_recusado_no_put_e_no_lote(cliente):
+    assert cliente.put('/turmas/1', json={'professor_id': None}).status_code == 404
+    operacao = {'acao': 'atualizar', 'tipo': 'turma', 'id': 1, 'dados': {'professor_id': None}}
+    assert cliente.post('/batch', json={'operacoes': [operacao]}).status_code == 404
+    assert cliente.get('/turmas/1').get_json()['professor_id'] == 1
+
+
+def test_lote_com_referencias_gravado_em_uma_transacao(cliente):
+    resposta = cliente.post('/batch', json={'operacoes': [
+        {'acao': 'criar', 'tipo': 'turma', 'ref': 't1', 'dados': {'descricao': 'Nova', 'ativo': True, 'professor_id': 1}},
+        {'acao': 'criar', 'tipo': 'aluno', 'ref': 'a1', 'dados': {**ALUNO, 'turma_id': '$t1'}},
+        {'acao': 'atualizar', 'tipo': 'aluno', 'id': '$a1', 'dados': {'nome': 'Renomeado'}},
+    ]})
+    assert resposta.status_code == 200
+    turma, aluno, atualizado = resposta.get_json()['resultados']
+    assert (turma['status'], aluno['status'], atualizado['status']) == (201, 201, 200)
+    assert atualizado['id'] == aluno['id']
+    criado = cliente.get(f"/alunos/{aluno['id']}").get_json()
+    assert (criado['nome'], criado['turma_id']) == ('Renomeado', turma['id'])
+
+
+def test_falha_desfaz_o_lote_e_as_demais_operacoes_respondem_424(cliente):
+    turmas = cliente.get('/turmas').get_json()
+    resposta = cliente.post('/batch', json={'operacoes': [
+        {'acao': 'criar', 'tipo': 'turma', 'ref': 't1', 'dados': {'descricao': 'Nova', 'ativo': True}},
+        {'acao': 'criar', 'tipo': 'aluno', 'dados': {**ALUNO, 'turma_id': '$t1'}},
+        {'acao': 'atualizar', 'tipo': 'turma', 'id': 99, 'dados': {'descricao': 'Inexistente'}},
+        {'acao': 'deletar', 'tipo': 'turma', 'id': 1},
+    ]})
+    assert resposta.status_code == 404
+    corpo = resposta.get_json()
+    assert corpo['indice'] == 2
+    assert [resultado['status'] for resultado in corpo['resultados']] == [424, 424, 404, 424]
+
+    # Nada foi gravado: nem as criações anteriores à falha nem a remoção posterior
+    assert cliente.get('/turmas').get_json() == turmas
+    assert cliente.get('/alunos').get_json() == []
+
+
+def test_referencia_inexistente_ou_de_outro_tipo(cliente):
+    resposta = cliente.post('/batch', json={'operacoes': [
+        {'acao': 'criar', 'tipo': 'professor', 'ref': 'p1', 'dados': {'nome': 'P', 'idade': 40, 'materia': 'Física', 'observacoes': ''}},
+        {'acao': 'criar', 'tipo': 'aluno', 'dados': {**ALUNO, 'turma_id': '$p1'}},
+    ]})
+    assert resposta.status_code == 400
+    assert [resultado['status'] for resultado in resposta.get_json()['resultados']] == [424, 400]
+    assert cliente.get('/professores').get_json()[-1]['id'] == 1
+
+    resposta = cliente.post('/batch', json={'operacoes': [{'acao': 'deletar', 'tipo': 'aluno', 'id': '$x'}]})
+    assert resposta.status_code == 400
@@ -0,0 +1,48 @@
+import pytest
+
+# Em ordem de id: os que só batem como prefixo de "joao" vêm antes dos exatos
+NOMES = ['Joaozinho Lima', 'João Silva', 'Pedro Alves', 'JOÃO Souza', 'Joãozinho Silva', 'Maria João Silva']
+
+
+@pytest.fixture
+def cliente(criar_app):
+    cliente = criar_app(0).test_client()
+    for nome in NOMES:
+        resposta = cliente.post('/alunos', json={'nome': nome, 'idade': 15, 'data_nascimento': '2010-01-01', 'turma_id': 1})
+        assert resposta.status_code == 201, resposta.get_json()
+    return cliente
+
+
+def nomes(resposta):
+    assert resposta.status_code == 200, resposta.get_json()
+    return [aluno['nome'] for aluno in resposta.get_json()]
+
+
+def test_busca_ignora_acentos_e_maiusculas(cliente):
+    assert nomes(cliente.get('/alunos/busca?q=JOÃO silva')) == ['João Silva', 'Maria João Silva', 'Joãozinho Silva']
+    assert nomes(cliente.get('/alunos/busca?q=pedro')) == nomes(cliente.get('/alunos/busca?q=pédro')) == ['Pedro Alves']
+
+
+def test_palavras_inteiras_antes_dos_prefixos(cliente):
+    # Cada faixa em ordem de id
+    assert nomes(cliente.get('/alunos/busca?q=joao')) == [
+        'João Silva', 'JOÃO Souza', 'Maria João Silva', 'Joaozinho Lima', 'Joãozinho Silva'
+    ]
+
+
+def test_paginas_da_busca_atravessam_as_faixas(cliente):
+    completa = nomes(cliente.get('/alunos/busca?q=joao'))
+    resposta = cliente.get('/alunos/busca?q=joao&limit=2')
+    paginas = [nomes(resposta)]
+    while 'Link' in resposta.headers:
+        offset = resposta.headers['X-Proximo-Offset']
+        resposta = cliente.get(f'/alunos/busca?q=joao&limit=2&offset={offset}')
+        paginas.append(nomes(resposta))
+    assert paginas == [completa[0:2], completa[2:4], completa[4:]]
+
+
+def test_indice_acompanha_alteracoes(cliente):
+    assert cliente.put('/alunos/3', json={'nome': 'Pedro João'}).status_code == 200
+    assert 'Pedro João' in nomes(cliente.get('/alunos/busca?q=joao'))
+    assert nomes(cliente.get('/alunos/busca?q=alves')) == []
+    assert cliente.get('/alunos/busca?q=%20!').status_code == 400
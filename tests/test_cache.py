@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import select
+
+from database import db
+from models.aluno import Aluno
+from utils.cache import Cache, CacheNulo, chave_registro, ler_registro, obter_cache
+
+
+def test_leitura_nao_guarda_valor_invalidado_durante_a_transacao(criar_app):
+    app = criar_app(30)
+    with app.app_context():
+        cache = obter_cache()
+        chave = chave_registro(Aluno, 1)
+        # Transação iniciada antes do commit concorrente que invalida o cache
+        db.session.execute(select(1))
+        cache.remover(chave_registro(Aluno, 2))
+        assert ler_registro(Aluno, 1) is not None
+        assert cache.obter(chave) is None
+        assert cache.estatisticas()['recusados'] == 1
+        db.session.rollback()
+
+        # Em uma transação nova o valor volta a ser guardado
+        assert ler_registro(Aluno, 1) is not None
+        assert cache.obter(chave) is not None
+
+
+def test_backend_precisa_implementar_a_interface_inteira():
+    class CacheIncompleto(Cache):
+        def obter(self, chave):
+            return None
+
+    with pytest.raises(TypeError):
+        CacheIncompleto()
+    with pytest.raises(TypeError):
+        Cache()
+    assert CacheNulo().obter('chave') is None
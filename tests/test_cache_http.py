@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.fixture
+def cliente(criar_app):
+    return criar_app(30).test_client()
+
+
+@pytest.mark.parametrize('url', ['/alunos', '/alunos?limit=10&sort=-id', '/alunos/1', '/turmas/1?incluir=alunos'])
+def test_if_none_match_atual_responde_304(cliente, url):
+    resposta = cliente.get(url)
+    etag = resposta.headers['ETag']
+    assert resposta.status_code == 200
+
+    revalidada = cliente.get(url, headers={'If-None-Match': etag})
+    assert revalidada.status_code == 304
+    assert revalidada.headers['ETag'] == etag
+    assert revalidada.get_data() == b''
+
+
+def test_etag_da_listagem_muda_depois_de_uma_alteracao(cliente):
+    etag = cliente.get('/alunos').headers['ETag']
+    assert cliente.put('/alunos/1', json={'nome': 'Outro nome'}).status_code == 200
+
+    resposta = cliente.get('/alunos', headers={'If-None-Match': etag})
+    assert resposta.status_code == 200
+    assert resposta.headers['ETag'] != etag
+
+
+def test_if_match_desatualizado_responde_412(cliente):
+    etag = cliente.get('/alunos/1').headers['ETag']
+    assert cliente.put('/alunos/1', json={'nome': 'Primeira'}, headers={'If-Match': etag}).status_code == 200
+
+    # O ETag lido antes da primeira alteração já não vale: nada é gravado
+    resposta = cliente.put('/alunos/1', json={'nome': 'Segunda'}, headers={'If-Match': etag})
+    assert resposta.status_code == 412
+    assert cliente.get('/alunos/1').get_json()['nome'] == 'Primeira'
+    assert cliente.delete('/alunos/1', headers={'If-Match': etag}).status_code == 412
+
+    atual = cliente.get('/alunos/1').headers['ETag']
+    assert cliente.delete('/alunos/1', headers={'If-Match': atual}).status_code == 200
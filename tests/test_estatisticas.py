@@ -0,0 +1,66 @@
+import pytest
+
+# (turma_id, nota_primeiro_semestre, nota_segundo_semestre); o último aluno ainda não tem a segunda nota
+NOTAS = [(1, 2.0, 4.0), (1, 6.0, 8.0), (1, 10.0, 10.0), (2, 5.0, 5.0), (2, 7.0, 9.0), (2, 1.0, None)]
+
+
+@pytest.fixture
+def cliente(criar_app):
+    # Um professor com a turma 1 (de benchmarks.dados) e outro, criado aqui, com a turma 2
+    cliente = criar_app(0).test_client()
+    cliente.post('/professores', json={'nome': 'Outro', 'idade': 40, 'materia': 'Física', 'observacoes': ''})
+    cliente.post('/turmas', json={'descricao': 'Turma B', 'ativo': True, 'professor_id': 2})
+    for indice, (turma_id, primeira, segunda) in enumerate(NOTAS):
+        resposta = cliente.post('/alunos', json={
+            'nome': f'Aluno {indice}', 'idade': 15, 'data_nascimento': '2010-01-01', 'turma_id': turma_id,
+            'nota_primeiro_semestre': primeira, 'nota_segundo_semestre': segunda
+        })
+        assert resposta.status_code == 201, resposta.get_json()
+    return cliente
+
+
+def resumo(estatisticas, nome):
+    nota = estatisticas[nome]
+    return nota['quantidade'], pytest.approx(nota['media']), nota['mediana'], nota['minimo'], nota['maximo']
+
+
+def test_estatisticas_gerais(cliente):
+    estatisticas = cliente.get('/estatisticas?largura=5').get_json()
+    assert estatisticas['quantidade_alunos'] == 6
+    # Quantidade par: a mediana é a média das duas notas centrais
+    assert resumo(estatisticas, 'nota_primeiro_semestre') == (6, pytest.approx(31 / 6), 5.5, 1.0, 10.0)
+    assert resumo(estatisticas, 'nota_segundo_semestre') == (5, pytest.approx(7.2), 8.0, 4.0, 10.0)
+    assert resumo(estatisticas, 'media_final') == (5, pytest.approx(6.6), 7.0, 3.0, 10.0)
+    assert estatisticas['aprovados'] == 3
+    assert estatisticas['taxa_aprovacao'] == pytest.approx(0.6)
+    assert [faixa['quantidade'] for faixa in estatisticas['histograma']] == [1, 4]
+
+
+def test_estatisticas_por_turma_e_por_professor(cliente):
+    estatisticas = cliente.get('/estatisticas').get_json()
+    for chave, grupos in (('turma_id', estatisticas['por_turma']), ('professor_id', estatisticas['por_professor'])):
+        por_id = {grupo[chave]: grupo for grupo in grupos}
+        assert resumo(por_id[1], 'nota_primeiro_semestre') == (3, pytest.approx(6.0), 6.0, 2.0, 10.0)
+        assert resumo(por_id[1], 'media_final') == (3, pytest.approx(20 / 3), 7.0, 3.0, 10.0)
+        assert resumo(por_id[2], 'nota_primeiro_semestre') == (3, pytest.approx(13 / 3), 5.0, 1.0, 7.0)
+        assert resumo(por_id[2], 'nota_segundo_semestre') == (2, pytest.approx(7.0), 7.0, 5.0, 9.0)
+        assert resumo(por_id[2], 'media_final') == (2, pytest.approx(6.5), 6.5, 5.0, 8.0)
+        assert (por_id[1]['aprovados'], por_id[2]['aprovados']) == (2, 1)
+
+
+def test_estatisticas_da_turma(cliente):
+    estatisticas = cliente.get('/turmas/2/estatisticas').get_json()
+    assert estatisticas['turma_id'] == 2
+    assert estatisticas['quantidade_alunos'] == 3
+    assert resumo(estatisticas, 'media_final') == (2, pytest.approx(6.5), 6.5, 5.0, 8.0)
+    assert cliente.get('/turmas/99/estatisticas').status_code == 404
+
+
+def test_estatisticas_revalidadas_pelas_versoes_das_tabelas(cliente):
+    resposta = cliente.get('/estatisticas')
+    assert cliente.get('/estatisticas', headers={'If-None-Match': resposta.headers['ETag']}).status_code == 304
+
+    cliente.put('/alunos/6', json={'nota_segundo_semestre': 3.0})
+    resposta = cliente.get('/estatisticas', headers={'If-None-Match': resposta.headers['ETag']})
+    assert resposta.status_code == 200
+    assert resposta.get_json()['nota_segundo_semestre']['quantidade'] == 6
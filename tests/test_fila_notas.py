@@ -0,0 +1,75 @@
+import fcntl
+import json
+
+import pytest
+
+
+@pytest.fixture
+def criar_com_fila(criar_app, tmp_path):
+    """Aplicação com a fila de notas; a thread espera o intervalo longo e os testes gravam com ``gravar()``."""
+    pasta = tmp_path / 'fila'
+    pasta.mkdir()
+
+    def criar():
+        return criar_app(30, FILA_NOTAS_HABILITADA=True, FILA_NOTAS_PASTA=str(pasta), FILA_NOTAS_INTERVALO_MS=60000)
+    return criar, pasta
+
+
+def test_temporario_de_reescrita_interrompida_removido(criar_com_fila):
+    criar, pasta = criar_com_fila
+    # Queda entre a criação do temporário e o os.replace: o diário antigo continua inteiro
+    (pasta / '111-aaaaaaaa.jsonl').write_text(json.dumps({'id': 1, 'campos': {'nota_primeiro_semestre': 9.0}}) + '\n')
+    (pasta / '111-aaaaaaaa.jsonl.tmp').write_text('{"id": 1, "campos": {"nota_pri')
+    # Temporário de um processo vivo (travado): fica
+    vivo = pasta / '222-bbbbbbbb.jsonl.tmp'
+    with open(vivo, 'w') as arquivo:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        cliente = criar().test_client()
+        assert cliente.get('/sistema/fila-notas').get_json()['pendentes'] == 1
+        assert sorted(caminho.name for caminho in pasta.glob('*.tmp')) == [vivo.name]
+
+
+def notas(cliente, id):
+    aluno = cliente.get(f'/alunos/{id}').get_json()
+    return aluno['nota_primeiro_semestre'], aluno['nota_segundo_semestre'], aluno['media_final']
+
+
+def test_envios_do_mesmo_aluno_coalescidos_em_uma_gravacao(criar_com_fila):
+    criar, pasta = criar_com_fila
+    app = criar()
+    cliente = app.test_client()
+    antes = notas(cliente, 1)
+    for id, campos in [(1, {'nota_primeiro_semestre': 5.0}), (2, {'nota_segundo_semestre': 4.0}),
+                       (1, {'nota_primeiro_semestre': 7.0}), (1, {'nota_segundo_semestre': 9.0})]:
+        assert cliente.put(f'/alunos/{id}/notas', json=campos).status_code == 202
+
+    estado = cliente.get('/sistema/fila-notas').get_json()
+    assert (estado['recebidas'], estado['coalescidas'], estado['pendentes']) == (4, 2, 2)
+    assert notas(cliente, 1) == antes
+
+    assert app.extensions['fila_notas'].gravar()
+    estado = cliente.get('/sistema/fila-notas').get_json()
+    assert (estado['pendentes'], estado['gravadas'], estado['lotes']) == (0, 2, 1)
+    # O último envio de cada nota vence, e a média é recalculada com as duas
+    assert notas(cliente, 1) == (7.0, 9.0, 8.0)
+    assert notas(cliente, 2)[1] == 4.0
+    # Depois do commit o diário fica só com o que continua pendente
+    assert [caminho.read_text() for caminho in pasta.glob('*.jsonl')] == ['']
+
+
+def test_diario_de_processo_encerrado_reaplicado(criar_com_fila):
+    criar, pasta = criar_com_fila
+    # Diário de um processo que caiu no meio de uma escrita (última linha cortada)
+    entradas = [(1, {'nota_primeiro_semestre': 6.0}), (3, {'nota_primeiro_semestre': 2.0, 'nota_segundo_semestre': 4.0}),
+                (1, {'nota_segundo_semestre': 10.0}), (1, {'nota_primeiro_semestre': 8.0})]
+    linhas = ''.join(json.dumps({'id': id, 'campos': campos}) + '\n' for id, campos in entradas)
+    (pasta / '111-aaaaaaaa.jsonl').write_text(linhas + '{"id": 3, "campos": {"nota_')
+
+    app = criar()
+    cliente = app.test_client()
+    assert cliente.get('/sistema/fila-notas').get_json()['pendentes'] == 2
+    assert not (pasta / '111-aaaaaaaa.jsonl').exists()
+
+    assert app.extensions['fila_notas'].gravar()
+    assert notas(cliente, 1) == (8.0, 10.0, 9.0)
+    assert notas(cliente, 3) == (2.0, 4.0, 3.0)
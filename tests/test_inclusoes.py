@@ -0,0 +1,50 @@
+import pytest
+from sqlalchemy import event
+
+from database import db
+
+
+def contar_statements(app, url):
+    """Executa o GET (depois de um aquecimento) e retorna os statements SQL e o JSON da resposta."""
+    cliente = app.test_client()
+    cliente.get(url).get_data()
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def contar(conexao, cursor, sql, *args):
+        statements.append(sql)
+
+    event.listen(engine, 'before_cursor_execute', contar)
+    try:
+        resposta = cliente.get(url)
+        # As listagens sem limit são enviadas em streaming: as consultas rodam ao ler o corpo
+        corpo = resposta.get_json()
+    finally:
+        event.remove(engine, 'before_cursor_execute', contar)
+    assert resposta.status_code == 200
+    return statements, corpo
+
+
+@pytest.mark.parametrize('url', [
+    '/turmas?include=professor,alunos',
+    '/alunos?include=turma',
+    '/professores?include=turmas',
+    '/turmas?include=professor,alunos&limit=100'
+])
+def test_statements_constantes_com_inclusoes(criar_app, url):
+    # 90 alunos (3 turmas) e 900 alunos (30 turmas), abaixo do lote do streaming
+    pequeno, corpo_pequeno = contar_statements(criar_app(90), url)
+    grande, corpo_grande = contar_statements(criar_app(900), url)
+    assert len(corpo_grande) > len(corpo_pequeno)
+    assert len(grande) == len(pequeno), grande
+
+
+def test_colecoes_incluidas_em_ordem_de_id(criar_app):
+    cliente = criar_app(900).test_client()
+    for turma in cliente.get('/turmas?include=alunos').get_json():
+        ids = [aluno['id'] for aluno in turma['alunos']]
+        assert ids == sorted(ids)
+    for professor in cliente.get('/professores?include=turmas').get_json():
+        ids = [turma['id'] for turma in professor['turmas']]
+        assert ids == sorted(ids)
@@ -0,0 +1,20 @@
+import re
+
+
+def linhas_server_timing(resposta):
+    return int(re.search(r'(\d+) linhas', resposta.headers['Server-Timing']).group(1))
+
+
+def test_linhas_do_returning_em_lote_sao_contadas(criar_app, gerar_alunos):
+    cliente = criar_app(3000, INSTRUMENTACAO_HABILITADA=True, CACHE_TIPO='nenhum').test_client()
+    resposta = cliente.post('/alunos/bulk', json=gerar_alunos(3000, 'Contado'))
+    assert resposta.status_code == 201
+    # Os 3000 ids do RETURNING (em vários lotes do insertmanyvalues), além das linhas das verificações
+    assert linhas_server_timing(resposta) >= 3000
+
+
+def test_linhas_das_consultas_continuam_contadas(criar_app):
+    cliente = criar_app(300, INSTRUMENTACAO_HABILITADA=True, CACHE_TIPO='nenhum').test_client()
+    resposta = cliente.get('/alunos?limit=50')
+    assert resposta.status_code == 200
+    assert linhas_server_timing(resposta) >= 50
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+from sqlalchemy import text
+
+from database import db
+
+# (turma_id, nota_primeiro_semestre, nota_segundo_semestre); sem a segunda nota a media_final fica nula
+NOTAS = [
+    (1, 6.0, 8.0), (2, None, None), (1, 5.0, 5.0), (2, 7.0, 7.0), (1, 3.0, None), (2, 6.0, 8.0),
+    (1, 9.0, 9.0), (2, 5.0, 5.0), (1, 2.0, None), (2, 7.0, 7.0), (1, 6.0, 8.0), (2, 4.0, 4.0),
+]
+
+
+@pytest.fixture
+def cliente(criar_app):
+    cliente = criar_app(0).test_client()
+    cliente.post('/professores', json={'nome': 'Outro', 'idade': 40, 'materia': 'Física', 'observacoes': ''})
+    cliente.post('/turmas', json={'descricao': 'Turma B', 'ativo': True, 'professor_id': 2})
+    for indice, (turma_id, primeira, segunda) in enumerate(NOTAS):
+        resposta = cliente.post('/alunos', json={
+            'nome': f'Aluno {indice}', 'idade': 15, 'data_nascimento': '2010-01-01', 'turma_id': turma_id,
+            'nota_primeiro_semestre': primeira, 'nota_segundo_semestre': segunda
+        })
+        assert resposta.status_code == 201, resposta.get_json()
+    return cliente
+
+
+def paginas(cliente, url):
+    """Segue o header ``Link`` até a última página, devolvendo a lista de cada uma."""
+    resultado = []
+    while url:
+        resposta = cliente.get(url)
+        assert resposta.status_code == 200
+        resultado.append(resposta.get_json())
+        link = resposta.headers.get('Link')
+        url = link[1:link.index('>')] if link else None
+        if url:
+            assert f"after={resposta.headers['X-Proximo-Cursor']}" in url
+    return resultado
+
+
+def test_paginacao_por_id_cobre_a_tabela_sem_repetir(cliente):
+    todas = paginas(cliente, '/alunos?limit=5')
+    assert [len(pagina) for pagina in todas] == [5, 5, 2]
+    ids = [aluno['id'] for pagina in todas for aluno in pagina]
+    assert ids == list(range(1, len(NOTAS) + 1))
+
+    decrescente = paginas(cliente, '/alunos?limit=5&sort=-id')
+    assert [aluno['id'] for pagina in decrescente for aluno in pagina] == ids[::-1]
+
+
+def test_streaming_em_json_e_ndjson(cliente):
+    resposta = cliente.get('/alunos')
+    assert resposta.is_streamed
+    alunos = json.loads(resposta.get_data())
+    assert [aluno['id'] for aluno in alunos] == list(range(1, len(NOTAS) + 1))
+
+    resposta = cliente.get('/alunos?formato=ndjson')
+    assert resposta.mimetype == 'application/x-ndjson'
+    assert [json.loads(linha) for linha in resposta.get_data().splitlines()] == alunos
+
+
+
+def ordenados(alunos, campo, decrescente=False):
+    """Ids na ordem esperada de ``sort``: nulos sempre no final e desempate por id."""
+    sinal = -1 if decrescente else 1
+    chave = lambda aluno: (aluno[campo] is None, sinal * (aluno[campo] or 0), aluno['id'])
+    return [aluno['id'] for aluno in sorted(alunos, key=chave)]
+
+
+@pytest.mark.parametrize('sort', ['media_final', '-media_final'])
+@pytest.mark.parametrize('limite', [1, 2, 3, 5])
+def test_cursor_estavel_ordenando_por_coluna_anulavel(cliente, sort, limite):
+    alunos = cliente.get('/alunos').get_json()
+    assert sum(aluno['media_final'] is None for aluno in alunos) == 3
+
+    todas = paginas(cliente, f'/alunos?sort={sort}&limit={limite}')
+    ids = [aluno['id'] for pagina in todas for aluno in pagina]
+    # Sem repetir nem pular registros, inclusive quando a página termina no meio de empates ou dos nulos
+    assert ids == ordenados(alunos, 'media_final', sort.startswith('-'))
+
+
+def test_cursor_com_filtro_e_coluna_anulavel(cliente):
+    alunos = cliente.get('/alunos?turma_id=1').get_json()
+    todas = paginas(cliente, '/alunos?turma_id=1&sort=media_final&limit=2')
+    assert [aluno['id'] for pagina in todas for aluno in pagina] == ordenados(alunos, 'media_final')
+    assert {aluno['turma_id'] for pagina in todas for aluno in pagina} == {1}
+
+
+@pytest.mark.parametrize('consulta, indice', [
+    ('SELECT id FROM aluno WHERE turma_id = 1 AND id > 3 ORDER BY id LIMIT 5', 'ix_aluno_turma_id_id'),
+    ('SELECT id FROM turma WHERE ativo = 1 AND id > 3 ORDER BY id LIMIT 5', 'ix_turma_ativo_id'),
+])
+def test_listagem_filtrada_usa_indice_composto(criar_app, consulta, indice):
+    app = criar_app(3000)
+    with app.app_context():
+        plano = ' '.join(linha[-1] for linha in db.session.execute(text(f'EXPLAIN QUERY PLAN {consulta}')))
+    assert indice in plano
+    assert 'TEMP B-TREE' not in plano
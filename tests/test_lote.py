@@ -0,0 +1,34 @@
+from sqlalchemy import event
+
+from database import db
+
+
+def test_post_alunos_bulk_10_mil_em_paginas_de_values(criar_app, gerar_alunos):
+    # O tempo (alvo de menos de 1 s) é medido em benchmarks/lote.py, fora da suíte
+    app = criar_app(3000)
+    cliente = app.test_client()
+    with app.app_context():
+        engine = db.engine
+    statements = []
+
+    def contar(conexao, cursor, sql, *args):
+        statements.append(sql)
+
+    event.listen(engine, 'before_cursor_execute', contar)
+    try:
+        resposta = cliente.post('/alunos/bulk', json=gerar_alunos(10000, 'Lote'))
+    finally:
+        event.remove(engine, 'before_cursor_execute', contar)
+    assert resposta.status_code == 201
+    # INSERT em páginas de VALUES, não um statement por aluno
+    assert len(statements) < 50, len(statements)
+
+
+def test_post_alunos_bulk_ids_na_ordem_do_lote(criar_app, gerar_alunos):
+    cliente = criar_app(3000).test_client()
+    corpo = gerar_alunos(2500, 'Ordem')
+    resultados = cliente.post('/alunos/bulk', json=corpo).get_json()['resultados']
+    for indice in (0, 999, 1000, 1777, 2499):
+        assert resultados[indice]['indice'] == indice
+        aluno = cliente.get(f"/alunos/{resultados[indice]['id']}").get_json()
+        assert aluno['nome'] == corpo[indice]['nome']
@@ -0,0 +1,53 @@
+import importlib
+
+import pytest
+
+from app import create_app
+from utils.media import calcular_media
+
+
+@pytest.mark.parametrize('pesos, mensagem', [
+    ((0, 0), 'maior que zero'),
+    ((2, -1), 'não pode ser negativo'),
+    (('dois', 1), 'deve ser um número')
+])
+def test_pesos_invalidos_impedem_a_criacao_da_aplicacao(pesos, mensagem):
+    with pytest.raises(ValueError, match=mensagem):
+        create_app({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+            'SWAGGER_HABILITADO': False,
+            'MEDIA_PESO_PRIMEIRO_SEMESTRE': pesos[0],
+            'MEDIA_PESO_SEGUNDO_SEMESTRE': pesos[1]
+        })
+
+
+def test_peso_zero_em_um_semestre_e_aceito(criar_app):
+    app = criar_app(30, MEDIA_PESO_PRIMEIRO_SEMESTRE=0, MEDIA_PESO_SEGUNDO_SEMESTRE=1)
+    with app.app_context():
+        assert calcular_media(4.0, 8.0) == 8.0
+
+
+@pytest.fixture
+def recarregar_config(monkeypatch):
+    """Relê ``config`` com o ambiente do teste e o restaura no final."""
+    import config
+    yield lambda: importlib.reload(config)
+    monkeypatch.undo()
+    importlib.reload(config)
+
+
+def test_peso_invalido_no_ambiente_nao_quebra_o_import(recarregar_config, monkeypatch):
+    monkeypatch.setenv('MEDIA_PESO_PRIMEIRO_SEMESTRE', 'dois')
+    config = recarregar_config()
+    assert config.Config.MEDIA_PESO_PRIMEIRO_SEMESTRE == 'dois'
+    with pytest.raises(ValueError, match='MEDIA_PESO_PRIMEIRO_SEMESTRE inválido: deve ser um número'):
+        create_app(config.Config)
+
+
+def test_pesos_do_ambiente_convertidos(recarregar_config, monkeypatch, tmp_path):
+    monkeypatch.setenv('MEDIA_PESO_PRIMEIRO_SEMESTRE', '1')
+    monkeypatch.setenv('MEDIA_PESO_SEGUNDO_SEMESTRE', '3')
+    config = recarregar_config()
+    app = create_app({**vars(config.Config), 'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/escola.db', 'SWAGGER_HABILITADO': False})
+    with app.app_context():
+        assert calcular_media(4.0, 8.0) == 7.0
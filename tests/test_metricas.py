@@ -0,0 +1,31 @@
+import re
+import time
+
+from flask import Response
+
+from utils.metricas import TIPO_CONTEUDO
+
+
+def test_content_type_das_metricas(criar_app):
+    resposta = criar_app(30).test_client().get('/metrics')
+    assert resposta.status_code == 200
+    assert resposta.headers['Content-Type'] == TIPO_CONTEUDO
+
+
+def test_duracao_inclui_o_corpo_em_streaming(criar_app):
+    app = criar_app(30)
+
+    @app.route('/lento')
+    def lento():
+        def gerar():
+            yield b'['
+            time.sleep(0.2)
+            yield b']'
+        return Response(gerar(), mimetype='application/json')
+
+    cliente = app.test_client()
+    with cliente.get('/lento') as resposta:
+        assert resposta.get_data() == b'[]'
+    texto = cliente.get('/metrics').get_data(as_text=True)
+    soma = re.search(r'escola_requisicao_duracao_segundos_sum\{[^}]*endpoint="lento"[^}]*\} (\S+)', texto)
+    assert float(soma.group(1)) >= 0.2
@@ -0,0 +1,83 @@
+import pytest
+
+ALUNO = {'idade': 15, 'data_nascimento': '2010-01-01'}
+
+
+@pytest.fixture
+def criar_cliente(criar_app):
+    """Professor 1 com as turmas 1 (alunos 1 e 2) e 2 (vazia); professor 2 com a turma 3 (aluno 3)."""
+    def criar(turma='anular', professor='anular'):
+        cliente = criar_app(0, POLITICA_REMOCAO_TURMA=turma, POLITICA_REMOCAO_PROFESSOR=professor).test_client()
+        cliente.post('/turmas', json={'descricao': 'Vazia', 'ativo': True, 'professor_id': 1})
+        cliente.post('/professores', json={'nome': 'Outro', 'idade': 40, 'materia': 'Física', 'observacoes': ''})
+        cliente.post('/turmas', json={'descricao': 'Turma C', 'ativo': True, 'professor_id': 2})
+        for nome, turma_id in (('Ana', 1), ('Bia', 1), ('Caio', 3)):
+            assert cliente.post('/alunos', json={**ALUNO, 'nome': nome, 'turma_id': turma_id}).status_code == 201
+        return cliente
+    return criar
+
+
+def turma_dos_alunos(cliente):
+    return {aluno['id']: aluno['turma_id'] for aluno in cliente.get('/alunos').get_json()}
+
+
+def professor_das_turmas(cliente):
+    return {turma['id']: turma['professor_id'] for turma in cliente.get('/turmas').get_json()}
+
+
+def test_turma_anular(criar_cliente):
+    cliente = criar_cliente()
+    assert cliente.delete('/turmas/1').status_code == 200
+    assert turma_dos_alunos(cliente) == {1: None, 2: None, 3: 3}
+    # O cache do registro também foi invalidado
+    assert cliente.get('/alunos/1').get_json()['turma_id'] is None
+
+
+def test_turma_restringir(criar_cliente):
+    cliente = criar_cliente(turma='restringir')
+    assert cliente.delete('/turmas/1').status_code == 409
+    assert cliente.get('/turmas/1').status_code == 200
+
+    resposta = cliente.delete('/turmas/bulk', json={'ids': [1, 2]})
+    assert resposta.status_code == 207
+    assert [resultado['status'] for resultado in resposta.get_json()['resultados']] == [409, 200]
+    assert sorted(professor_das_turmas(cliente)) == [1, 3]
+    assert turma_dos_alunos(cliente) == {1: 1, 2: 1, 3: 3}
+
+
+def test_turma_cascata(criar_cliente):
+    cliente = criar_cliente(turma='cascata')
+    assert cliente.delete('/turmas/1').status_code == 200
+    assert turma_dos_alunos(cliente) == {3: 3}
+    assert cliente.get('/alunos/1').status_code == 404
+
+
+def test_professor_anular(criar_cliente):
+    cliente = criar_cliente()
+    assert cliente.delete('/professores/1').status_code == 200
+    assert professor_das_turmas(cliente) == {1: None, 2: None, 3: 2}
+    assert turma_dos_alunos(cliente) == {1: 1, 2: 1, 3: 3}
+
+
+def test_professor_restringir(criar_cliente):
+    cliente = criar_cliente(professor='restringir')
+    assert cliente.delete('/professores/1').status_code == 409
+    assert cliente.get('/professores/1').status_code == 200
+    assert professor_das_turmas(cliente) == {1: 1, 2: 1, 3: 2}
+
+
+def test_professor_cascata_segue_a_politica_das_turmas(criar_cliente):
+    cliente = criar_cliente(professor='cascata')
+    assert cliente.delete('/professores/1').status_code == 200
+    assert professor_das_turmas(cliente) == {3: 2}
+    assert turma_dos_alunos(cliente) == {1: None, 2: None, 3: 3}
+
+    cliente = criar_cliente(turma='cascata', professor='cascata')
+    assert cliente.delete('/professores/1').status_code == 200
+    assert turma_dos_alunos(cliente) == {3: 3}
+
+    # Uma turma com alunos restrita impede a remoção do professor, sem alterar nenhuma turma
+    cliente = criar_cliente(turma='restringir', professor='cascata')
+    assert cliente.delete('/professores/1').status_code == 409
+    assert professor_das_turmas(cliente) == {1: 1, 2: 1, 3: 2}
+    assert cliente.delete('/professores/2').status_code == 409
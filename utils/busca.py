@@ -0,0 +1,154 @@
+import re
+import unicodedata
+
+from flask import jsonify, request, url_for
+from sqlalchemy import and_, column, func, literal_column, select, table
+
+from database import db
+from utils.listagem import ParametroInvalido, ler_inteiro
+
+# Termos considerados por busca (os demais são ignorados)
+TERMOS_MAXIMOS = 8
+# Paginação por offset: o ranking não permite cursor; páginas profundas custam caro
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+OFFSET_MAXIMO = 1000
+# Tokenizador do FTS5: ignora maiúsculas e acentos ("joao" encontra "João")
+TOKENIZADOR = 'unicode61 remove_diacritics 2'
+# Letras acentuadas trocadas pela letra base no LIKE dos outros bancos (sem FTS5)
+ACENTUADAS = 'áàâãäåéèêëíìîïóòôõöúùûüýÿçñ'
+
+
+def _tabela_busca(modelo):
+    return f'{modelo.__tablename__}_busca'
+
+
+def criar_indices_busca():
+    """Cria os índices FTS5 de ``CAMPOS_BUSCA`` (SQLite) e os triggers que os mantêm.
+
+    O índice guarda só os termos (o texto fica na própria tabela) e os
+    triggers o atualizam em todo INSERT, DELETE e UPDATE dos campos
+    buscados, venham das rotas, das operações em lote ou da importação.
+    Um índice recém-criado é preenchido com as linhas existentes.
+    """
+    from models.aluno import Aluno
+    from models.professor import Professor
+
+    with db.engine.begin() as conexao:
+        if conexao.dialect.name != 'sqlite':
+            return
+        for modelo in (Aluno, Professor):
+            tabela, busca, campos = modelo.__tablename__, _tabela_busca(modelo), modelo.CAMPOS_BUSCA
+            existe = conexao.exec_driver_sql('SELECT 1 FROM sqlite_master WHERE name = ?', (busca,)).first()
+            lista, novos = ', '.join(campos), ', '.join(f'new.{campo}' for campo in campos)
+            antigos = ', '.join(f'old.{campo}' for campo in campos)
+            if not existe:
+                conexao.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE {busca} USING fts5({lista}, content='{tabela}', content_rowid='id', "
+                    f"tokenize='{TOKENIZADOR}', prefix='2 3')"
+                )
+            conexao.exec_driver_sql(
+                f'CREATE TRIGGER IF NOT EXISTS {busca}_inserir AFTER INSERT ON {tabela} BEGIN '
+                f'INSERT INTO {busca}(rowid, {lista}) VALUES (new.id, {novos}); END'
+            )
+            conexao.exec_driver_sql(
+                f'CREATE TRIGGER IF NOT EXISTS {busca}_remover AFTER DELETE ON {tabela} BEGIN '
+                f"INSERT INTO {busca}({busca}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); END"
+            )
+            conexao.exec_driver_sql(
+                f'CREATE TRIGGER IF NOT EXISTS {busca}_atualizar AFTER UPDATE OF {lista} ON {tabela} BEGIN '
+                f"INSERT INTO {busca}({busca}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); "
+                f'INSERT INTO {busca}(rowid, {lista}) VALUES (new.id, {novos}); END'
+            )
+            if not existe:
+                conexao.exec_driver_sql(f"INSERT INTO {busca}({busca}) VALUES ('rebuild')")
+
+
+def normalizar(texto):
+    """Minúsculas e sem acentos, como o tokenizador do índice."""
+    decomposto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(caractere for caractere in decomposto if not unicodedata.combining(caractere))
+
+
+def _sem_acentos(expressao):
+    """``expressao`` em minúsculas e sem acentos, para comparar com os termos já normalizados."""
+    if db.engine.dialect.name == 'mysql':
+        # A collation padrão do MySQL 8 já ignora maiúsculas e acentos
+        return expressao.collate('utf8mb4_0900_ai_ci')
+    return func.translate(func.lower(expressao), ACENTUADAS, normalizar(ACENTUADAS))
+
+
+def ler_termos(valor):
+    """Palavras do parâmetro ``q`` (letras e números), em minúsculas e sem acentos."""
+    termos = re.findall(r'\w+', normalizar(valor or ''))[:TERMOS_MAXIMOS]
+    if not termos:
+        raise ParametroInvalido("Parâmetro 'q' é obrigatório e deve conter letras ou números")
+    return termos
+
+
+def consulta_ids(modelo, termos, prefixo=True):
+    """SELECT dos ids dos registros com todos os termos em ``CAMPOS_BUSCA``, em ordem de id.
+
+    Com ``prefixo`` cada termo vale também como começo de palavra ("ana"
+    encontra "Anabela"); sem ele, só palavras inteiras. No SQLite usa o
+    índice FTS5, que devolve as ocorrências já em ordem de id e para no
+    ``LIMIT``. Nos demais bancos cai em LIKE nos campos, com ``%`` e ``_``
+    dos termos escapados, e não distingue palavras inteiras: retorna None
+    sem ``prefixo``.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        if not prefixo:
+            return None
+        texto = _sem_acentos(func.concat_ws(' ', *(func.coalesce(getattr(modelo, campo), '') for campo in modelo.CAMPOS_BUSCA)))
+        return select(modelo.id).where(and_(*(texto.contains(termo, autoescape=True) for termo in termos))).order_by(modelo.id)
+
+    busca = table(_tabela_busca(modelo), column('rowid'))
+    # Termos entre aspas: só palavras, nunca sintaxe do FTS5
+    expressao = ' '.join(f'"{termo}"*' if prefixo else f'"{termo}"' for termo in termos)
+    return select(busca.c.rowid).where(literal_column(busca.name).op('MATCH')(expressao)).order_by(busca.c.rowid)
+
+
+def _pagina_ids(modelo, termos, inicio, fim):
+    # Ranking em duas faixas: todos os termos como palavras inteiras primeiro,
+    # depois os que só batem como prefixo; em cada faixa, por id
+    exatas = consulta_ids(modelo, termos, prefixo=False)
+    ids = db.session.scalars(exatas.limit(fim)).all() if exatas is not None else []
+    if len(ids) >= fim:
+        return ids[inicio:fim]
+    # Faixa exata completa: o resto vem dos prefixos, sem repetir os exatos
+    prefixos = consulta_ids(modelo, termos)
+    if ids:
+        prefixos = prefixos.where(prefixos.selected_columns[0].not_in(ids))
+    faltam = fim - len(ids)
+    pulados = max(0, inicio - len(ids))
+    return ids[inicio:] + db.session.scalars(prefixos.limit(faltam - pulados).offset(pulados)).all()
+
+
+def buscar(modelo):
+    """Responde a busca de ``q`` com a página de ``limit`` e ``offset``, mais relevantes primeiro.
+
+    Registros com todos os termos como palavras inteiras vêm antes dos que
+    só batem como prefixo. Não usa o bm25 do FTS5: ele lê todas as
+    ocorrências de cada termo para pesá-lo, o que custa dezenas de ms para
+    um sobrenome comum em 1 milhão de alunos, enquanto cada faixa aqui lê
+    só até completar a página. Devolve um array como as listagens; se houver
+    mais resultados, o próximo offset vai nos headers ``X-Proximo-Offset``
+    e ``Link``.
+    """
+    termos = ler_termos(request.args.get('q'))
+    limite = ler_inteiro('limit', minimo=1, maximo=LIMITE_MAXIMO) or LIMITE_PADRAO
+    offset = ler_inteiro('offset', minimo=0, maximo=OFFSET_MAXIMO) or 0
+
+    # Um item a mais para saber se existe próxima página
+    ids = _pagina_ids(modelo, termos, offset, offset + limite + 1)
+    linhas = {}
+    if ids:
+        consulta = select(*(getattr(modelo, campo) for campo in modelo.CAMPOS)).where(modelo.id.in_(ids[:limite]))
+        linhas = {linha.id: linha._asdict() for linha in db.session.execute(consulta)}
+    resposta = jsonify([linhas[id] for id in ids[:limite] if id in linhas])
+    if len(ids) > limite:
+        args = request.args.to_dict()
+        args['offset'] = offset + limite
+        resposta.headers['X-Proximo-Offset'] = str(offset + limite)
+        resposta.headers['Link'] = f'<{url_for(request.endpoint, **args)}>; rel="next"'
+    return resposta
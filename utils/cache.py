@@ -0,0 +1,287 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import db
+from utils.cache_http import etag_registro, validadores_registro, versoes_incluidas
+
+# Chaves a invalidar após o commit, guardadas em session.info
+CHAVE_PENDENTES = 'cache_invalidar'
+# Marca em session.info para limpar o cache inteiro após o commit
+CHAVE_LIMPAR = 'cache_limpar'
+# Geração do cache no início da transação, guardada em session.info
+CHAVE_GERACAO = 'cache_geracao'
+
+
+class Cache(ABC):
+    """Interface dos backends de cache.
+
+    Chaves são strings e valores devem ser serializáveis em JSON, para que
+    um backend externo (ex.: um servidor compatível com Redis) possa
+    implementar a mesma interface.
+    """
+
+    @abstractmethod
+    def obter(self, chave):
+        """Valor guardado na chave, ou None se ausente ou expirado."""
+
+    @abstractmethod
+    def guardar(self, chave, valor, geracao=None):
+        """Guarda o valor, exceto se houve invalidação depois de ``geracao``."""
+
+    @abstractmethod
+    def remover(self, *chaves):
+        """Remove as chaves (as ausentes são ignoradas)."""
+
+    @abstractmethod
+    def limpar(self):
+        """Remove todas as chaves."""
+
+    @abstractmethod
+    def geracao(self):
+        """Contador incrementado a cada ``remover`` e ``limpar``."""
+
+    @abstractmethod
+    def estatisticas(self):
+        """Contadores de acertos e falhas, para dimensionar o cache."""
+
+
+class CacheNulo(Cache):
+    """Cache desligado: toda leitura é uma falha."""
+
+    def __init__(self):
+        self.falhas = 0
+
+    def obter(self, chave):
+        self.falhas += 1
+        return None
+
+    def guardar(self, chave, valor, geracao=None):
+        pass
+
+    def remover(self, *chaves):
+        pass
+
+    def limpar(self):
+        pass
+
+    def geracao(self):
+        return 0
+
+    def estatisticas(self):
+        return {'tipo': 'nenhum', 'acertos': 0, 'falhas': self.falhas, 'taxa_acerto': None, 'entradas': 0}
+
+
+class CacheMemoria(Cache):
+    """Cache LRU em memória, com limite de entradas e tempo de vida (TTL).
+
+    Local a cada processo: com vários workers, uma alteração feita em um
+    deles só invalida o cache dele, e os demais podem servir o valor antigo
+    por até ``ttl`` segundos.
+
+    Um valor lido do banco só é guardado se nenhuma invalidação aconteceu
+    desde o início da transação que o leu: senão um commit concorrente
+    poderia invalidar a chave antes de o valor antigo ser guardado. A
+    geração é uma só para o cache inteiro, então uma invalidação de
+    qualquer chave descarta também as leituras das demais em andamento.
+    """
+
+    def __init__(self, tamanho_maximo=10000, ttl=30):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+        self.descartados = 0
+        self.recusados = 0
+        self._geracao = 0
+
+    def obter(self, chave):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                self.falhas += 1
+                return None
+            valor, expira_em = item
+            if expira_em <= time.monotonic():
+                del self._itens[chave]
+                self.expirados += 1
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor, geracao=None):
+        with self._trava:
+            if geracao is not None and geracao != self._geracao:
+                self.recusados += 1
+                return
+            self._itens[chave] = (valor, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            # Descarta os menos usados recentemente
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+                self.descartados += 1
+
+    def remover(self, *chaves):
+        with self._trava:
+            self._geracao += 1
+            for chave in chaves:
+                self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._trava:
+            self._geracao += 1
+            self._itens.clear()
+
+    def geracao(self):
+        return self._geracao
+
+    def estatisticas(self):
+        with self._trava:
+            leituras = self.acertos + self.falhas
+            return {
+                'tipo': 'memoria',
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / leituras if leituras else None,
+                'entradas': len(self._itens),
+                'tamanho_maximo': self.tamanho_maximo,
+                'ttl': self.ttl,
+                'expirados': self.expirados,
+                'descartados': self.descartados,
+                'recusados': self.recusados
+            }
+
+
+def criar_cache(config):
+    """Cria o backend conforme ``CACHE_TIPO`` (memoria ou nenhum)."""
+    tipo = config.get('CACHE_TIPO', 'memoria')
+    if tipo == 'nenhum':
+        return CacheNulo()
+    if tipo == 'memoria':
+        return CacheMemoria(config.get('CACHE_TAMANHO_MAXIMO', 10000), config.get('CACHE_TTL', 30))
+    raise ValueError(f"CACHE_TIPO inválido: {tipo}")
+
+
+def obter_cache():
+    return current_app.extensions['cache']
+
+
+def chave_registro(modelo, id):
+    return f'{modelo.__table__.name}:{id}'
+
+
+def chave_existe(modelo, id):
+    return f'{modelo.__table__.name}:{id}:existe'
+
+
+def ler_registro(modelo, id, incluir=(), opcoes=()):
+    """Representação de um registro para o GET por id, ou None se não existe.
+
+    Retorna ``(serializar, etag, ultima_modificacao)``, com ``serializar``
+    chamado só se a resposta não for 304. Sem ``incluir`` a representação
+    vem do cache (e é guardada nele na primeira leitura); com
+    relacionamentos incluídos é sempre montada a partir do banco.
+    """
+    if incluir:
+        versoes = versoes_incluidas(modelo, incluir)
+        obj = modelo.query.options(*opcoes).get(id)
+        if obj is None:
+            return None
+        return (lambda: obj.serialize(incluir)), *validadores_registro(obj, versoes)
+
+    cache = obter_cache()
+    chave = chave_registro(modelo, id)
+    registro = cache.obter(chave)
+    if registro is None:
+        obj = db.session.get(modelo, id)
+        if obj is None:
+            return None
+        registro = {
+            'dados': obj.serialize(),
+            'etag': etag_registro(obj),
+            'atualizado_em': obj.atualizado_em.isoformat() if obj.atualizado_em else None
+        }
+        cache.guardar(chave, registro, db.session.info.get(CHAVE_GERACAO))
+    atualizado_em = datetime.fromisoformat(registro['atualizado_em']) if registro['atualizado_em'] else None
+    return (lambda: registro['dados']), registro['etag'], atualizado_em
+
+
+def existe(modelo, id):
+    """Indica se o registro existe, consultando o cache antes do banco.
+
+    Só a existência é guardada: um id inexistente pode ser criado a
+    qualquer momento e é sempre consultado no banco.
+    """
+    if id is None:
+        return False
+    cache = obter_cache()
+    chave = chave_existe(modelo, id)
+    if cache.obter(chave):
+        return True
+    if db.session.query(modelo.id).filter_by(id=id).scalar() is None:
+        return False
+    cache.guardar(chave, True, db.session.info.get(CHAVE_GERACAO))
+    return True
+
+
+def invalidar(modelo, ids):
+    """Remove os registros do cache quando a transação atual fizer commit."""
+    pendentes = db.session.info.setdefault(CHAVE_PENDENTES, set())
+    for id in ids:
+        pendentes.update((chave_registro(modelo, id), chave_existe(modelo, id)))
+
+
+def invalidar_tudo():
+    """Limpa o cache inteiro no commit (alterações em massa sem os ids)."""
+    db.session.info[CHAVE_LIMPAR] = True
+
+
+def _aplicar_invalidacoes(sessao):
+    pendentes = sessao.info.pop(CHAVE_PENDENTES, None)
+    limpar = sessao.info.pop(CHAVE_LIMPAR, False)
+    if not (pendentes or limpar):
+        return
+    cache = current_app.extensions.get('cache')
+    if cache is None:
+        return
+    if limpar:
+        cache.limpar()
+    elif pendentes:
+        cache.remover(*pendentes)
+
+
+def _marcar_geracao(sessao, transacao, conexao):
+    # Antes do primeiro statement: a geração é lida antes do snapshot do banco
+    if has_app_context() and 'cache' in current_app.extensions:
+        sessao.info.setdefault(CHAVE_GERACAO, current_app.extensions['cache'].geracao())
+
+
+def _encerrar_geracao(sessao, transacao):
+    if transacao.parent is None:
+        sessao.info.pop(CHAVE_GERACAO, None)
+
+
+def _descartar_invalidacoes(sessao):
+    sessao.info.pop(CHAVE_PENDENTES, None)
+    sessao.info.pop(CHAVE_LIMPAR, None)
+
+
+def iniciar_cache(app):
+    """Cria o cache da aplicação e liga a invalidação ao commit da sessão."""
+    app.extensions['cache'] = criar_cache(app.config)
+    if not event.contains(Session, 'after_commit', _aplicar_invalidacoes):
+        event.listen(Session, 'after_commit', _aplicar_invalidacoes)
+        event.listen(Session, 'after_rollback', _descartar_invalidacoes)
+        event.listen(Session, 'after_begin', _marcar_geracao)
+        event.listen(Session, 'after_transaction_end', _encerrar_geracao)
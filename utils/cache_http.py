@@ -0,0 +1,112 @@
+import hashlib
+from datetime import timezone
+
+from flask import Response, jsonify, request
+from werkzeug.http import parse_etags
+
+from utils.versoes import ler_versoes
+
+# Codificações de conteúdo (compressão) que podem ser aplicadas às respostas
+CODIFICACOES = ('br', 'gzip')
+
+
+def _hash(*partes):
+    return hashlib.sha1(repr(partes).encode()).hexdigest()[:20]
+
+
+def _mais_recente(*datas):
+    datas = [data for data in datas if data is not None]
+    return max(datas) if datas else None
+
+
+def relacionados(modelo, incluir=()):
+    """Modelos dos relacionamentos pedidos em ``incluir``."""
+    return [getattr(modelo, nome).property.mapper.class_ for nome in incluir]
+
+
+def versoes_incluidas(modelo, incluir=()):
+    """Versões das tabelas incluídas, lidas antes de carregar o registro.
+
+    Lidas antes dos dados, uma alteração concorrente no máximo gera um ETag
+    antigo para dados novos (o cliente só baixa de novo), nunca o contrário.
+    """
+    return ler_versoes(relacionados(modelo, incluir))
+
+
+def validadores_colecao(modelo, incluir=()):
+    """ETag e Last-Modified de uma listagem, sem ler as linhas.
+
+    Combinam a URL (filtros, página e formato) com as versões das tabelas
+    envolvidas, que mudam a cada criação, alteração ou remoção.
+    """
+    versoes = ler_versoes([modelo, *relacionados(modelo, incluir)])
+    etag = _hash(request.full_path, sorted(versoes.items()))
+    return etag, _mais_recente(*(atualizado_em for _, atualizado_em in versoes.values()))
+
+
+def etag_registro(obj):
+    """ETag da representação simples de um registro (usado também no If-Match)."""
+    return _hash(obj.__table__.name, obj.id, obj.versao, obj.atualizado_em)
+
+
+def validadores_registro(obj, versoes=None):
+    """ETag e Last-Modified de um registro e das tabelas incluídas."""
+    if not versoes:
+        return etag_registro(obj), obj.atualizado_em
+    etag = _hash(etag_registro(obj), request.full_path, sorted(versoes.items()))
+    if obj.atualizado_em is None:
+        return etag, None
+    return etag, _mais_recente(obj.atualizado_em, *(atualizado_em for _, atualizado_em in versoes.values()))
+
+
+def etag_codificado(etag, codificacao=None):
+    """ETag da representação comprimida: bytes diferentes pedem ETag diferente."""
+    return f'{etag}-{codificacao}' if codificacao else etag
+
+
+def _correspondente(etags, etag, fraca=True):
+    """O ETag (ou sua variante comprimida) presente em ``etags``, ou None."""
+    for variante in (etag, *(etag_codificado(etag, codificacao) for codificacao in CODIFICACOES)):
+        if etags.contains_weak(variante) if fraca else etags.contains(variante):
+            return variante
+    return None
+
+
+def com_validadores(resposta, etag, ultima_modificacao=None):
+    """Adiciona ETag, Last-Modified e Cache-Control (revalidar sempre) à resposta."""
+    resposta.set_etag(etag)
+    if ultima_modificacao is not None:
+        resposta.last_modified = ultima_modificacao.replace(tzinfo=timezone.utc)
+    resposta.cache_control.no_cache = True
+    return resposta
+
+
+def nao_modificado(etag, ultima_modificacao=None):
+    """Resposta 304 se o cliente já tem a representação atual, senão None.
+
+    ``If-None-Match`` tem precedência e aceita também o ETag das versões
+    comprimidas; ``If-Modified-Since`` só é usado sem ele (com precisão de
+    segundos, como o header).
+    """
+    if request.if_none_match:
+        # Devolve o ETag que o cliente tem, inclusive o de uma resposta comprimida
+        atual = _correspondente(request.if_none_match, etag)
+    elif request.if_modified_since and ultima_modificacao is not None:
+        atual = etag if ultima_modificacao.replace(tzinfo=timezone.utc, microsecond=0) <= request.if_modified_since else None
+    else:
+        atual = None
+    if atual is None:
+        return None
+    return com_validadores(Response(status=304), atual, ultima_modificacao)
+
+
+def etag_confere(obj, if_match):
+    """Verdadeiro se ``if_match`` (valor de um header If-Match) corresponde ao ETag atual do registro."""
+    return _correspondente(parse_etags(if_match), etag_registro(obj), fraca=False) is not None
+
+
+def falha_pre_condicao(obj):
+    """Resposta 412 se o ``If-Match`` não corresponde ao ETag atual do registro."""
+    if request.if_match and _correspondente(request.if_match, etag_registro(obj), fraca=False) is None:
+        return jsonify({'message': 'O registro foi alterado (If-Match não corresponde ao ETag atual)'}), 412
+    return None
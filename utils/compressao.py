@@ -0,0 +1,94 @@
+import gzip
+import zlib
+
+from flask import request
+
+from utils.cache_http import etag_codificado
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Tipos de conteúdo que valem a pena comprimir (JSON, NDJSON, CSV e texto)
+TIPOS_COMPRIMIVEIS = ('application/json', 'application/x-ndjson', 'text/')
+
+
+def _codificacao():
+    """Melhor codificação aceita pelo cliente (``Accept-Encoding``), ou None."""
+    disponiveis = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(disponiveis)
+
+
+def _comprimir(dados, codificacao, niveis):
+    if codificacao == 'br':
+        return brotli.compress(dados, quality=niveis['br'])
+    return gzip.compress(dados, compresslevel=niveis['gzip'], mtime=0)
+
+
+def _comprimir_stream(partes, codificacao, niveis):
+    # Comprime pedaço a pedaço: a resposta continua em streaming (chunked)
+    if codificacao == 'br':
+        compressor = brotli.Compressor(quality=niveis['br'])
+        comprimir, finalizar = compressor.process, compressor.finish
+    else:
+        # wbits 31 = formato gzip
+        compressor = zlib.compressobj(niveis['gzip'], zlib.DEFLATED, 31)
+        comprimir, finalizar = compressor.compress, compressor.flush
+    try:
+        for parte in partes:
+            if isinstance(parte, str):
+                parte = parte.encode('utf-8')
+            saida = comprimir(parte)
+            if saida:
+                yield saida
+        yield finalizar()
+    finally:
+        if hasattr(partes, 'close'):
+            partes.close()
+
+
+def iniciar_compressao(app):
+    """Comprime as respostas com gzip (ou brotli, se instalado) conforme o ``Accept-Encoding``.
+
+    Respostas comuns só são comprimidas a partir de
+    ``COMPRESSAO_TAMANHO_MINIMO`` bytes; as em streaming (listagens e
+    exportações completas) são sempre comprimidas, pedaço a pedaço. O ETag
+    da resposta comprimida ganha o sufixo da codificação.
+    """
+    if not app.config.get('COMPRESSAO_HABILITADA', True):
+        return
+    niveis = {'gzip': app.config.get('COMPRESSAO_NIVEL', 6), 'br': app.config.get('COMPRESSAO_NIVEL_BROTLI', 4)}
+    tamanho_minimo = app.config.get('COMPRESSAO_TAMANHO_MINIMO', 1024)
+
+    @app.after_request
+    def comprimir_resposta(resposta):
+        if (
+            request.method == 'HEAD'
+            or resposta.status_code < 200 or resposta.status_code in (204, 206, 304)
+            or resposta.direct_passthrough
+            or 'Content-Encoding' in resposta.headers
+            or not resposta.mimetype.startswith(TIPOS_COMPRIMIVEIS)
+            or 'no-transform' in resposta.headers.get('Cache-Control', '')
+        ):
+            return resposta
+
+        resposta.vary.add('Accept-Encoding')
+        codificacao = _codificacao()
+        if codificacao is None:
+            return resposta
+
+        if resposta.is_streamed:
+            resposta.response = _comprimir_stream(resposta.response, codificacao, niveis)
+            resposta.headers.pop('Content-Length', None)
+        else:
+            dados = resposta.get_data()
+            if len(dados) < tamanho_minimo:
+                return resposta
+            resposta.set_data(_comprimir(dados, codificacao, niveis))
+        resposta.content_encoding = codificacao
+
+        etag, fraca = resposta.get_etag()
+        if etag and not fraca:
+            resposta.set_etag(etag_codificado(etag, codificacao))
+        return resposta
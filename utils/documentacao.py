@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import inspect
+import json
+import re
+
+import yaml
+from flask import Response, current_app, request
+from yaml.constructor import ConstructorError
+
+from utils.cache_http import com_validadores, etag_codificado, nao_modificado
+
+# Campos aceitos em uma operação do Swagger 2.0 (além das extensões x-*)
+CAMPOS_OPERACAO = {
+    'tags', 'summary', 'description', 'externalDocs', 'operationId', 'consumes',
+    'produces', 'parameters', 'responses', 'schemes', 'deprecated', 'security'
+}
+METODOS = {'get', 'put', 'post', 'delete', 'options', 'head', 'patch'}
+# Spec padrão do flasgger (/apispec_1.json) e o endpoint da sua rota
+SPEC = 'apispec_1'
+ENDPOINT_SPEC = f'flasgger.{SPEC}'
+
+
+class _CarregadorEstrito(yaml.SafeLoader):
+    """Loader YAML que recusa chaves repetidas (o safe_load guarda a última em silêncio)."""
+
+    def construct_mapping(self, no, deep=False):
+        vistas = set()
+        for chave, _ in no.value:
+            valor = self.construct_object(chave, deep=deep)
+            if valor in vistas:
+                raise ConstructorError(None, None, f"chave duplicada '{valor}'", chave.start_mark)
+            vistas.add(valor)
+        return super().construct_mapping(no, deep=deep)
+
+
+def validar_docstrings(app):
+    """Erros de YAML (inclusive chaves duplicadas) nas docstrings das rotas."""
+    problemas = []
+    for endpoint, funcao in app.view_functions.items():
+        documentacao = inspect.getdoc(funcao) or ''
+        if '---' not in documentacao:
+            continue
+        try:
+            yaml.load(documentacao.split('---', 1)[1], Loader=_CarregadorEstrito)
+        except yaml.YAMLError as e:
+            problemas.append(f'{endpoint}: {e}'.replace('\n', ' '))
+    return problemas
+
+
+def validar_spec(spec):
+    """Problemas estruturais do spec gerado: campos desconhecidos nas operações,
+    operações sem ``responses`` e parâmetros de caminho não documentados."""
+    problemas = []
+    for caminho, operacoes in spec.get('paths', {}).items():
+        parametros_caminho = set(re.findall(r'{(\w+)}', caminho))
+        for metodo, operacao in operacoes.items():
+            if metodo not in METODOS:
+                continue
+            nome = f'{metodo.upper()} {caminho}'
+            for campo in operacao:
+                if campo not in CAMPOS_OPERACAO and not campo.startswith('x-'):
+                    problemas.append(f"{nome}: campo desconhecido '{campo}'")
+            if not operacao.get('responses'):
+                problemas.append(f'{nome}: sem responses')
+            documentados = {parametro.get('name') for parametro in operacao.get('parameters', []) if parametro.get('in') == 'path'}
+            for parametro in sorted(parametros_caminho - documentados):
+                problemas.append(f"{nome}: parâmetro de caminho '{parametro}' não documentado")
+    return problemas
+
+
+def gerar_spec(app):
+    """Monta o spec a partir das docstrings das rotas (o parse do flasgger)."""
+    with app.test_request_context():
+        return app.swag.get_apispecs(SPEC)
+
+
+def _guardar_spec(app, corpo):
+    app.extensions['spec'] = {
+        'corpo': corpo,
+        'gzip': gzip.compress(corpo, compresslevel=9, mtime=0),
+        'etag': hashlib.sha1(corpo).hexdigest()[:20]
+    }
+
+
+def spec_json(spec):
+    return json.dumps(spec, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def preparar_spec(app):
+    """Troca a rota ``/apispec_1.json`` do flasgger por uma que serve o spec pronto.
+
+    O spec vem de ``SWAGGER_SPEC_ARQUIVO`` (gerado no build com ``flask
+    gerar-spec``) ou é montado na primeira requisição, não na subida do
+    worker. Depois disso cada requisição é uma leitura de memória: o JSON
+    fica guardado também comprimido em gzip e é servido com ETag.
+    """
+    arquivo = app.config.get('SWAGGER_SPEC_ARQUIVO')
+    if arquivo:
+        with open(arquivo, 'rb') as f:
+            _guardar_spec(app, f.read())
+    app.view_functions[ENDPOINT_SPEC] = servir_spec
+
+
+def servir_spec():
+    app = current_app._get_current_object()
+    if 'spec' not in app.extensions:
+        # Duas requisições simultâneas no máximo geram o mesmo spec duas vezes
+        _guardar_spec(app, spec_json(gerar_spec(app)))
+    spec = app.extensions['spec']
+    codificacao = 'gzip' if request.accept_encodings['gzip'] > 0 else None
+    resposta = nao_modificado(spec['etag'])
+    if resposta is None:
+        resposta = Response(spec['gzip'] if codificacao else spec['corpo'], mimetype='application/json')
+        resposta.content_encoding = codificacao
+        resposta = com_validadores(resposta, etag_codificado(spec['etag'], codificacao))
+    resposta.vary.add('Accept-Encoding')
+    return resposta
@@ -0,0 +1,119 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from database import db
+# Registra todas as tabelas no metadata antes do create_all
+from models import aluno, professor, resumo_turma, turma, versao_tabela
+from utils.busca import criar_indices_busca
+from utils.versoes import criar_versoes
+
+
+def criar_esquema():
+    """Cria as tabelas, colunas e índices que faltam no banco primário.
+
+    Roda pelo comando ``flask criar-banco`` (no deploy, antes de subir os
+    workers), e não na inicialização da aplicação.
+    """
+    # Só no primário: as réplicas recebem o esquema pela replicação
+    db.create_all(bind_key=None)
+    # create_all não cria colunas nem índices novos em tabelas que já existem
+    inspetor = inspect(db.engine)
+    for tabela in db.metadata.sorted_tables:
+        existentes = {coluna['name'] for coluna in inspetor.get_columns(tabela.name)}
+        for coluna in tabela.columns:
+            if coluna.name not in existentes:
+                definicao = CreateColumn(coluna).compile(dialect=db.engine.dialect)
+                with db.engine.begin() as conexao:
+                    conexao.execute(text(f'ALTER TABLE {tabela.name} ADD COLUMN {definicao}'))
+    # Nem as regras ON DELETE das chaves estrangeiras (antes dos índices: a tabela pode ser recriada)
+    atualizar_chaves_estrangeiras(inspetor)
+    for tabela in db.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            indice.create(db.engine, checkfirst=True)
+    # Índices de busca textual (FTS5 no SQLite) e os triggers que os atualizam
+    criar_indices_busca()
+    # Linhas de versao_tabela usadas nos ETags das listagens
+    criar_versoes()
+
+
+def _chaves_divergentes(inspetor, tabela):
+    """Chaves estrangeiras do modelo cuja regra ON DELETE difere da do banco."""
+    no_banco = {
+        tuple(chave['constrained_columns']): (chave['name'], (chave['options'].get('ondelete') or '').upper())
+        for chave in inspetor.get_foreign_keys(tabela.name)
+    }
+    divergentes = []
+    for chave in tabela.foreign_key_constraints:
+        nome, regra = no_banco.get(tuple(chave.column_keys), (None, None))
+        if regra is not None and regra != (chave.ondelete or '').upper():
+            divergentes.append((chave, nome))
+    return divergentes
+
+
+def _recriar_tabela_sqlite(tabela):
+    """Recria a tabela com as chaves estrangeiras do modelo (o SQLite não altera restrições).
+
+    Segue o procedimento da documentação do SQLite: cria a tabela nova,
+    copia as linhas (com os mesmos ids), remove a antiga e renomeia a nova,
+    com as chaves estrangeiras desligadas. Índices e triggers de busca são
+    recriados em seguida por ``criar_esquema``. Linhas que apontam para
+    registros que não existem mais seguem a regra ON DELETE da chave.
+    """
+    nova = f'{tabela.name}_nova'
+    colunas = ', '.join(coluna.name for coluna in tabela.columns)
+    with db.engine.connect() as conexao:
+        # Só tem efeito fora de uma transação
+        anterior = conexao.exec_driver_sql('PRAGMA foreign_keys').scalar()
+        conexao.exec_driver_sql('PRAGMA foreign_keys=OFF')
+        conexao.commit()
+        try:
+            with conexao.begin():
+                definicao = str(CreateTable(tabela).compile(dialect=conexao.dialect))
+                conexao.exec_driver_sql(definicao.replace(f'CREATE TABLE {tabela.name} ', f'CREATE TABLE {nova} ', 1))
+                conexao.exec_driver_sql(f'INSERT INTO {nova} ({colunas}) SELECT {colunas} FROM {tabela.name}')
+                conexao.exec_driver_sql(f'DROP TABLE {tabela.name}')
+                conexao.exec_driver_sql(f'ALTER TABLE {nova} RENAME TO {tabela.name}')
+                for chave in tabela.foreign_key_constraints:
+                    coluna, = chave.column_keys
+                    referencia = chave.elements[0].column
+                    orfas = (
+                        f'{coluna} IS NOT NULL AND {coluna} NOT IN '
+                        f'(SELECT {referencia.name} FROM {referencia.table.name})'
+                    )
+                    if (chave.ondelete or '').upper() == 'CASCADE':
+                        conexao.exec_driver_sql(f'DELETE FROM {tabela.name} WHERE {orfas}')
+                    else:
+                        conexao.exec_driver_sql(f'UPDATE {tabela.name} SET {coluna} = NULL WHERE {orfas}')
+        finally:
+            conexao.exec_driver_sql(f'PRAGMA foreign_keys={anterior}')
+            conexao.commit()
+
+
+def atualizar_chaves_estrangeiras(inspetor=None):
+    """Aplica as regras ON DELETE dos modelos às chaves estrangeiras de tabelas existentes.
+
+    No SQLite as tabelas afetadas são recriadas; nos demais bancos a
+    restrição é removida e criada de novo com ``ALTER TABLE``. Retorna os
+    nomes das tabelas alteradas.
+    """
+    inspetor = inspetor or inspect(db.engine)
+    alteradas = []
+    for tabela in db.metadata.sorted_tables:
+        divergentes = _chaves_divergentes(inspetor, tabela)
+        if not divergentes:
+            continue
+        alteradas.append(tabela.name)
+        if db.engine.dialect.name == 'sqlite':
+            _recriar_tabela_sqlite(tabela)
+            continue
+        remover = 'DROP FOREIGN KEY' if db.engine.dialect.name == 'mysql' else 'DROP CONSTRAINT'
+        with db.engine.begin() as conexao:
+            for chave, nome in divergentes:
+                coluna, = chave.column_keys
+                referencia = chave.elements[0].column
+                conexao.exec_driver_sql(f'ALTER TABLE {tabela.name} {remover} {nome}')
+                conexao.exec_driver_sql(
+                    f'ALTER TABLE {tabela.name} ADD CONSTRAINT {nome} FOREIGN KEY ({coluna}) '
+                    f'REFERENCES {referencia.table.name} ({referencia.name}) ON DELETE {chave.ondelete}'
+                )
+    return alteradas
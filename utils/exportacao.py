@@ -0,0 +1,55 @@
+import csv
+import io
+
+from flask import Response, current_app, stream_with_context
+
+from database import db
+
+# Quantidade de linhas buscadas do cursor por vez
+TAMANHO_LOTE = 5000
+
+FORMATOS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def _gerar_csv(resultado, colunas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    for linhas in resultado.partitions():
+        escritor.writerows(linhas)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _gerar_ndjson(resultado, colunas):
+    # Datas saem em ISO 8601 pelo provedor JSON da aplicação
+    dumps = current_app.json.serializador_bytes(separators=(',', ':'))
+    for linhas in resultado.partitions():
+        yield b''.join(dumps(dict(zip(colunas, linha))) + b'\n' for linha in linhas)
+
+
+def exportar(consulta, formato, nome_arquivo):
+    """Envia o resultado de um SELECT de colunas em streaming (CSV ou NDJSON).
+
+    As linhas vêm do cursor do banco em lotes (``yield_per``, que usa cursor
+    no servidor quando o driver suporta) como tuplas, sem montar objetos do
+    ORM, então a memória é constante qualquer que seja o total de linhas.
+    """
+    colunas = [coluna.name for coluna in consulta.selected_columns]
+    gerador = _gerar_csv if formato == 'csv' else _gerar_ndjson
+
+    def gerar():
+        resultado = db.session.execute(consulta, execution_options={'yield_per': TAMANHO_LOTE})
+        try:
+            yield from gerador(resultado, colunas)
+        finally:
+            resultado.close()
+
+    resposta = Response(stream_with_context(gerar()), mimetype=FORMATOS[formato])
+    resposta.headers['Content-Disposition'] = f'attachment; filename={nome_arquivo}.{formato}'
+    return resposta
@@ -0,0 +1,312 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from itertools import islice
+
+from database import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava, um processo por pasta
+    fcntl = None
+
+
+class FilaCheia(Exception):
+    """A fila atingiu ``FILA_NOTAS_TAMANHO_MAXIMO`` alunos pendentes."""
+
+
+def _travar(arquivo):
+    """Trava exclusiva do diário; False se outro processo vivo o segura."""
+    if fcntl is None:
+        return True
+    try:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _mesmo_arquivo(arquivo, caminho):
+    """Indica se o caminho ainda aponta para o arquivo aberto (não foi trocado por os.replace)."""
+    try:
+        return os.path.samestat(os.fstat(arquivo.fileno()), os.stat(caminho))
+    except FileNotFoundError:
+        return False
+
+
+def _remover_temporarios(pasta):
+    """Remove os temporários de reescrita deixados por processos encerrados.
+
+    Uma queda entre a criação do temporário e o os.replace deixa o arquivo
+    para trás; o diário correspondente continua inteiro, então o conteúdo
+    dele não precisa ser reaplicado. O temporário de um processo vivo está
+    travado e fica onde está.
+    """
+    for caminho in glob.glob(os.path.join(pasta, '*.jsonl.tmp')):
+        try:
+            arquivo = open(caminho, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            continue
+        with arquivo:
+            if _travar(arquivo) and _mesmo_arquivo(arquivo, caminho):
+                os.remove(caminho)
+
+
+def _ler_diario(arquivo):
+    """Notas registradas no diário, na ordem em que chegaram."""
+    arquivo.seek(0)
+    entradas = []
+    for linha in arquivo:
+        try:
+            entrada = json.loads(linha)
+        except ValueError:
+            # Linha cortada por uma queda no meio da escrita
+            continue
+        entradas.append((entrada['id'], entrada['campos']))
+    return entradas
+
+
+class FilaNotas:
+    """Fila de notas com gravação em segundo plano (write-behind).
+
+    Cada envio é anotado em um diário local (um arquivo JSON lines por
+    processo em ``pasta``, travado enquanto o processo vive) antes de ser aceito, e fica pendente em memória
+    junto com os envios anteriores do mesmo aluno. Uma thread grava os
+    pendentes em lotes de até ``tamanho_lote`` alunos, uma transação por
+    lote, ``intervalo`` segundos depois da chegada do primeiro. Depois do
+    commit o diário é reescrito só com o que continua pendente; na
+    inicialização os diários de processos encerrados são reaplicados.
+
+    ``aplicar`` recebe a lista de pares ``(id, campos)`` e grava sem commit,
+    retornando o resultado de cada par (como ``atualizar_alunos``).
+    """
+
+    def __init__(self, app, aplicar, pasta, tamanho_maximo=10000, tamanho_lote=1000, intervalo=0.05, fsync=False):
+        self._app = app
+        self._aplicar = aplicar
+        self._pasta = pasta
+        self._tamanho_maximo = tamanho_maximo
+        self._tamanho_lote = tamanho_lote
+        self._intervalo = intervalo
+        self._fsync = fsync
+        self._condicao = threading.Condition()
+        # Uma gravação por vez (a thread e o esvaziamento na saída)
+        self._trava_gravacao = threading.Lock()
+        self._pid = None
+        self._reiniciar()
+
+    def _reiniciar(self):
+        # id do aluno -> [campos, instante do envio mais antigo ainda não gravado]
+        self._pendentes = {}
+        self._em_gravacao = 0
+        self._diario = None
+        self._caminho = None
+        self._contadores = {'recebidas': 0, 'coalescidas': 0, 'gravadas': 0, 'descartadas': 0, 'lotes': 0, 'falhas': 0}
+        self._ultimo_lote = None
+
+    def _garantir_iniciada(self):
+        """Abre o diário e inicia a thread no processo atual (também depois de um fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._condicao:
+            if self._pid == os.getpid():
+                return
+            self._reiniciar()
+            os.makedirs(self._pasta, exist_ok=True)
+            # Nome único: um pid repetido não reaproveita o diário de outro processo
+            caminho = self._caminho = os.path.join(self._pasta, f'{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl')
+            self._diario = open(caminho, 'a+', encoding='utf-8')
+            if not _travar(self._diario):
+                raise RuntimeError(f'Não foi possível travar o diário da fila de notas {caminho}')
+            # Recupera o que ficou nos diários de processos encerrados
+            adotados = []
+            for outro in sorted(glob.glob(os.path.join(self._pasta, '*.jsonl'))):
+                if outro == caminho:
+                    continue
+                try:
+                    arquivo = open(outro, 'r+', encoding='utf-8')
+                except FileNotFoundError:
+                    continue
+                # Travado por um processo vivo, ou trocado (reescrito) depois de aberto aqui
+                if not _travar(arquivo) or not _mesmo_arquivo(arquivo, outro):
+                    arquivo.close()
+                    continue
+                adotados.append((outro, arquivo))
+                for id, campos in _ler_diario(arquivo):
+                    self._juntar(id, campos, time.time())
+            self._reescrever_diario()
+            for outro, arquivo in adotados:
+                os.remove(outro)
+                arquivo.close()
+            _remover_temporarios(self._pasta)
+            self._pid = os.getpid()
+            threading.Thread(target=self._trabalhar, name='fila-notas', daemon=True).start()
+            atexit.register(self.esvaziar)
+            if self._pendentes:
+                self._condicao.notify()
+
+    def _juntar(self, id, campos, instante):
+        pendente = self._pendentes.get(id)
+        if pendente is None:
+            self._pendentes[id] = [dict(campos), instante]
+            return False
+        pendente[0].update(campos)
+        return True
+
+    def _escrever(self, linhas):
+        self._diario.write(''.join(linhas))
+        self._diario.flush()
+        if self._fsync:
+            os.fsync(self._diario.fileno())
+
+    def _reescrever_diario(self):
+        """Deixa no diário só os pendentes (chamado com a condição travada).
+
+        O novo conteúdo vai para um arquivo temporário, travado antes do
+        os.replace: o caminho do diário sempre aponta para um arquivo
+        travado por este processo, e uma queda no meio deixa o diário antigo
+        inteiro (que só tem envios a mais, reaplicados na ordem).
+        """
+        if not self._pendentes:
+            self._diario.seek(0)
+            self._diario.truncate()
+            return
+        linhas = [json.dumps({'id': id, 'campos': campos}) + '\n' for id, (campos, _) in self._pendentes.items()]
+        temporario = f'{self._caminho}.tmp'
+        novo = open(temporario, 'w+', encoding='utf-8')
+        if not _travar(novo):
+            novo.close()
+            raise RuntimeError(f'Não foi possível travar o diário da fila de notas {temporario}')
+        try:
+            novo.write(''.join(linhas))
+            novo.flush()
+            if self._fsync:
+                os.fsync(novo.fileno())
+            os.replace(temporario, self._caminho)
+        except BaseException:
+            novo.close()
+            raise
+        # O arquivo aberto continua o mesmo (e travado) com o novo nome
+        self._diario.close()
+        self._diario = novo
+
+    def enfileirar(self, id, campos):
+        """Registra as notas de um aluno no diário e as deixa pendentes.
+
+        Lança FilaCheia se há ``tamanho_maximo`` alunos pendentes e este não
+        é um deles.
+        """
+        self._garantir_iniciada()
+        with self._condicao:
+            if id not in self._pendentes and len(self._pendentes) >= self._tamanho_maximo:
+                raise FilaCheia()
+            self._escrever([json.dumps({'id': id, 'campos': campos}) + '\n'])
+            self._contadores['recebidas'] += 1
+            if self._juntar(id, campos, time.time()):
+                self._contadores['coalescidas'] += 1
+            self._condicao.notify()
+
+    def _trabalhar(self):
+        while True:
+            try:
+                with self._condicao:
+                    while not self._pendentes:
+                        self._condicao.wait()
+                # Espera a rajada: envios do mesmo aluno no intervalo viram uma gravação
+                time.sleep(self._intervalo)
+                if not self.gravar():
+                    time.sleep(min(1.0, self._intervalo * 10))
+            except Exception:
+                # Ex.: OSError ao reescrever o diário depois do commit; a thread não pode morrer
+                self._app.logger.exception('Erro na thread da fila de notas; nova tentativa em seguida')
+                time.sleep(min(1.0, self._intervalo * 10))
+
+    def gravar(self):
+        """Grava um lote de pendentes em uma transação; retorna False se ela falhou."""
+        with self._trava_gravacao:
+            with self._condicao:
+                lote = {id: self._pendentes.pop(id) for id in list(islice(self._pendentes, self._tamanho_lote))}
+                self._em_gravacao = len(lote)
+            if not lote:
+                return True
+            inicio = time.perf_counter()
+            with self._app.app_context():
+                try:
+                    resultados = self._aplicar([(id, dict(campos)) for id, (campos, _) in lote.items()])
+                    db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    self._app.logger.exception('Falha ao gravar %d notas da fila; nova tentativa em seguida', len(lote))
+                    with self._condicao:
+                        # Volta para a fila sem sobrescrever envios mais novos do mesmo aluno
+                        for id, (campos, instante) in lote.items():
+                            novos = self._pendentes.pop(id, None)
+                            self._pendentes[id] = [{**campos, **(novos[0] if novos else {})}, instante]
+                        self._em_gravacao = 0
+                        self._contadores['falhas'] += 1
+                    return False
+            duracao = time.perf_counter() - inicio
+            with self._condicao:
+                descartadas = sum(1 for resultado in resultados if resultado['status'] != 200)
+                self._contadores['gravadas'] += len(lote) - descartadas
+                self._contadores['descartadas'] += descartadas
+                self._contadores['lotes'] += 1
+                self._ultimo_lote = {
+                    'alunos': len(lote),
+                    'duracao_ms': round(duracao * 1000, 3),
+                    'atraso_s': round(time.time() - min(instante for _, instante in lote.values()), 3)
+                }
+                self._em_gravacao = 0
+                self._reescrever_diario()
+            if descartadas:
+                self._app.logger.warning('%d notas da fila descartadas (aluno ou turma removidos)', descartadas)
+            return True
+
+    def esvaziar(self):
+        """Grava tudo o que está pendente (na saída do processo)."""
+        if self._pid != os.getpid():
+            return
+        while self._pendentes:
+            if not self.gravar():
+                break
+
+    def estado(self):
+        """Pendentes, atraso do envio mais antigo não gravado e contadores."""
+        self._garantir_iniciada()
+        with self._condicao:
+            instantes = [instante for _, instante in self._pendentes.values()]
+            return {
+                'habilitada': True,
+                'pendentes': len(self._pendentes),
+                'em_gravacao': self._em_gravacao,
+                'atraso_s': round(time.time() - min(instantes), 3) if instantes else 0.0,
+                'tamanho_maximo': self._tamanho_maximo,
+                **self._contadores,
+                'ultimo_lote': self._ultimo_lote
+            }
+
+
+def iniciar_fila_notas(app, aplicar):
+    """Cria a fila de notas se ``FILA_NOTAS_HABILITADA`` (senão as notas são gravadas na hora).
+
+    A thread e o diário só são criados na primeira requisição de cada
+    processo, para funcionar com servidores que fazem fork dos workers.
+    """
+    if not app.config.get('FILA_NOTAS_HABILITADA', False):
+        return
+    fila = app.extensions['fila_notas'] = FilaNotas(
+        app, aplicar, app.config.get('FILA_NOTAS_PASTA', 'fila_notas'),
+        tamanho_maximo=app.config.get('FILA_NOTAS_TAMANHO_MAXIMO', 10000),
+        tamanho_lote=app.config.get('FILA_NOTAS_TAMANHO_LOTE', 1000),
+        intervalo=app.config.get('FILA_NOTAS_INTERVALO_MS', 50) / 1000,
+        fsync=app.config.get('FILA_NOTAS_FSYNC', False)
+    )
+
+    @app.before_request
+    def iniciar_fila():
+        # Reaplica diários deixados por processos encerrados já na primeira requisição
+        fila._garantir_iniciada()
@@ -0,0 +1,108 @@
+import csv
+import io
+import json
+
+from flask import current_app
+
+from database import db
+from utils.validacao import ErroValidacao
+
+# Quantidade de linhas gravadas por commit
+TAMANHO_LOTE_PADRAO = 1000
+# Quantidade máxima de linhas rejeitadas detalhadas no resumo
+MAXIMO_REJEITADOS = 1000
+
+
+def abrir_texto(fluxo):
+    """Envolve um fluxo binário em texto UTF-8 (aceita BOM), sem lê-lo inteiro."""
+    return io.TextIOWrapper(fluxo, encoding='utf-8-sig', newline='')
+
+
+def detectar_formato(nome_arquivo=None, content_type=None):
+    """Deduz o formato pela extensão do arquivo ou pelo Content-Type (padrão CSV)."""
+    nome_arquivo = (nome_arquivo or '').lower()
+    content_type = content_type or ''
+    if nome_arquivo.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type:
+        return 'ndjson'
+    return 'csv'
+
+
+def ler_registros(arquivo, formato, converter_csv=None):
+    """Lê o arquivo linha a linha e gera ``(numero_linha, registro)``.
+
+    No CSV a primeira linha é o cabeçalho e cada linha é passada por
+    ``converter_csv``. Linhas que não puderem ser lidas geram um
+    ErroValidacao no lugar do registro.
+    """
+    if formato == 'csv':
+        leitor = csv.DictReader(arquivo)
+        for linha in leitor:
+            try:
+                yield leitor.line_num, converter_csv(linha) if converter_csv else linha
+            except ErroValidacao as e:
+                yield leitor.line_num, e
+    elif formato == 'ndjson':
+        for numero, linha in enumerate(arquivo, start=1):
+            if not linha.strip():
+                continue
+            try:
+                yield numero, json.loads(linha)
+            except ValueError:
+                yield numero, ErroValidacao('JSON inválido')
+    else:
+        raise ErroValidacao("Formato deve ser 'csv' ou 'ndjson'")
+
+
+def importar(registros, processar_lote, tamanho_lote=TAMANHO_LOTE_PADRAO, progresso=None):
+    """Grava os registros em lotes, com um commit por lote.
+
+    ``processar_lote`` recebe a lista de registros e retorna o resultado de
+    cada um (com ``indice`` e ``status``), como os endpoints de lote. Só o
+    lote atual fica em memória. ``progresso`` é chamado com o resumo
+    parcial após cada commit. Se um lote falhar, os lotes anteriores
+    continuam gravados e a exceção é propagada.
+    """
+    resumo = {'processados': 0, 'importados': 0, 'rejeitados': 0, 'erros': []}
+
+    def rejeitar(numero, message):
+        resumo['rejeitados'] += 1
+        if len(resumo['erros']) < MAXIMO_REJEITADOS:
+            resumo['erros'].append({'linha': numero, 'message': message})
+
+    def gravar(lote, numeros):
+        try:
+            resultados = processar_lote(lote)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for resultado in resultados:
+            if resultado['status'] < 300:
+                resumo['importados'] += 1
+            else:
+                rejeitar(numeros[resultado['indice']], resultado['message'])
+        resumo['processados'] += len(lote)
+        if progresso:
+            progresso(resumo)
+
+    lote, numeros = [], []
+    for numero, registro in registros:
+        if isinstance(registro, ErroValidacao):
+            resumo['processados'] += 1
+            rejeitar(numero, registro.message)
+            continue
+        lote.append(registro)
+        numeros.append(numero)
+        if len(lote) >= tamanho_lote:
+            gravar(lote, numeros)
+            lote, numeros = [], []
+    if lote:
+        gravar(lote, numeros)
+    return resumo
+
+
+def registrar_progresso(resumo):
+    current_app.logger.info(
+        'Importação: %d linhas processadas, %d importadas, %d rejeitadas',
+        resumo['processados'], resumo['importados'], resumo['rejeitados']
+    )
@@ -0,0 +1,279 @@
+import os
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import ExecuteStyle
+from sqlalchemy.orm import Session
+
+from database import db
+
+# Medição da requisição atual (None fora de requisições ou com a instrumentação desligada)
+_medicao = ContextVar('medicao', default=None)
+# Lote do insertmanyvalues com RETURNING cujas linhas ainda não foram contadas, em connection.info
+CHAVE_RETURNING_PENDENTE = 'instrumentacao_returning_pendente'
+# Um profiler por vez: no Python 3.12+ o cProfile é global ao interpretador
+_trava_perfil = threading.Lock()
+
+
+class Medicao:
+    """Tempos e statements SQL de uma requisição."""
+
+    __slots__ = ('inicio', 'statements', 'tempo_banco', 'linhas', 'inicio_commit', 'tempo_commit', 'consultas')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.statements = 0
+        self.tempo_banco = 0.0
+        self.linhas = 0
+        self.inicio_commit = None
+        self.tempo_commit = 0.0
+        # [sql, segundos, linhas] de cada statement, para o log das requisições lentas
+        self.consultas = []
+
+
+class _CursorContado:
+    """Cursor DBAPI que conta as linhas lidas pelo SQLAlchemy (SELECT não tem rowcount)."""
+
+    __slots__ = ('_cursor', '_consulta', '_medicao')
+
+    def __init__(self, cursor, consulta, medicao):
+        self._cursor = cursor
+        self._consulta = consulta
+        self._medicao = medicao
+
+    def _contar(self, quantidade):
+        self._consulta[2] += quantidade
+        self._medicao.linhas += quantidade
+
+    def fetchone(self):
+        linha = self._cursor.fetchone()
+        if linha is not None:
+            self._contar(1)
+        return linha
+
+    def fetchmany(self, *args):
+        linhas = self._cursor.fetchmany(*args)
+        self._contar(len(linhas))
+        return linhas
+
+    def fetchall(self):
+        linhas = self._cursor.fetchall()
+        self._contar(len(linhas))
+        return linhas
+
+    def __iter__(self):
+        for linha in self._cursor:
+            self._contar(1)
+            yield linha
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+def _contar_returning_pendente(conexao):
+    # As linhas do RETURNING de cada lote do insertmanyvalues são lidas pelo
+    # SQLAlchemy do cursor original, depois do after_cursor_execute e sem
+    # passar pelo _CursorContado; lidas todas, o rowcount do cursor as conta
+    pendente = conexao.info.pop(CHAVE_RETURNING_PENDENTE, None)
+    if pendente is None:
+        return
+    cursor, consulta, medicao = pendente
+    if cursor.rowcount > 0:
+        consulta[2] += cursor.rowcount
+        medicao.linhas += cursor.rowcount
+
+
+def _depois_execucao(conexao, *args):
+    _contar_returning_pendente(conexao)
+
+
+def _antes_statement(conexao, cursor, statement, parametros, contexto, executemany):
+    _contar_returning_pendente(conexao)
+    if _medicao.get() is not None:
+        conexao.info['inicio_statement'] = time.perf_counter()
+
+
+def _depois_statement(conexao, cursor, statement, parametros, contexto, executemany):
+    medicao = _medicao.get()
+    inicio = conexao.info.pop('inicio_statement', None)
+    if medicao is None or inicio is None:
+        return
+    duracao = time.perf_counter() - inicio
+    medicao.statements += 1
+    medicao.tempo_banco += duracao
+    consulta = [statement, duracao, 0]
+    medicao.consultas.append(consulta)
+    if cursor.description is not None and contexto is not None and contexto.execute_style is ExecuteStyle.INSERTMANYVALUES:
+        # Contadas no próximo statement ou no fim da execução, depois de lidas
+        conexao.info[CHAVE_RETURNING_PENDENTE] = (cursor, consulta, medicao)
+    elif cursor.description is not None:
+        # Linhas contadas à medida que o resultado é lido
+        contexto.cursor = _CursorContado(cursor, consulta, medicao)
+    elif cursor.rowcount > 0:
+        consulta[2] = cursor.rowcount
+        medicao.linhas += cursor.rowcount
+
+
+def _antes_commit(conexao):
+    medicao = _medicao.get()
+    if medicao is not None:
+        medicao.inicio_commit = time.perf_counter()
+
+
+def _depois_commit(sessao):
+    medicao = _medicao.get()
+    if medicao is not None and medicao.inicio_commit is not None:
+        medicao.tempo_commit += time.perf_counter() - medicao.inicio_commit
+        medicao.inicio_commit = None
+
+
+def _ms(segundos):
+    return round(segundos * 1000, 3)
+
+
+def server_timing(medicao, total):
+    """Valor do header ``Server-Timing``: banco, commit, aplicação e total, em ms."""
+    aplicacao = max(0.0, total - medicao.tempo_banco - medicao.tempo_commit)
+    return (
+        f'db;dur={_ms(medicao.tempo_banco)};desc="{medicao.statements} statements, {medicao.linhas} linhas", '
+        f'commit;dur={_ms(medicao.tempo_commit)}, app;dur={_ms(aplicacao)}, total;dur={_ms(total)}'
+    )
+
+
+class Estatisticas:
+    """Totais por endpoint: requisições, tempo, statements, tempo de banco e linhas."""
+
+    def __init__(self):
+        self._totais = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, endpoint, medicao, total):
+        with self._trava:
+            totais = self._totais.setdefault(endpoint, [0, 0.0, 0.0, 0, 0.0, 0])
+            totais[0] += 1
+            totais[1] += total
+            totais[2] = max(totais[2], total)
+            totais[3] += medicao.statements
+            totais[4] += medicao.tempo_banco + medicao.tempo_commit
+            totais[5] += medicao.linhas
+
+    def resumo(self):
+        with self._trava:
+            itens = sorted(self._totais.items(), key=lambda item: item[1][1], reverse=True)
+        return [
+            {
+                'endpoint': endpoint,
+                'requisicoes': requisicoes,
+                'tempo_medio_ms': _ms(tempo / requisicoes),
+                'tempo_maximo_ms': _ms(maximo),
+                'statements_por_requisicao': round(statements / requisicoes, 2),
+                'tempo_banco_medio_ms': _ms(tempo_banco / requisicoes),
+                'linhas_por_requisicao': round(linhas / requisicoes, 2)
+            }
+            for endpoint, (requisicoes, tempo, maximo, statements, tempo_banco, linhas) in itens
+        ]
+
+
+def _criar_profiler(ferramenta):
+    if ferramenta == 'pyinstrument':
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        return profiler, profiler.start, profiler.stop
+    import cProfile
+
+    profiler = cProfile.Profile()
+    return profiler, profiler.enable, profiler.disable
+
+
+def _gravar_perfil(pasta, ferramenta, profiler, total):
+    nome = re.sub(r'[^\w.-]', '_', request.endpoint or 'desconhecido')
+    base = os.path.join(pasta, f'{time.strftime("%Y%m%d-%H%M%S")}-{nome}-{round(total * 1000)}ms')
+    os.makedirs(pasta, exist_ok=True)
+    if ferramenta == 'pyinstrument':
+        caminho = f'{base}.html'
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+    else:
+        caminho = f'{base}.prof'
+        profiler.dump_stats(caminho)
+    return caminho
+
+
+def iniciar_instrumentacao(app):
+    """Mede cada requisição: tempo total, statements SQL, tempo de banco e de commit e linhas.
+
+    Os números vão no header ``Server-Timing`` e nos totais por endpoint
+    (``GET /sistema/instrumentacao``); requisições acima de
+    ``INSTRUMENTACAO_LIMITE_LENTA_MS`` são logadas com cada statement. Com
+    ``PERFIL_AMOSTRAGEM`` (fração das requisições) elas também são
+    perfiladas com cProfile ou pyinstrument, e o perfil das lentas é
+    gravado em ``PERFIL_PASTA``. Desligada (padrão), nenhum listener é
+    registrado.
+    """
+    if not app.config.get('INSTRUMENTACAO_HABILITADA', False):
+        return
+    limite = app.config.get('INSTRUMENTACAO_LIMITE_LENTA_MS', 500) / 1000
+    amostragem = app.config.get('PERFIL_AMOSTRAGEM', 0.0)
+    ferramenta = app.config.get('PERFIL_FERRAMENTA', 'cprofile')
+    pasta = app.config.get('PERFIL_PASTA', 'perfis')
+    if amostragem and ferramenta == 'pyinstrument':
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError as e:
+            raise ImportError('PERFIL_FERRAMENTA=pyinstrument precisa do pacote: pip install pyinstrument') from e
+
+    estatisticas = app.extensions['instrumentacao'] = Estatisticas()
+    with app.app_context():
+        for engine in db.engines.values():
+            if not event.contains(engine, 'after_cursor_execute', _depois_statement):
+                event.listen(engine, 'before_cursor_execute', _antes_statement)
+                event.listen(engine, 'after_cursor_execute', _depois_statement)
+                event.listen(engine, 'after_execute', _depois_execucao)
+                event.listen(engine, 'commit', _antes_commit)
+    if not event.contains(Session, 'after_commit', _depois_commit):
+        event.listen(Session, 'after_commit', _depois_commit)
+
+    @app.before_request
+    def iniciar_medicao():
+        _medicao.set(Medicao())
+        if amostragem and random.random() < amostragem and _trava_perfil.acquire(blocking=False):
+            g.perfil = _criar_profiler(ferramenta)
+            g.perfil[1]()
+
+    @app.after_request
+    def registrar_medicao(resposta):
+        # Em streaming mede até o início do corpo (o resto é gerado depois)
+        medicao = _medicao.get()
+        if medicao is None:
+            return resposta
+        total = time.perf_counter() - medicao.inicio
+        resposta.headers['Server-Timing'] = server_timing(medicao, total)
+        estatisticas.registrar(request.endpoint or 'desconhecido', medicao, total)
+        if total >= limite:
+            app.logger.warning(
+                'Requisição lenta: %s %s %.1f ms, %d statements (%.1f ms), commit %.1f ms, %d linhas\n%s',
+                request.method, request.full_path, total * 1000, medicao.statements, medicao.tempo_banco * 1000,
+                medicao.tempo_commit * 1000, medicao.linhas,
+                '\n'.join(f'  {duracao * 1000:8.2f} ms {linhas:6} linhas  {" ".join(sql.split())[:300]}' for sql, duracao, linhas in medicao.consultas)
+            )
+        return resposta
+
+    @app.teardown_request
+    def encerrar_medicao(erro=None):
+        perfil = g.pop('perfil', None)
+        if perfil is not None:
+            profiler, _, parar = perfil
+            parar()
+            _trava_perfil.release()
+            medicao = _medicao.get()
+            total = time.perf_counter() - medicao.inicio
+            if total >= limite:
+                caminho = _gravar_perfil(pasta, ferramenta, profiler, total)
+                app.logger.warning('Perfil da requisição lenta gravado em %s', caminho)
+        _medicao.set(None)
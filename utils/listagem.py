@@ -0,0 +1,228 @@
+from datetime import datetime
+from itertools import islice
+
+from flask import Response, current_app, jsonify, request, stream_with_context, url_for
+from sqlalchemy import Boolean, Date, Float, Integer, and_, or_
+from sqlalchemy.orm import raiseload, selectinload
+
+from database import db
+
+# Limites da paginação por cursor (keyset no id)
+LIMITE_MAXIMO = 1000
+# Quantidade de linhas buscadas por vez no modo streaming
+TAMANHO_LOTE = 1000
+
+
+class ParametroInvalido(ValueError):
+    """Parâmetro de query string inválido (responde 400)."""
+
+
+def ler_inteiro(nome, minimo=None, maximo=None):
+    """Lê um parâmetro inteiro da query string, ou None se ausente."""
+    valor = request.args.get(nome)
+    if valor is None or valor == '':
+        return None
+    try:
+        valor = int(valor)
+    except ValueError:
+        raise ParametroInvalido(f"Parâmetro '{nome}' deve ser um inteiro")
+    if minimo is not None and valor < minimo:
+        raise ParametroInvalido(f"Parâmetro '{nome}' deve ser maior ou igual a {minimo}")
+    if maximo is not None and valor > maximo:
+        raise ParametroInvalido(f"Parâmetro '{nome}' deve ser menor ou igual a {maximo}")
+    return valor
+
+
+def ler_inclusoes(modelo, permitidas):
+    """Lê os relacionamentos pedidos em ``incluir`` (ou ``include``).
+
+    Retorna os nomes e as opções de carregamento: cada relacionamento é
+    buscado com selectinload (uma consulta IN por relacionamento e lote,
+    qualquer que seja a quantidade de registros) e qualquer outro acesso
+    preguiçoso a relacionamentos levanta erro em vez de gerar N+1 consultas.
+    """
+    valor = request.args.get('incluir', request.args.get('include', ''))
+    nomes = tuple(dict.fromkeys(nome.strip() for nome in valor.split(',') if nome.strip()))
+    if not set(nomes) <= set(permitidas):
+        raise ParametroInvalido(f"Parâmetro 'incluir' aceita apenas: {', '.join(permitidas)}")
+    if not nomes:
+        return nomes, []
+    return nomes, [*(selectinload(getattr(modelo, nome)) for nome in nomes), raiseload('*')]
+
+
+def _converter(modelo, campo, valor):
+    """Converte o valor textual da query string para o tipo da coluna."""
+    tipo = modelo.__table__.c[campo].type
+    try:
+        if isinstance(tipo, Boolean):
+            if valor.lower() not in ('true', 'false', '1', '0'):
+                raise ValueError
+            return valor.lower() in ('true', '1')
+        if isinstance(tipo, Integer):
+            return int(valor)
+        if isinstance(tipo, Float):
+            return float(valor)
+        if isinstance(tipo, Date):
+            return datetime.strptime(valor, '%Y-%m-%d').date()
+        return valor
+    except ValueError:
+        raise ParametroInvalido(f"Valor inválido para o parâmetro '{campo}'")
+
+
+def filtrar(query, modelo, igualdade=(), intervalo=()):
+    """Aplica os filtros da query string.
+
+    Campos de ``igualdade`` são comparados com ``campo=valor`` (``null``
+    busca valores nulos). Campos de ``intervalo`` aceitam ``campo_min`` e
+    ``campo_max`` (inclusivos).
+    """
+    for campo in igualdade:
+        valor = request.args.get(campo)
+        if valor is None:
+            continue
+        coluna = getattr(modelo, campo)
+        if valor == 'null':
+            query = query.filter(coluna.is_(None))
+        else:
+            query = query.filter(coluna == _converter(modelo, campo, valor))
+    for campo in intervalo:
+        coluna = getattr(modelo, campo)
+        minimo = request.args.get(f'{campo}_min')
+        maximo = request.args.get(f'{campo}_max')
+        if minimo is not None:
+            query = query.filter(coluna >= _converter(modelo, campo, minimo))
+        if maximo is not None:
+            query = query.filter(coluna <= _converter(modelo, campo, maximo))
+    return query
+
+
+def filtros_informados(igualdade=(), intervalo=()):
+    """Indica se a query string tem algum dos filtros aceitos por ``filtrar``."""
+    nomes = list(igualdade) + [f'{campo}_{limite}' for campo in intervalo for limite in ('min', 'max')]
+    return any(nome in request.args for nome in nomes)
+
+
+def _ordenar(query, modelo, ordenaveis, after):
+    """Ordena por ``sort`` (``-campo`` para decrescente) com desempate por id.
+
+    O cursor ``after`` continua sendo um id: o valor do campo ordenado é lido
+    do registro do cursor para montar a condição de keyset. Valores nulos
+    ficam sempre no final.
+    """
+    sort = request.args.get('sort', 'id')
+    decrescente = sort.startswith('-')
+    campo = sort.lstrip('-')
+    if campo not in ordenaveis:
+        raise ParametroInvalido(f"Parâmetro 'sort' deve ser um de: {', '.join(ordenaveis)}")
+
+    if campo == 'id':
+        if after is not None:
+            query = query.filter(modelo.id < after if decrescente else modelo.id > after)
+        return query.order_by(modelo.id.desc() if decrescente else modelo.id)
+
+    coluna = getattr(modelo, campo)
+    anulavel = modelo.__table__.c[campo].nullable
+
+    if after is not None:
+        ancora = db.session.query(coluna).filter(modelo.id == after).first()
+        if ancora is None:
+            raise ParametroInvalido("Cursor 'after' não encontrado")
+        valor = ancora[0]
+        if valor is None:
+            query = query.filter(coluna.is_(None), modelo.id > after)
+        else:
+            condicoes = [
+                coluna < valor if decrescente else coluna > valor,
+                and_(coluna == valor, modelo.id > after),
+            ]
+            if anulavel:
+                condicoes.append(coluna.is_(None))
+            query = query.filter(or_(*condicoes))
+
+    ordem = [coluna.desc() if decrescente else coluna, modelo.id]
+    if anulavel:
+        ordem.insert(0, coluna.is_(None))
+    return query.order_by(*ordem)
+
+
+def _serializador():
+    return current_app.json.serializador_bytes(separators=(',', ':'))
+
+
+def _lotes(linhas):
+    linhas = iter(linhas)
+    while lote := list(islice(linhas, TAMANHO_LOTE)):
+        yield lote
+
+
+def _gerar_json(linhas, serializar):
+    # Monta o array JSON em pedaços, um por lote (serializado de uma vez), sem guardar a lista inteira
+    dumps = _serializador()
+    yield b'['
+    separador = b''
+    for lote in _lotes(linhas):
+        yield separador + dumps([serializar(linha) for linha in lote])[1:-1]
+        separador = b','
+    yield b']\n'
+
+
+def _gerar_ndjson(linhas, serializar):
+    dumps = _serializador()
+    for lote in _lotes(linhas):
+        yield b''.join(dumps(serializar(linha)) + b'\n' for linha in lote)
+
+
+def _serializar_linha(linha):
+    return linha._asdict()
+
+
+def listar(query, modelo, incluir=(), ordenaveis=('id',)):
+    """Responde uma listagem ordenada por id ou pelo campo de ``sort``.
+
+    Sem relacionamentos em ``incluir`` a consulta lê só as colunas de
+    ``modelo.CAMPOS`` e serializa as tuplas direto, sem montar objetos do
+    ORM; com eles usa ``serialize(incluir)`` de cada objeto.
+
+    Com ``limit`` (e opcionalmente ``after``) devolve uma página e indica o
+    próximo cursor nos headers ``X-Proximo-Cursor`` e ``Link``. Sem ``limit``
+    o resultado é enviado em streaming, lido do banco em lotes com
+    ``yield_per``, de modo que a memória não cresce com o tamanho da tabela.
+    ``formato=ndjson`` troca o array JSON por um objeto por linha.
+    """
+    formato = request.args.get('formato', 'json')
+    if formato not in ('json', 'ndjson'):
+        raise ParametroInvalido("Parâmetro 'formato' deve ser 'json' ou 'ndjson'")
+    limite = ler_inteiro('limit', minimo=1, maximo=LIMITE_MAXIMO)
+    after = ler_inteiro('after')
+
+    query = _ordenar(query, modelo, ordenaveis, after)
+    if incluir:
+        serializar = lambda obj: obj.serialize(incluir)
+    else:
+        query = query.with_entities(*(getattr(modelo, campo) for campo in modelo.CAMPOS))
+        serializar = _serializar_linha
+
+    if limite is None:
+        gerador = _gerar_ndjson if formato == 'ndjson' else _gerar_json
+        mimetype = 'application/x-ndjson' if formato == 'ndjson' else 'application/json'
+        linhas = query.yield_per(TAMANHO_LOTE)
+        return Response(stream_with_context(gerador(linhas, serializar)), mimetype=mimetype)
+
+    # Busca um item a mais para saber se existe próxima página
+    itens = query.limit(limite + 1).all()
+    proximo = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        proximo = itens[-1].id
+
+    if formato == 'ndjson':
+        resposta = Response(b''.join(_gerar_ndjson(itens, serializar)), mimetype='application/x-ndjson')
+    else:
+        resposta = jsonify([serializar(item) for item in itens])
+
+    if proximo is not None:
+        args = request.args.to_dict()
+        args['after'] = proximo
+        resposta.headers['X-Proximo-Cursor'] = str(proximo)
+        resposta.headers['Link'] = f'<{url_for(request.endpoint, **request.view_args, **args)}>; rel="next"'
+    return resposta
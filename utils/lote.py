@@ -0,0 +1,96 @@
+from flask import jsonify, request
+from sqlalchemy import insert
+
+from database import db
+from utils.validacao import ErroValidacao
+
+# Quantidade máxima de itens aceitos em uma requisição de lote
+TAMANHO_MAXIMO_LOTE = 50000
+# Quantidade de parâmetros por cláusula IN (o SQLite limita variáveis por statement)
+TAMANHO_BLOCO_IN = 500
+
+
+def em_blocos(itens, tamanho=TAMANHO_BLOCO_IN):
+    """Divide uma sequência em blocos de no máximo ``tamanho`` itens."""
+    itens = list(itens)
+    for inicio in range(0, len(itens), tamanho):
+        yield itens[inicio:inicio + tamanho]
+
+
+def ids_existentes(coluna_id, ids):
+    """Retorna o conjunto dos ids que existem, com uma consulta IN por bloco."""
+    existentes = set()
+    for bloco in em_blocos(set(ids)):
+        existentes.update(db.session.scalars(db.select(coluna_id).where(coluna_id.in_(bloco))))
+    return existentes
+
+
+def versoes_existentes(modelo, ids):
+    """Retorna ``{id: versao}`` dos ids que existem, com uma consulta IN por bloco.
+
+    O UPDATE em lote pela chave primária precisa da versão atual de cada
+    linha (ela entra no WHERE e é incrementada).
+    """
+    versoes = {}
+    for bloco in em_blocos(set(ids)):
+        consulta = db.select(modelo.id, modelo.versao).where(modelo.id.in_(bloco))
+        versoes.update((id, versao) for id, versao in db.session.execute(consulta))
+    return versoes
+
+
+def inserir_em_lote(modelo, linhas):
+    """Insere as linhas com executemany e retorna os ids gerados na mesma ordem.
+
+    Em bancos sem suporte a RETURNING em executemany os ids retornam como None.
+    """
+    if not linhas:
+        return []
+    # INSERT do Core na tabela: evita o custo do bulk insert do ORM por linha
+    tabela = modelo.__table__
+    dialeto = db.engine.dialect
+    if dialeto.name == 'sqlite' and dialeto.insert_executemany_returning:
+        # Com sort_by_parameter_order o SQLAlchemy insere uma linha por
+        # statement no SQLite. Sem ele os INSERTs vão em lotes de VALUES; na
+        # transação (que tem o lock de escrita) cada rowid novo é o maior
+        # existente + 1, então os ids em ordem crescente seguem a ordem das linhas
+        return sorted(db.session.scalars(insert(tabela).returning(tabela.c.id), linhas))
+    if dialeto.insert_executemany_returning_sort_by_parameter_order:
+        stmt = insert(tabela).returning(tabela.c.id, sort_by_parameter_order=True)
+        return list(db.session.scalars(stmt, linhas))
+    db.session.execute(insert(tabela), linhas)
+    return [None] * len(linhas)
+
+
+def ler_lote(chave=None):
+    """Lê o corpo de uma requisição de lote (lista JSON, ou ``{chave: [...]}``)."""
+    data = request.get_json(silent=True)
+    if chave is not None and isinstance(data, dict):
+        data = data.get(chave)
+    if not isinstance(data, list) or not data:
+        raise ErroValidacao('Lote inválido: envie uma lista não vazia')
+    if len(data) > TAMANHO_MAXIMO_LOTE:
+        raise ErroValidacao(f'Lote inválido: máximo de {TAMANHO_MAXIMO_LOTE} itens')
+    return data
+
+
+def ler_ids():
+    """Lê a lista de ids de uma requisição de lote (``[1, 2]`` ou ``{"ids": [1, 2]}``)."""
+    ids = ler_lote('ids')
+    if not all(isinstance(id, int) and not isinstance(id, bool) for id in ids):
+        raise ErroValidacao('Lote inválido: ids devem ser inteiros')
+    return ids
+
+
+def resposta_lote(resultados, status_sucesso):
+    """Monta a resposta com o resultado de cada item.
+
+    Responde ``status_sucesso`` se todos os itens foram processados e 207
+    (Multi-Status) se algum falhou.
+    """
+    erros = sum(1 for resultado in resultados if resultado['status'] != status_sucesso)
+    corpo = {
+        'sucesso': len(resultados) - erros,
+        'erros': erros,
+        'resultados': resultados
+    }
+    return jsonify(corpo), (status_sucesso if erros == 0 else 207)
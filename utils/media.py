@@ -0,0 +1,82 @@
+from flask import current_app
+from sqlalchemy import func, literal, select
+
+from database import db
+from models.aluno import Aluno
+
+
+def pesos_media():
+    """Pesos do primeiro e do segundo semestre na média final (configuração)."""
+    return (
+        float(current_app.config.get('MEDIA_PESO_PRIMEIRO_SEMESTRE', 1.0)),
+        float(current_app.config.get('MEDIA_PESO_SEGUNDO_SEMESTRE', 1.0))
+    )
+
+
+def validar_pesos(config):
+    """Confere os pesos de ``MEDIA_PESO_*`` na criação da aplicação.
+
+    Cada peso deve ser um número não negativo e a soma deve ser positiva,
+    senão toda média calculada dividiria por zero (ou teria o sinal
+    trocado). Levanta ``ValueError`` com a configuração a corrigir.
+    """
+    pesos = {}
+    for nome in ('MEDIA_PESO_PRIMEIRO_SEMESTRE', 'MEDIA_PESO_SEGUNDO_SEMESTRE'):
+        try:
+            pesos[nome] = float(config.get(nome, 1.0))
+        except (TypeError, ValueError):
+            raise ValueError(f'{nome} inválido: deve ser um número') from None
+        if pesos[nome] < 0:
+            raise ValueError(f'{nome} inválido: o peso não pode ser negativo')
+    if sum(pesos.values()) <= 0:
+        raise ValueError('MEDIA_PESO_PRIMEIRO_SEMESTRE + MEDIA_PESO_SEGUNDO_SEMESTRE deve ser maior que zero')
+
+
+def calcular_media(nota_primeiro_semestre, nota_segundo_semestre, pesos=None):
+    """Média final ponderada do aluno, ou None se faltar alguma das notas.
+
+    As operações são as mesmas de ``expressao_media``, para que o valor
+    gravado pelas rotas e o recalculado no banco sejam idênticos. Os lotes
+    passam os ``pesos`` lidos uma vez, em vez de lê-los da configuração a
+    cada aluno.
+    """
+    if nota_primeiro_semestre is None or nota_segundo_semestre is None:
+        return None
+    peso_primeiro, peso_segundo = pesos or pesos_media()
+    return (nota_primeiro_semestre * peso_primeiro + nota_segundo_semestre * peso_segundo) / (peso_primeiro + peso_segundo)
+
+
+def expressao_media(pesos=None):
+    """A média final como expressão SQL sobre as notas (NULL se faltar alguma)."""
+    peso_primeiro, peso_segundo = pesos or pesos_media()
+    return (
+        Aluno.nota_primeiro_semestre * literal(peso_primeiro) + Aluno.nota_segundo_semestre * literal(peso_segundo)
+    ) / literal(peso_primeiro + peso_segundo)
+
+
+def medias_divergentes(pesos=None):
+    """Quantidade de alunos cuja média gravada difere da calculada com os pesos."""
+    consulta = select(func.count()).select_from(Aluno).where(Aluno.media_final.is_distinct_from(expressao_media(pesos)))
+    return db.session.scalar(consulta)
+
+
+def recalcular_medias(pesos=None):
+    """Recalcula a média final de todos os alunos com um único UPDATE (sem commit).
+
+    Só as linhas cuja média muda são escritas (e têm a versão incrementada).
+    Depois os resumos das turmas são reconstruídos com um GROUP BY, já que
+    os aprovados dependem da média, e o cache de leitura é limpo no commit.
+    Retorna a quantidade de alunos alterados.
+    """
+    from utils.cache import invalidar_tudo
+    from utils.resumo import reconstruir_resumos
+
+    expressao = expressao_media(pesos)
+    resultado = db.session.execute(
+        db.update(Aluno).where(Aluno.media_final.is_distinct_from(expressao)).values(media_final=expressao),
+        execution_options={'synchronize_session': False}
+    )
+    if resultado.rowcount:
+        reconstruir_resumos()
+        invalidar_tudo()
+    return resultado.rowcount
@@ -0,0 +1,305 @@
+import glob
+import json
+import os
+import resource
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import db
+
+TIPO_CONTEUDO = 'text/plain; version=0.0.4; charset=utf-8'
+# Limites dos buckets (segundos) da duração das requisições e da espera por conexão
+BUCKETS_REQUISICAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONEXAO = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Nome: (tipo, ajuda, buckets dos histogramas)
+METRICAS = {
+    'escola_requisicoes_total': ('counter', 'Requisições atendidas, por rota, método e status', None),
+    'escola_requisicao_duracao_segundos': ('histogram', 'Duração das requisições, por rota e método', BUCKETS_REQUISICAO),
+    'escola_erros_total': ('counter', 'Respostas de erro (status 4xx e 5xx), por rota e status', None),
+    'escola_banco_espera_conexao_segundos': ('histogram', 'Tempo para obter uma conexão do pool, por bind', BUCKETS_CONEXAO),
+    'escola_banco_pool_conexoes': ('gauge', 'Conexões do pool, por bind e estado (em_uso, ociosas, overflow, tamanho)', None),
+    'escola_cache_acertos_total': ('counter', 'Leituras atendidas pelo cache de leitura', None),
+    'escola_cache_falhas_total': ('counter', 'Leituras que não estavam no cache de leitura', None),
+    'escola_cache_entradas': ('gauge', 'Entradas no cache de leitura', None),
+    'process_resident_memory_bytes': ('gauge', 'Memória residente (RSS) do processo', None),
+    'process_virtual_memory_bytes': ('gauge', 'Memória virtual do processo', None),
+    'process_cpu_seconds_total': ('counter', 'Tempo de CPU do processo (usuário e sistema)', None),
+    'process_start_time_seconds': ('gauge', 'Início do processo, em segundos desde a época', None),
+}
+
+_INICIO_PROCESSO = time.time()
+# Marca em session.info: início da transação, até a conexão ser obtida
+CHAVE_INICIO_TRANSACAO = 'metricas_inicio_transacao'
+
+
+class Registro:
+    """Contadores e histogramas do processo.
+
+    Cada observação faz o trabalho pesado (escolha do bucket) fora da trava
+    e a segura só para somar, então a disputa entre threads é mínima.
+    """
+
+    def __init__(self):
+        self._contadores = {}
+        self._histogramas = {}
+        self._trava = threading.Lock()
+
+    def somar(self, nome, rotulos, valor=1):
+        chave = (nome, rotulos)
+        with self._trava:
+            self._contadores[chave] = self._contadores.get(chave, 0) + valor
+
+    def observar(self, nome, rotulos, valor):
+        buckets = METRICAS[nome][2]
+        indice = bisect_left(buckets, valor)
+        chave = (nome, rotulos)
+        with self._trava:
+            contagens = self._histogramas.get(chave)
+            if contagens is None:
+                # Um contador por bucket, mais o +Inf e a soma
+                contagens = self._histogramas[chave] = [0] * (len(buckets) + 2)
+            contagens[indice] += 1
+            contagens[-1] += valor
+
+    def instantaneo(self):
+        with self._trava:
+            contadores = [[nome, rotulos, valor] for (nome, rotulos), valor in self._contadores.items()]
+            histogramas = [[nome, rotulos, list(contagens)] for (nome, rotulos), contagens in self._histogramas.items()]
+        return {'contadores': contadores, 'histogramas': histogramas}
+
+
+def _memoria():
+    # /proc/self/statm: páginas de memória virtual e residente (Linux)
+    try:
+        with open('/proc/self/statm') as f:
+            virtual, residente = (int(valor) * resource.getpagesize() for valor in f.read().split()[:2])
+        return residente, virtual
+    except OSError:
+        # Sem /proc, o pico de RSS (KiB no Linux, bytes no macOS) é a melhor aproximação
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, None
+
+
+def _medidores(app):
+    """Valores do momento neste processo: pool, cache e memória."""
+    medidores = []
+    with app.app_context():
+        for chave, engine in db.engines.items():
+            pool = engine.pool
+            if not hasattr(pool, 'checkedout'):
+                continue
+            bind = (('bind', chave or 'primario'),)
+            medidores += [
+                ['escola_banco_pool_conexoes', bind + (('estado', 'em_uso'),), pool.checkedout()],
+                ['escola_banco_pool_conexoes', bind + (('estado', 'ociosas'),), pool.checkedin()],
+                ['escola_banco_pool_conexoes', bind + (('estado', 'overflow'),), max(0, pool.overflow())],
+                ['escola_banco_pool_conexoes', bind + (('estado', 'tamanho'),), pool.size()]
+            ]
+    cache = app.extensions.get('cache')
+    contadores = []
+    if cache is not None:
+        estatisticas = cache.estatisticas()
+        medidores.append(['escola_cache_entradas', (), estatisticas['entradas']])
+        contadores += [
+            ['escola_cache_acertos_total', (), estatisticas['acertos']],
+            ['escola_cache_falhas_total', (), estatisticas['falhas']]
+        ]
+    residente, virtual = _memoria()
+    medidores.append(['process_resident_memory_bytes', (), residente])
+    if virtual is not None:
+        medidores.append(['process_virtual_memory_bytes', (), virtual])
+    tempos = os.times()
+    medidores += [
+        ['process_cpu_seconds_total', (), tempos.user + tempos.system],
+        ['process_start_time_seconds', (), _INICIO_PROCESSO]
+    ]
+    return contadores, medidores
+
+
+def coletar(app):
+    """Estado deste processo, serializável em JSON (usado também no modo multiprocesso)."""
+    instantaneo = app.extensions['metricas'].instantaneo()
+    contadores, medidores = _medidores(app)
+    instantaneo['contadores'] += contadores
+    instantaneo['medidores'] = medidores
+    instantaneo['pid'] = os.getpid()
+    return instantaneo
+
+
+def _processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _gravar(pasta, instantaneo):
+    # Escrita atômica: quem lê nunca vê um arquivo pela metade
+    caminho = os.path.join(pasta, f"{instantaneo['pid']}.json")
+    temporario = f'{caminho}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(instantaneo, f)
+    os.replace(temporario, caminho)
+
+
+def _ler(pasta):
+    instantaneos = []
+    for caminho in glob.glob(os.path.join(pasta, '*.json')):
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                instantaneos.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return instantaneos
+
+
+def combinar(instantaneos, multiprocesso=False):
+    """Soma contadores e histogramas de todos os processos.
+
+    Os de processos encerrados continuam somados (contadores não podem
+    diminuir); medidores (pool, cache, memória) são por processo, com o
+    rótulo ``pid``, e só dos processos vivos.
+    """
+    contadores, histogramas, medidores = {}, {}, {}
+    for instantaneo in instantaneos:
+        for nome, rotulos, valor in instantaneo['contadores']:
+            rotulos = tuple(map(tuple, rotulos))
+            if nome.startswith(('escola_cache_', 'process_')) and multiprocesso:
+                rotulos += (('pid', str(instantaneo['pid'])),)
+            contadores[(nome, rotulos)] = contadores.get((nome, rotulos), 0) + valor
+        for nome, rotulos, contagens in instantaneo['histogramas']:
+            chave = (nome, tuple(map(tuple, rotulos)))
+            atual = histogramas.get(chave)
+            histogramas[chave] = [a + b for a, b in zip(atual, contagens)] if atual else list(contagens)
+        if multiprocesso and not _processo_vivo(instantaneo['pid']):
+            continue
+        for nome, rotulos, valor in instantaneo['medidores']:
+            rotulos = tuple(map(tuple, rotulos))
+            if multiprocesso:
+                rotulos += (('pid', str(instantaneo['pid'])),)
+            chave = (nome, rotulos)
+            # CPU é contador por processo, os demais são medidores
+            if METRICAS[nome][0] == 'counter':
+                contadores[chave] = valor
+            else:
+                medidores[chave] = valor
+    return contadores, histogramas, medidores
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(rotulos):
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in rotulos) + '}'
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def formatar(contadores, histogramas, medidores):
+    """Texto no formato de exposição do Prometheus (versão 0.0.4)."""
+    por_nome = {}
+    for origem in (contadores, medidores, histogramas):
+        for (nome, rotulos), valor in origem.items():
+            por_nome.setdefault(nome, []).append((rotulos, valor))
+
+    linhas = []
+    for nome, (tipo, ajuda, buckets) in METRICAS.items():
+        amostras = por_nome.get(nome)
+        if not amostras:
+            continue
+        linhas += [f'# HELP {nome} {ajuda}', f'# TYPE {nome} {tipo}']
+        for rotulos, valor in sorted(amostras):
+            if tipo != 'histogram':
+                linhas.append(f'{nome}{_rotulos(rotulos)} {_numero(valor)}')
+                continue
+            acumulado = 0
+            for limite, quantidade in zip((*buckets, '+Inf'), valor[:-1]):
+                acumulado += quantidade
+                linhas.append(f'{nome}_bucket{_rotulos(rotulos + (("le", str(limite)),))} {acumulado}')
+            linhas.append(f'{nome}_sum{_rotulos(rotulos)} {_numero(valor[-1])}')
+            linhas.append(f'{nome}_count{_rotulos(rotulos)} {acumulado}')
+    return '\n'.join(linhas) + '\n'
+
+
+def exportar(app):
+    """Métricas da aplicação (de todos os workers, com ``METRICAS_PASTA``) em texto."""
+    pasta = app.config.get('METRICAS_PASTA')
+    instantaneo = coletar(app)
+    if not pasta:
+        return formatar(*combinar([instantaneo]))
+    _gravar(pasta, instantaneo)
+    outros = [item for item in _ler(pasta) if item['pid'] != instantaneo['pid']]
+    return formatar(*combinar([instantaneo, *outros], multiprocesso=True))
+
+
+def _inicio_transacao(sessao, transacao):
+    if transacao.parent is None:
+        sessao.info[CHAVE_INICIO_TRANSACAO] = time.perf_counter()
+
+
+def _conexao_obtida(sessao, transacao, conexao):
+    # Entre a criação da transação e o begin a sessão espera o checkout do pool
+    inicio = sessao.info.pop(CHAVE_INICIO_TRANSACAO, None)
+    if inicio is None or not has_app_context():
+        return
+    registro = current_app.extensions.get('metricas')
+    if registro is not None:
+        bind = next((chave or 'primario' for chave, engine in db.engines.items() if engine is conexao.engine), 'desconhecido')
+        registro.observar('escola_banco_espera_conexao_segundos', (('bind', bind),), time.perf_counter() - inicio)
+
+
+def iniciar_metricas(app):
+    """Conta requisições, erros e latência por rota e mede a espera por conexões.
+
+    As métricas ficam em ``GET /metrics``. Com vários processos (gunicorn),
+    ``METRICAS_PASTA`` aponta para uma pasta compartilhada e vazia a cada
+    subida do servidor: cada worker grava ali o próprio estado a cada
+    ``METRICAS_INTERVALO`` segundos (e ao atender o ``/metrics``), e o
+    worker que responde soma os de todos.
+    """
+    if not app.config.get('METRICAS_HABILITADAS', True):
+        return
+    registro = app.extensions['metricas'] = Registro()
+    pasta = app.config.get('METRICAS_PASTA')
+    intervalo = app.config.get('METRICAS_INTERVALO', 5)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    if not event.contains(Session, 'after_begin', _conexao_obtida):
+        event.listen(Session, 'after_transaction_create', _inicio_transacao)
+        event.listen(Session, 'after_begin', _conexao_obtida)
+    gravado_em = [0.0]
+
+    @app.before_request
+    def iniciar_cronometro():
+        g.inicio_metricas = time.perf_counter()
+
+    @app.after_request
+    def registrar_requisicao(resposta):
+        inicio = g.pop('inicio_metricas', None)
+        if inicio is None:
+            return resposta
+        endpoint = request.endpoint or 'desconhecido'
+        rota = (('blueprint', request.blueprint or ''), ('endpoint', endpoint), ('metodo', request.method))
+        registro.somar('escola_requisicoes_total', rota + (('status', str(resposta.status_code)),))
+        # A duração vai até o servidor fechar a resposta: nas listagens e
+        # exportações em streaming o corpo ainda é gerado depois daqui
+        resposta.call_on_close(lambda: registro.observar('escola_requisicao_duracao_segundos', rota, time.perf_counter() - inicio))
+        if resposta.status_code >= 400:
+            registro.somar('escola_erros_total', (('endpoint', endpoint), ('status', str(resposta.status_code))))
+        if pasta and time.monotonic() - gravado_em[0] >= intervalo:
+            gravado_em[0] = time.monotonic()
+            _gravar(pasta, coletar(app))
+        return resposta
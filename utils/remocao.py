@@ -0,0 +1,115 @@
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.sql.dml import Update
+
+from database import db
+from models.aluno import Aluno
+from models.professor import Professor
+from models.turma import Turma
+from utils.cache import invalidar, invalidar_tudo
+from utils.lote import em_blocos
+from utils.resumo import remover_resumos
+
+# O que acontece com os dependentes (alunos da turma, turmas do professor) na remoção
+POLITICAS = ('anular', 'restringir', 'cascata')
+
+
+def politica(nome):
+    """Política configurada em ``POLITICA_REMOCAO_TURMA`` ou ``POLITICA_REMOCAO_PROFESSOR``."""
+    valor = current_app.config.get(nome, 'anular')
+    if valor not in POLITICAS:
+        raise ValueError(f"{nome} inválida: use {', '.join(POLITICAS)}")
+    return valor
+
+
+def _executar(statement, modelo):
+    """Executa um UPDATE ou DELETE em lote e invalida o cache das linhas afetadas.
+
+    Com RETURNING os ids alterados vêm no próprio statement; sem ele (MySQL)
+    o cache inteiro é limpo. Retorna a quantidade de linhas afetadas.
+    """
+    dialeto = db.session.get_bind().dialect
+    if dialeto.update_returning if isinstance(statement, Update) else dialeto.delete_returning:
+        ids = db.session.scalars(statement.returning(modelo.id)).all()
+        invalidar(modelo, ids)
+        return len(ids)
+    resultado = db.session.execute(statement)
+    if resultado.rowcount:
+        invalidar_tudo()
+    return resultado.rowcount
+
+
+def remover_dependentes_turmas(ids):
+    """Aplica ``POLITICA_REMOCAO_TURMA`` aos alunos das turmas, antes de removê-las (sem commit).
+
+    ``anular`` tira os alunos da turma e ``cascata`` os remove, com um
+    statement por bloco de turmas; ``restringir`` não altera nada e devolve
+    as turmas que têm alunos, que não devem ser removidas. Os resumos das
+    demais turmas são removidos. Retorna o conjunto das turmas restritas.
+    """
+    acao = politica('POLITICA_REMOCAO_TURMA')
+    restritas = set()
+    for bloco in em_blocos(ids):
+        filtro = Aluno.turma_id.in_(bloco)
+        if acao == 'restringir':
+            com_alunos = set(db.session.scalars(select(Aluno.turma_id).where(filtro).distinct()))
+            restritas |= com_alunos
+            bloco = [id for id in bloco if id not in com_alunos]
+        elif acao == 'cascata':
+            _executar(db.delete(Aluno).where(filtro), Aluno)
+        else:
+            # UPDATE explícito (e não só o ON DELETE SET NULL) para incrementar a versão dos alunos
+            _executar(db.update(Aluno).where(filtro).values(turma_id=None), Aluno)
+        remover_resumos(bloco)
+    return restritas
+
+
+def remover_dependentes_professores(ids):
+    """Aplica ``POLITICA_REMOCAO_PROFESSOR`` às turmas dos professores, antes de removê-los (sem commit).
+
+    Em ``cascata`` as turmas são removidas seguindo ``POLITICA_REMOCAO_TURMA``;
+    se ela for ``restringir``, os professores com alguma turma com alunos
+    ficam restritos e nenhuma das suas turmas é alterada. Retorna o
+    conjunto dos professores restritos.
+    """
+    acao = politica('POLITICA_REMOCAO_PROFESSOR')
+    restritos = set()
+    for bloco in em_blocos(ids):
+        filtro = Turma.professor_id.in_(bloco)
+        if acao == 'restringir':
+            restritos |= set(db.session.scalars(select(Turma.professor_id).where(filtro).distinct()))
+        elif acao == 'cascata':
+            if politica('POLITICA_REMOCAO_TURMA') == 'restringir':
+                consulta = select(Turma.professor_id).join(Aluno, Aluno.turma_id == Turma.id).where(filtro).distinct()
+                com_alunos = set(db.session.scalars(consulta))
+                restritos |= com_alunos
+                filtro = Turma.professor_id.in_([id for id in bloco if id not in com_alunos])
+            turmas = db.session.scalars(select(Turma.id).where(filtro)).all()
+            remover_dependentes_turmas(turmas)
+            for bloco_turmas in em_blocos(turmas):
+                _executar(db.delete(Turma).where(Turma.id.in_(bloco_turmas)), Turma)
+        else:
+            _executar(db.update(Turma).where(filtro).values(professor_id=None), Turma)
+    return restritos
+
+
+def remover_turmas(ids):
+    """Remove as turmas e trata seus alunos pela política, um bloco por vez (sem commit).
+
+    Retorna o conjunto das turmas restritas, que não foram removidas.
+    """
+    restritas = remover_dependentes_turmas(ids)
+    for bloco in em_blocos([id for id in ids if id not in restritas]):
+        _executar(db.delete(Turma).where(Turma.id.in_(bloco)), Turma)
+    return restritas
+
+
+def remover_professores(ids):
+    """Remove os professores e trata suas turmas pela política, um bloco por vez (sem commit).
+
+    Retorna o conjunto dos professores restritos, que não foram removidos.
+    """
+    restritos = remover_dependentes_professores(ids)
+    for bloco in em_blocos([id for id in ids if id not in restritos]):
+        _executar(db.delete(Professor).where(Professor.id.in_(bloco)), Professor)
+    return restritos
@@ -0,0 +1,149 @@
+from collections import defaultdict
+
+from flask import current_app
+from sqlalchemy import case, func, insert, select
+
+from database import db
+from models.aluno import Aluno
+from models.resumo_turma import ResumoTurma
+
+COLUNAS_NOTAS = ('nota_primeiro_semestre', 'nota_segundo_semestre', 'media_final')
+CAMPOS_ESTADO = ('turma_id', *COLUNAS_NOTAS)
+
+
+def estado(aluno, alteracoes=None):
+    """Valores do aluno que entram no resumo da turma.
+
+    ``aluno`` pode ser o objeto ou uma linha com as mesmas colunas;
+    ``alteracoes`` sobrepõe valores ainda não gravados.
+    """
+    alteracoes = alteracoes or {}
+    return tuple(alteracoes[campo] if campo in alteracoes else getattr(aluno, campo) for campo in CAMPOS_ESTADO)
+
+
+def _somar(deltas, valores, sinal, media_aprovacao):
+    turma_id, *notas = valores
+    if turma_id is None:
+        return
+    delta = deltas[turma_id]
+    delta['quantidade_alunos'] += sinal
+    for nome, nota in zip(COLUNAS_NOTAS, notas):
+        if nota is not None:
+            delta[f'{nome}_quantidade'] += sinal
+            delta[f'{nome}_soma'] += sinal * nota
+            delta[f'{nome}_soma_quadrados'] += sinal * nota * nota
+    if notas[-1] is not None and notas[-1] >= media_aprovacao:
+        delta['aprovados'] += sinal
+
+
+def registrar_alteracoes(alteracoes):
+    """Atualiza os resumos das turmas afetadas por alterações de alunos.
+
+    ``alteracoes`` é uma lista de pares ``(antes, depois)`` com o ``estado``
+    do aluno (None na criação/remoção). As diferenças são somadas por turma
+    e aplicadas com um UPDATE incremental, na transação atual.
+    """
+    media_aprovacao = current_app.config.get('MEDIA_APROVACAO', 6.0)
+    deltas = defaultdict(lambda: defaultdict(int))
+    for antes, depois in alteracoes:
+        if antes == depois:
+            continue
+        if antes is not None:
+            _somar(deltas, antes, -1, media_aprovacao)
+        if depois is not None:
+            _somar(deltas, depois, 1, media_aprovacao)
+
+    deltas = {turma_id: {coluna: valor for coluna, valor in delta.items() if valor} for turma_id, delta in sorted(deltas.items())}
+    deltas = {turma_id: delta for turma_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto in ('sqlite', 'postgresql'):
+        _aplicar_upsert(dialeto, deltas)
+    else:
+        for turma_id, delta in deltas.items():
+            _aplicar(dialeto, turma_id, delta)
+
+
+def registrar_alteracao(antes, depois):
+    registrar_alteracoes([(antes, depois)])
+
+
+def _aplicar_upsert(dialeto, deltas):
+    # Todas as turmas em um upsert só (executemany): o insert do dialeto não
+    # entra no cache de statements do SQLAlchemy, e cada statement seria
+    # compilado de novo
+    if dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+    else:
+        from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+    tabela = ResumoTurma.__table__
+    colunas = sorted(set().union(*deltas.values()))
+    stmt = insert_dialeto(tabela)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['turma_id'], set_={coluna: tabela.c[coluna] + stmt.excluded[coluna] for coluna in colunas}
+    )
+    linhas = [{'turma_id': turma_id, **{coluna: delta.get(coluna, 0) for coluna in colunas}} for turma_id, delta in deltas.items()]
+    db.session.execute(stmt, linhas)
+
+
+def _aplicar(dialeto, turma_id, delta):
+    incrementos = {coluna: getattr(ResumoTurma, coluna) + valor for coluna, valor in delta.items()}
+    if dialeto == 'mysql':
+        from sqlalchemy.dialects.mysql import insert as insert_mysql
+        stmt = insert_mysql(ResumoTurma).values(turma_id=turma_id, **delta)
+        db.session.execute(stmt.on_duplicate_key_update(**incrementos))
+    else:
+        resultado = db.session.execute(
+            db.update(ResumoTurma).where(ResumoTurma.turma_id == turma_id).values(**incrementos)
+        )
+        if resultado.rowcount == 0:
+            db.session.execute(insert(ResumoTurma).values(turma_id=turma_id, **delta))
+
+
+def remover_resumos(turma_ids):
+    """Remove os resumos de turmas deletadas."""
+    db.session.execute(db.delete(ResumoTurma).where(ResumoTurma.turma_id.in_(list(turma_ids))))
+
+
+def _calcular_resumos():
+    """Resumos calculados direto dos alunos, com um GROUP BY."""
+    media_aprovacao = current_app.config.get('MEDIA_APROVACAO', 6.0)
+    colunas = [Aluno.turma_id.label('turma_id'), func.count(Aluno.id).label('quantidade_alunos')]
+    for nome in COLUNAS_NOTAS:
+        coluna = getattr(Aluno, nome)
+        colunas += [
+            func.count(coluna).label(f'{nome}_quantidade'),
+            func.coalesce(func.sum(coluna), 0).label(f'{nome}_soma'),
+            func.coalesce(func.sum(coluna * coluna), 0).label(f'{nome}_soma_quadrados')
+        ]
+    colunas.append(func.sum(case((Aluno.media_final >= media_aprovacao, 1), else_=0)).label('aprovados'))
+    consulta = select(*colunas).where(Aluno.turma_id.isnot(None)).group_by(Aluno.turma_id)
+    return {linha['turma_id']: dict(linha) for linha in db.session.execute(consulta).mappings()}
+
+
+def verificar_resumos(tolerancia=1e-6):
+    """Compara os resumos gravados com os recalculados; retorna as divergências."""
+    calculados = _calcular_resumos()
+    gravados = {resumo.turma_id: resumo for resumo in db.session.scalars(select(ResumoTurma))}
+    divergencias = []
+    for turma_id in sorted(set(calculados) | set(gravados)):
+        esperado = calculados.get(turma_id, {})
+        resumo = gravados.get(turma_id)
+        for coluna in ResumoTurma.__table__.c.keys():
+            if coluna == 'turma_id':
+                continue
+            valor_esperado = esperado.get(coluna) or 0
+            valor_gravado = (getattr(resumo, coluna) if resumo else 0) or 0
+            if abs(valor_esperado - valor_gravado) > tolerancia * max(1, abs(valor_esperado)):
+                divergencias.append({'turma_id': turma_id, 'coluna': coluna, 'esperado': valor_esperado, 'gravado': valor_gravado})
+    return divergencias
+
+
+def reconstruir_resumos():
+    """Recalcula todos os resumos a partir dos alunos (sem commit)."""
+    calculados = _calcular_resumos()
+    db.session.execute(db.delete(ResumoTurma))
+    if calculados:
+        db.session.execute(insert(ResumoTurma), list(calculados.values()))
+    return len(calculados)
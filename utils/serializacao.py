@@ -0,0 +1,70 @@
+from datetime import date
+from functools import partial
+
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _padrao(obj):
+    # Datas em ISO 8601 (YYYY-MM-DD), como o orjson, em vez do formato HTTP do Flask
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return _default(obj)
+
+
+class ProvedorJSON(DefaultJSONProvider):
+    """JSON da aplicação com orjson, se instalado, e a biblioteca padrão senão.
+
+    O orjson serializa date/datetime nativamente (ISO 8601) e gera bytes
+    diretamente, sem passar por str. Nos dois casos as chaves continuam
+    ordenadas e a saída é UTF-8, sem escapar acentos.
+    """
+
+    default = staticmethod(_padrao)
+    ensure_ascii = False
+
+    def _opcoes_orjson(self, kwargs):
+        """Opções do orjson equivalentes aos kwargs, ou None se algum não tem equivalente."""
+        if orjson is None or kwargs.get('ensure_ascii') or not kwargs.keys() <= {'separators', 'sort_keys', 'indent', 'default', 'ensure_ascii'}:
+            return None
+        opcoes = 0
+        if kwargs.get('sort_keys', self.sort_keys):
+            opcoes |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            opcoes |= orjson.OPT_INDENT_2
+        return opcoes
+
+    def serializador_bytes(self, **kwargs):
+        """Função ``obj -> bytes`` com as opções resolvidas uma vez, para
+        serializar muitos objetos seguidos (linhas de NDJSON, lotes)."""
+        opcoes = self._opcoes_orjson(kwargs)
+        if opcoes is None:
+            return lambda obj: self.dumps(obj, **kwargs).encode('utf-8')
+        return partial(orjson.dumps, default=kwargs.get('default', self.default), option=opcoes)
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serializa para bytes UTF-8 (sem a conversão para str no orjson)."""
+        return self.serializador_bytes(**kwargs)(obj)
+
+    def dumps(self, obj, **kwargs):
+        opcoes = self._opcoes_orjson(kwargs)
+        if opcoes is None:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=opcoes).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            corpo = self.dumps_bytes(obj, indent=2)
+        else:
+            corpo = self.dumps_bytes(obj, separators=(',', ':'))
+        return self._app.response_class(corpo + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,36 @@
+from datetime import date, datetime
+
+
+def e_inteiro(valor):
+    """Verdadeiro para inteiros JSON (booleanos não contam)."""
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def e_numero(valor):
+    """Verdadeiro para números JSON, inteiros ou decimais (booleanos não contam)."""
+    return isinstance(valor, (int, float)) and not isinstance(valor, bool)
+
+
+def ler_data(valor):
+    """Converte uma data ``YYYY-MM-DD`` (lança TypeError ou ValueError se inválida).
+
+    O caso comum (com zeros à esquerda) usa ``date.fromisoformat``, bem mais
+    rápido que ``strptime`` nos lotes; as demais formas aceitas pelo
+    ``strptime`` (ex.: ``2010-1-5``) continuam valendo.
+    """
+    if isinstance(valor, str) and len(valor) == 10 and valor[4] == '-' and valor[7] == '-':
+        return date.fromisoformat(valor)
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+
+class ErroValidacao(Exception):
+    """Erro nos dados enviados pelo cliente.
+
+    ``status`` é o código HTTP a ser respondido (400 para dados inválidos,
+    404 para referências a registros inexistentes).
+    """
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
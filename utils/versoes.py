@@ -0,0 +1,115 @@
+import random
+from weakref import WeakKeyDictionary
+
+from flask import current_app
+from sqlalchemy import and_, event, insert, or_, select, update
+from sqlalchemy.sql.dml import UpdateBase
+
+from database import agora, db
+from models.versao_tabela import VersaoTabela
+
+# Tabelas alteradas na transação, guardadas em connection.info até o commit
+CHAVE_ALTERADAS = 'tabelas_alteradas'
+# Separa o nome da tabela do número da fatia nas linhas de versao_tabela ("aluno#3")
+SEPARADOR_FATIA = '#'
+# Fatias das versões de cada engine monitorado
+_fatias = WeakKeyDictionary()
+
+
+def nome_fatia(tabela, fatia):
+    """Linha de versao_tabela de uma fatia (a fatia 0 é a linha com o nome da tabela)."""
+    return tabela if fatia == 0 else f'{tabela}{SEPARADOR_FATIA}{fatia}'
+
+
+def _marcar(conexao, statement, *args):
+    # Todo INSERT/UPDATE/DELETE passa por aqui: flush do ORM (inclusive
+    # cascatas) e operações em lote executadas direto na sessão
+    if isinstance(statement, UpdateBase):
+        nome = statement.table.name
+        if nome != VersaoTabela.__tablename__:
+            conexao.info.setdefault(CHAVE_ALTERADAS, set()).add(nome)
+
+
+def _incrementar(conexao, nomes):
+    tabela = VersaoTabela.__table__
+    return conexao.execute(
+        update(tabela)
+        .where(tabela.c.tabela.in_(sorted(nomes)))
+        .values(versao=tabela.c.versao + 1, atualizado_em=agora())
+    ).rowcount
+
+
+def _registrar(conexao):
+    tabelas = conexao.info.pop(CHAVE_ALTERADAS, None)
+    if tabelas:
+        # Uma fatia sorteada por commit: escritores concorrentes da mesma
+        # tabela só disputam o lock da linha quando sorteiam a mesma fatia
+        fatia = random.randrange(_fatias.get(conexao.engine, 1))
+        if _incrementar(conexao, [nome_fatia(tabela, fatia) for tabela in tabelas]) < len(tabelas) and fatia:
+            # Fatia ainda não criada (VERSOES_FATIAS aumentado sem "flask criar-banco")
+            _incrementar(conexao, tabelas)
+
+
+def _descartar(conexao):
+    conexao.info.pop(CHAVE_ALTERADAS, None)
+
+
+def monitorar_alteracoes(engine, fatias=1):
+    """Passa a incrementar a versão das tabelas alteradas em cada commit.
+
+    As tabelas alteradas são anotadas na conexão a cada statement e, no
+    commit, as versões são incrementadas com um único UPDATE, na mesma
+    transação, logo antes do COMMIT. Em rollback as anotações são descartadas.
+
+    A versão de cada tabela é dividida em ``fatias`` linhas e cada commit
+    incrementa uma delas, sorteada: no PostgreSQL e no MySQL o lock da linha
+    (mantido do UPDATE até o COMMIT) deixaria todos os commits que alteram a
+    tabela em fila; com fatias só os que sorteiam a mesma linha esperam.
+    """
+    _fatias[engine] = max(1, fatias)
+    if event.contains(engine, 'commit', _registrar):
+        return
+    event.listen(engine, 'before_execute', _marcar)
+    event.listen(engine, 'commit', _registrar)
+    event.listen(engine, 'rollback', _descartar)
+
+
+def criar_versoes():
+    """Cria as linhas de versão que faltam (``VERSOES_FATIAS`` por tabela do banco)."""
+    existentes = set(db.session.scalars(select(VersaoTabela.tabela)))
+    nomes = [
+        nome_fatia(tabela.name, fatia)
+        for tabela in db.metadata.sorted_tables if tabela.name != VersaoTabela.__tablename__
+        for fatia in range(max(1, current_app.config.get('VERSOES_FATIAS', 1)))
+    ]
+    faltando = [{'tabela': nome, 'versao': 1, 'atualizado_em': agora()} for nome in nomes if nome not in existentes]
+    if faltando:
+        db.session.execute(insert(VersaoTabela), faltando)
+    db.session.commit()
+
+
+def ler_versoes(modelos):
+    """Versão e data de alteração das tabelas dos modelos, em uma consulta.
+
+    Retorna ``{tabela: (versao, atualizado_em)}``; sem modelos não consulta.
+    A versão é a soma das fatias, que cresce a cada commit, e a data a mais
+    recente entre elas.
+    """
+    tabelas = sorted({modelo.__table__.name for modelo in modelos})
+    if not tabelas:
+        return {}
+    coluna = VersaoTabela.tabela
+    # A linha da tabela e as das fatias ("aluno#1" a "aluno#N": entre "aluno#" e "aluno$")
+    filtro = or_(*(
+        or_(coluna == tabela, and_(coluna > f'{tabela}{SEPARADOR_FATIA}', coluna < f'{tabela}$'))
+        for tabela in tabelas
+    ))
+    consulta = select(coluna, VersaoTabela.versao, VersaoTabela.atualizado_em).where(filtro)
+    versoes = {tabela: (0, None) for tabela in tabelas}
+    for linha in db.session.execute(consulta):
+        tabela = linha.tabela.split(SEPARADOR_FATIA)[0]
+        versao, atualizado_em = versoes[tabela]
+        if atualizado_em is None or linha.atualizado_em > atualizado_em:
+            atualizado_em = linha.atualizado_em
+        versoes[tabela] = (versao + linha.versao, atualizado_em)
+    return versoes